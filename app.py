@@ -1,6 +1,9 @@
 import os
 from flask import Flask
 from config import Config
+from database import db, query_stats, sales_rollup
+from utils import email_outbox, formatting, image_pipeline, logging_setup
+from payments import webhook_processor
 
 # Blueprints
 from routes.auth import auth_bp
@@ -10,12 +13,29 @@ from routes.checkout import checkout_bp
 from routes.user import user_bp
 from routes.admin import admin_bp
 from routes.payment import payment_bp
+from routes.debug import debug_bp
 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Queue-based JSON logging, request ids
+    logging_setup.init_app(app)
+
+    # Request-scoped DB connections
+    db.init_app(app)
+    query_stats.init_app(app)
+
+    # Outbox, webhook and rollup workers start lazily in each worker process
+    email_outbox.init_app(app)
+    webhook_processor.init_app(app)
+    sales_rollup.init_app(app)
+
+    # Jinja filters and helpers
+    formatting.init_app(app)
+    image_pipeline.init_app(app)
+
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(shop_bp)
@@ -25,6 +45,10 @@ def create_app():
     app.register_blueprint(admin_bp)
     app.register_blueprint(payment_bp)
 
+    # Query stats are only exposed when debugging
+    if app.debug or Config.QUERY_STATS_DEBUG_ENDPOINT:
+        app.register_blueprint(debug_bp)
+
     return app  # IMPORTANT
 
 
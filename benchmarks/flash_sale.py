@@ -0,0 +1,338 @@
+"""
+Flash-sale load simulator for the order path.
+
+Runs hundreds of simulated shoppers against a freshly seeded database,
+each doing: login -> /cart/add -> /checkout/ -> /checkout/place-order.
+A share of shoppers double-submit their checkout token concurrently.
+
+Usage:
+    python -m benchmarks.flash_sale                      # temporary SQLite file
+    python -m benchmarks.flash_sale --database-url postgresql://.../bench_db
+
+The PostgreSQL database is wiped and re-seeded: never point it at real data.
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from config import Config
+
+
+PASSWORD = "flash-sale"
+
+
+# =========================
+# SETUP
+# =========================
+def configure_database(database_url):
+    if database_url:
+        if database_url.startswith("postgres://"):
+            database_url = database_url.replace("postgres://", "postgresql://", 1)
+
+        Config.DATABASE_URI = database_url
+        Config.DB_TYPE = "postgres"
+    else:
+        Config.DATABASE_URI = os.path.join(tempfile.mkdtemp(), "flash_sale.db")
+        Config.DB_TYPE = "sqlite"
+
+    # Every shopper is a separate session; keep the pool large enough
+    Config.DB_POOL_MAX_SIZE = max(Config.DB_POOL_MAX_SIZE, 50)
+    Config.QUERY_STATS_ENABLED = False
+
+
+def clear_tables(conn, tables):
+    """
+    Empty tables left by an earlier run, children before parents so
+    foreign keys hold on PostgreSQL. Tables this database never
+    created (order_status_history, reviews, ...) are skipped.
+    """
+
+    for table in tables:
+        try:
+            conn.execute(f"DELETE FROM {table}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            if "no such table" not in str(e) and "does not exist" not in str(e):
+                raise
+
+
+def seed(args):
+    from database.db import get_db_connection
+    from database.init_db import init_db
+
+    init_db()
+
+    conn = get_db_connection()
+
+    clear_tables(conn, (
+        "checkout_tokens", "cart_items", "carts", "order_status_history", "reviews",
+        "order_items", "orders", "product_media", "products", "users",
+        "sales_daily", "sales_daily_products", "sales_rollup_deltas", "email_outbox",
+    ))
+
+    product_ids = []
+
+    for i in range(args.products):
+        row = conn.execute(
+            """
+            INSERT INTO products (name, description, price, stock, category, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            RETURNING id
+            """,
+            (f"Flash item {i + 1}", "Flash sale", 499.0, args.stock, "Flash", int(time.time()))
+        ).fetchone()
+        product_ids.append(row["id"])
+
+    # Hashing is deliberately slow; one hash serves every shopper
+    password_hash = generate_password_hash(PASSWORD)
+
+    emails = [f"shopper{i}@flash.test" for i in range(args.shoppers)]
+    placeholders = ", ".join(["(?, ?, ?)"] * len(emails))
+    conn.execute(
+        f"INSERT INTO users (name, email, password_hash) VALUES {placeholders}",
+        [v for i, email in enumerate(emails) for v in (f"Shopper {i}", email, password_hash)]
+    )
+
+    conn.commit()
+    conn.close()
+
+    return product_ids, emails
+
+
+# =========================
+# SHOPPER
+# =========================
+class Recorder:
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.exceptions = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def call(self, endpoint, fn):
+        started = time.perf_counter()
+
+        try:
+            response = fn()
+        except Exception as e:
+            with self._lock:
+                self.exceptions[f"{endpoint}: {type(e).__name__}: {e}"[:160]] += 1
+                self.statuses[endpoint]["exception"] += 1
+            return None
+
+        elapsed = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][response.status_code] += 1
+
+        return response
+
+
+def order_form(token):
+    return {
+        "payment_method": "COD",
+        "checkout_token": token,
+        "full_name": "Flash Shopper",
+        "phone": "9999999999",
+        "address": "1 Sale Street",
+        "city": "Mumbai",
+        "state": "MH",
+        "pincode": "400001",
+    }
+
+
+def run_shopper(app, recorder, email, product_id, quantity, double_submit):
+    client = app.test_client()
+
+    recorder.call("POST /login", lambda: client.post(
+        "/login", data={"email": email, "password": PASSWORD}
+    ))
+
+    for _ in range(quantity):
+        recorder.call("POST /cart/add", lambda: client.post(f"/cart/add/{product_id}"))
+
+    response = recorder.call("GET /checkout/", lambda: client.get("/checkout/"))
+
+    if response is None or response.status_code != 200:
+        return
+
+    with client.session_transaction() as sess:
+        token = sess.get("checkout_token")
+
+    form = order_form(token)
+
+    if not double_submit:
+        recorder.call("POST /checkout/place-order", lambda: client.post(
+            "/checkout/place-order", data=form
+        ))
+        return
+
+    # Same session and token submitted twice at once (double click / retry)
+    twin = app.test_client()
+    twin.set_cookie("session", client.get_cookie("session").value)
+
+    barrier = threading.Barrier(2)
+
+    def submit(c):
+        barrier.wait()
+        recorder.call("POST /checkout/place-order", lambda: c.post(
+            "/checkout/place-order", data=form
+        ))
+
+    threads = [threading.Thread(target=submit, args=(c,)) for c in (client, twin)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+
+
+# =========================
+# REPORT
+# =========================
+def percentile(values, pct):
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def check_invariants(product_ids, initial_stock):
+    from database.db import get_db_connection
+
+    conn = get_db_connection()
+
+    placeholders = ", ".join(["?"] * len(product_ids))
+
+    products = conn.execute(
+        f"""
+        SELECT p.id, p.stock, COALESCE(SUM(oi.quantity), 0) AS sold
+        FROM products p
+        LEFT JOIN order_items oi ON oi.product_id = p.id
+        WHERE p.id IN ({placeholders})
+        GROUP BY p.id, p.stock
+        """,
+        product_ids
+    ).fetchall()
+
+    duplicates = conn.execute(
+        """
+        SELECT COUNT(*) AS users FROM (
+            SELECT user_id FROM orders GROUP BY user_id HAVING COUNT(*) > 1
+        ) d
+        """
+    ).fetchone()["users"]
+
+    orders = conn.execute("SELECT COUNT(*) AS c FROM orders").fetchone()["c"]
+
+    conn.close()
+
+    return {
+        "orders": orders,
+        "units_sold": sum(int(p["sold"]) for p in products),
+        "negative_stock_products": sum(1 for p in products if p["stock"] < 0),
+        "oversold_units": sum(max(int(p["sold"]) - initial_stock, 0) for p in products),
+        "stock_mismatch_products": sum(
+            1 for p in products if p["stock"] + int(p["sold"]) != initial_stock
+        ),
+        # Each shopper checks out exactly once
+        "users_with_duplicate_orders": duplicates,
+    }
+
+
+def print_report(args, recorder, elapsed, invariants):
+    total_requests = sum(len(v) for v in recorder.latencies.values())
+
+    print()
+    print(f"Flash sale: {args.shoppers} shoppers, concurrency {args.concurrency}, "
+          f"{args.products} products x {args.stock} stock, {Config.DB_TYPE}")
+    print(f"Wall time {elapsed:.2f}s, {total_requests / elapsed:.1f} req/s")
+    print()
+    print(f"{'endpoint':32} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+
+    for endpoint, values in recorder.latencies.items():
+        statuses = ", ".join(f"{k}:{v}" for k, v in sorted(
+            recorder.statuses[endpoint].items(), key=lambda kv: str(kv[0])
+        ))
+        print(f"{endpoint:32} {len(values):6d} {percentile(values, 50):8.1f} "
+              f"{percentile(values, 95):8.1f} {percentile(values, 99):8.1f}  {statuses}")
+
+    errors = sum(
+        count
+        for statuses in recorder.statuses.values()
+        for status, count in statuses.items()
+        if status == "exception" or (isinstance(status, int) and status >= 500)
+    )
+
+    print()
+    print(f"Error rate: {errors / max(total_requests, 1):.2%} ({errors} errors)")
+
+    for message, count in sorted(recorder.exceptions.items(), key=lambda kv: -kv[1])[:5]:
+        print(f"  {count}x {message}")
+
+    print()
+    print("Invariants:")
+    for name, value in invariants.items():
+        flag = ""
+        if name in ("negative_stock_products", "oversold_units",
+                    "stock_mismatch_products", "users_with_duplicate_orders") and value:
+            flag = "  <-- VIOLATION"
+        print(f"  {name:28} {value}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flash-sale checkout load simulator")
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"),
+                        help="PostgreSQL URL of a throwaway database (default: temp SQLite)")
+    parser.add_argument("--shoppers", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--products", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=50)
+    parser.add_argument("--quantity", type=int, default=1, help="units per shopper")
+    parser.add_argument("--double-submit", type=float, default=0.1,
+                        help="share of shoppers that submit their token twice")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    configure_database(args.database_url)
+
+    from app import create_app
+
+    logging.getLogger("email_logger").setLevel(logging.ERROR)
+
+    product_ids, emails = seed(args)
+    app = create_app()
+
+    rng = random.Random(args.seed)
+    plan = [
+        (email, rng.choice(product_ids), rng.random() < args.double_submit)
+        for email in emails
+    ]
+
+    recorder = Recorder()
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(run_shopper, app, recorder, email, pid, args.quantity, double)
+            for email, pid, double in plan
+        ]
+        for future in futures:
+            future.result()
+
+    elapsed = time.perf_counter() - started
+
+    print_report(args, recorder, elapsed, check_invariants(product_ids, args.stock))
+
+
+if __name__ == "__main__":
+    main()
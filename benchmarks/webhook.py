@@ -0,0 +1,295 @@
+"""
+Razorpay webhook benchmark.
+
+Seeds orders with gateway ids, then fires correctly signed synthetic
+payment.captured webhooks at /payment/webhook from concurrent clients
+(ingest: verify + log + ack) and finally drains payment_events through
+the processor (lookup + state transition + rollup + email enqueue).
+
+Usage:
+    python -m benchmarks.webhook                         # temporary SQLite file
+    python -m benchmarks.webhook --database-url postgresql://.../bench_db
+    python -m benchmarks.webhook --drop-index            # baseline without the
+                                                         # razorpay_order_id index
+
+The PostgreSQL database is wiped and re-seeded: never point it at real data.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from benchmarks.flash_sale import Recorder, clear_tables, configure_database, percentile
+from payments.razorpay_service import RazorpayService, to_paise
+
+
+WEBHOOK_SECRET = "bench-webhook-secret"
+SEED_BATCH = 1000
+
+
+# =========================
+# SETUP
+# =========================
+def seed(args):
+    from database.db import get_db_connection
+    from database.init_db import init_db
+
+    init_db()
+
+    conn = get_db_connection()
+
+    # Shared bench databases may hold a flash_sale run's carts and tokens
+    clear_tables(conn, (
+        "checkout_tokens", "cart_items", "carts", "order_status_history", "reviews",
+        "order_items", "orders", "users", "payment_events",
+        "sales_daily", "sales_daily_products", "sales_rollup_deltas", "email_outbox",
+    ))
+
+    user_id = conn.execute(
+        """
+        INSERT INTO users (name, email, password_hash)
+        VALUES ('Webhook Bench', 'bench@webhook.test', 'x')
+        RETURNING id
+        """
+    ).fetchone()["id"]
+
+    now = int(time.time())
+    orders = []
+
+    for start in range(0, args.orders, SEED_BATCH):
+        chunk = range(start, min(start + SEED_BATCH, args.orders))
+        placeholders = ", ".join(
+            ["(?, ?, 'RAZORPAY', 'PENDING', 'PLACED', ?, 'Bench', '1', 'a', 'c', 's', '1', ?)"]
+            * len(chunk)
+        )
+        params = []
+
+        for i in chunk:
+            amount = 100 + (i % 50) * 10.5
+            orders.append((f"order_bench{i:08d}", amount))
+            params += [user_id, amount, f"order_bench{i:08d}", now]
+
+        conn.execute(
+            f"""
+            INSERT INTO orders
+            (user_id, total_amount, payment_method, payment_status, order_status,
+             razorpay_order_id, full_name, phone, address, city, state, pincode,
+             created_at)
+            VALUES {placeholders}
+            """,
+            params
+        )
+
+    if args.drop_index:
+        conn.execute("DROP INDEX IF EXISTS idx_orders_razorpay_order_id")
+
+    conn.commit()
+
+    if Config.DB_TYPE == "postgres":
+        conn.execute("ANALYZE orders")
+        conn.commit()
+
+    conn.close()
+
+    return orders
+
+
+def signed_event(razorpay_order_id, amount, payment_number):
+    """
+    A payment.captured webhook exactly as Razorpay would send it.
+    """
+
+    payment_id = f"pay_bench{payment_number:08d}"
+    body = json.dumps({
+        "entity": "event",
+        "event": "payment.captured",
+        "payload": {
+            "payment": {
+                "entity": {
+                    "id": payment_id,
+                    "entity": "payment",
+                    "amount": to_paise(amount),
+                    "currency": "INR",
+                    "status": "captured",
+                    "order_id": razorpay_order_id,
+                    "method": "upi",
+                    "captured": True,
+                }
+            }
+        },
+        "created_at": int(time.time()),
+    }).encode()
+
+    headers = {
+        "Content-Type": "application/json",
+        "X-Razorpay-Signature": RazorpayService.webhook_signature(body, WEBHOOK_SECRET),
+        "X-Razorpay-Event-Id": f"evt_{payment_id}",
+    }
+
+    return body, headers
+
+
+# =========================
+# PHASES
+# =========================
+def ingest(app, args, events):
+    recorder = Recorder()
+
+    # One test client per thread; the Flask app itself is shared
+    def send(chunk):
+        client = app.test_client()
+
+        for body, headers in chunk:
+            recorder.call("POST /payment/webhook", lambda: client.post(
+                "/payment/webhook", data=body, headers=headers
+            ))
+
+    chunks = [events[i::args.concurrency] for i in range(args.concurrency)]
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(send, chunk) for chunk in chunks]:
+            future.result()
+
+    return recorder, time.perf_counter() - started
+
+
+def process(args):
+    from payments.webhook_processor import process_batch
+
+    latencies = []
+    handled = 0
+    started = time.perf_counter()
+
+    while True:
+        batch_started = time.perf_counter()
+        count = process_batch(args.batch_size)
+
+        if not count:
+            break
+
+        latencies.append((time.perf_counter() - batch_started) * 1000)
+        handled += count
+
+    return handled, latencies, time.perf_counter() - started
+
+
+def check_invariants(expected_paid):
+    from database.db import get_db_connection
+    from database.sales_rollup import drain
+
+    # Rollup deltas are applied asynchronously; fold what is left
+    drain()
+
+    conn = get_db_connection()
+
+    paid = conn.execute(
+        "SELECT COUNT(*) AS c FROM orders WHERE payment_status = 'PAID'"
+    ).fetchone()["c"]
+
+    events = {
+        row["status"]: row["c"]
+        for row in conn.execute(
+            "SELECT status, COUNT(*) AS c FROM payment_events GROUP BY status"
+        ).fetchall()
+    }
+
+    rollup_paid = conn.execute(
+        "SELECT COALESCE(SUM(paid_orders), 0) AS c FROM sales_daily"
+    ).fetchone()["c"]
+
+    conn.close()
+
+    return {
+        "orders_paid": paid,
+        "expected_paid": expected_paid,
+        "rollup_paid_orders": int(rollup_paid),
+        "events_by_status": events,
+    }
+
+
+def print_report(args, recorder, ingest_elapsed, handled, batch_latencies, process_elapsed, invariants):
+    latencies = recorder.latencies["POST /payment/webhook"]
+    statuses = ", ".join(
+        f"{k}:{v}" for k, v in sorted(recorder.statuses["POST /payment/webhook"].items(), key=lambda kv: str(kv[0]))
+    )
+
+    print()
+    print(f"Webhook benchmark: {args.orders} orders, {len(latencies)} deliveries "
+          f"({args.duplicates:.0%} redelivered), concurrency {args.concurrency}, {Config.DB_TYPE}"
+          f"{', razorpay_order_id index dropped' if args.drop_index else ''}")
+    print()
+    print(f"Ingest:  {len(latencies) / ingest_elapsed:8.1f} req/s   p50 {percentile(latencies, 50):.1f} ms   "
+          f"p95 {percentile(latencies, 95):.1f} ms   p99 {percentile(latencies, 99):.1f} ms   {statuses}")
+    print(f"Process: {handled / max(process_elapsed, 1e-9):8.1f} events/s  "
+          f"{len(batch_latencies)} batches of {args.batch_size}, "
+          f"p50 {percentile(batch_latencies, 50):.1f} ms   p95 {percentile(batch_latencies, 95):.1f} ms per batch")
+
+    for message, count in sorted(recorder.exceptions.items(), key=lambda kv: -kv[1])[:5]:
+        print(f"  {count}x {message}")
+
+    print()
+    print("Invariants:")
+    for name, value in invariants.items():
+        flag = ""
+        if name == "orders_paid" and value != invariants["expected_paid"]:
+            flag = "  <-- VIOLATION"
+        if name == "rollup_paid_orders" and value != invariants["expected_paid"]:
+            flag = "  <-- VIOLATION"
+        print(f"  {name:20} {value}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Razorpay webhook ingest/process benchmark")
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"),
+                        help="PostgreSQL URL of a throwaway database (default: temp SQLite)")
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--paid", type=float, default=1.0, help="share of orders that get a webhook")
+    parser.add_argument("--duplicates", type=float, default=0.1,
+                        help="share of webhooks Razorpay delivers twice")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=Config.PAYMENT_EVENTS_BATCH_SIZE)
+    parser.add_argument("--drop-index", action="store_true",
+                        help="measure without idx_orders_razorpay_order_id")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    configure_database(args.database_url)
+
+    # Webhooks are only logged during ingest; processing is timed separately
+    Config.PAYMENT_EVENTS_WORKERS = 0
+    Config.EMAIL_OUTBOX_WORKERS = 0
+    Config.SALES_ROLLUP_WORKERS = 0
+    Config.MAIL_REQUIRE_AUTH = False
+    Config.RAZORPAY_WEBHOOK_SECRET = WEBHOOK_SECRET
+
+    from app import create_app
+
+    logging.getLogger("payment_logger").setLevel(logging.ERROR)
+
+    orders = seed(args)
+    app = create_app()
+    app.config["RAZORPAY_WEBHOOK_SECRET"] = WEBHOOK_SECRET
+
+    rng = random.Random(args.seed)
+    paying = rng.sample(orders, int(len(orders) * args.paid))
+
+    events = [signed_event(rzp_id, amount, i) for i, (rzp_id, amount) in enumerate(paying)]
+    events += rng.sample(events, int(len(events) * args.duplicates))
+    rng.shuffle(events)
+
+    recorder, ingest_elapsed = ingest(app, args, events)
+    handled, batch_latencies, process_elapsed = process(args)
+
+    print_report(
+        args, recorder, ingest_elapsed, handled, batch_latencies, process_elapsed,
+        check_invariants(len(paying))
+    )
+
+
+if __name__ == "__main__":
+    main()
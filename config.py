@@ -29,19 +29,138 @@ class Config:
         DATABASE_URI = os.path.join(BASE_DIR, "database", "store.db")
         DB_TYPE = "sqlite"
 
+    # Connection pool (PostgreSQL only): MIN_SIZE connections are opened
+    # up front, up to MAX_SIZE are kept open once created
+    DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+    DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+    # Seconds to wait for a free connection before giving up
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+    # Idle seconds after which a pooled connection is pinged on checkout
+    DB_POOL_PING_INTERVAL = int(os.environ.get("DB_POOL_PING_INTERVAL", 30))
+
+    # Per-request query instrumentation
+    QUERY_STATS_ENABLED = os.environ.get("QUERY_STATS_ENABLED", "1") == "1"
+    # Server-Timing / X-DB-Query-Count on responses: off in production
+    # (they show any client the query load); always on with app.debug
+    QUERY_STATS_HEADERS = os.environ.get("QUERY_STATS_HEADERS", "0") == "1"
+    QUERY_STATS_DEBUG_ENDPOINT = os.environ.get("QUERY_STATS_DEBUG_ENDPOINT") == "1"
+    # Same statement shape this many times in one request is flagged as N+1
+    QUERY_REPEAT_THRESHOLD = int(os.environ.get("QUERY_REPEAT_THRESHOLD", 3))
+
+    # Storefront page counter: "exact", "cached" or "estimate"
+    LISTING_COUNT_MODE = os.environ.get("LISTING_COUNT_MODE", "cached")
+    LISTING_COUNT_TTL = int(os.environ.get("LISTING_COUNT_TTL", 60))
+    # Unfiltered admin order list counter: "estimate" (PostgreSQL planner) or "exact"
+    ADMIN_ORDERS_COUNT_MODE = os.environ.get("ADMIN_ORDERS_COUNT_MODE", "estimate")
+
+    # ==========================
+    # Cache Configuration
+    # ==========================
+    # "memory" (single worker) or "sqlite" (shared by all workers on a host)
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+    CACHE_SQLITE_PATH = os.environ.get(
+        "CACHE_SQLITE_PATH",
+        os.path.join(BASE_DIR, "database", "cache.db")
+    )
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 2000))
+    CACHE_DEFAULT_TTL = int(os.environ.get("CACHE_DEFAULT_TTL", 300))
+    CATALOG_CACHE_TTL = int(os.environ.get("CATALOG_CACHE_TTL", 60))
+    # Admin dashboard: served from cache, refreshed in the background
+    # once older than the TTL; recomputed inline only past MAX_STALE
+    DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", 30))
+    DASHBOARD_CACHE_MAX_STALE = int(os.environ.get("DASHBOARD_CACHE_MAX_STALE", 600))
+    # How long a revoked admin can keep access without explicit invalidation
+    ADMIN_ROLE_CACHE_TTL = int(os.environ.get("ADMIN_ROLE_CACHE_TTL", 300))
+
+    # Cart storage: "database" or "memory" (single process / tests)
+    CART_STORE = os.environ.get("CART_STORE", "database")
+
+    # Product media: "cloudinary" or "local" (files under static/, offline use)
+    MEDIA_STORAGE = os.environ.get("MEDIA_STORAGE", "cloudinary")
+    MEDIA_LOCAL_ROOT = os.environ.get(
+        "MEDIA_LOCAL_ROOT", os.path.join(BASE_DIR, "static", "uploads", "products")
+    )
+    MEDIA_LOCAL_URL_PREFIX = os.environ.get("MEDIA_LOCAL_URL_PREFIX", "/static/uploads/products")
+    # Upload threads shared by all admin requests in a process
+    MEDIA_UPLOAD_WORKERS = int(os.environ.get("MEDIA_UPLOAD_WORKERS", 4))
+    # Resized image derivatives (utils/image_pipeline.py), served from static/derived
+    IMAGE_VARIANTS_ROOT = os.path.join(BASE_DIR, "static", "derived")
+    IMAGE_VARIANT_FORMATS = os.environ.get("IMAGE_VARIANT_FORMATS", "webp")
+    IMAGE_VARIANT_QUALITY = int(os.environ.get("IMAGE_VARIANT_QUALITY", 80))
+    IMAGE_PIPELINE_WORKERS = int(os.environ.get("IMAGE_PIPELINE_WORKERS", 2))
+    IMAGE_PIPELINE_TIMEOUT = int(os.environ.get("IMAGE_PIPELINE_TIMEOUT", 60))
+
     # ==========================
     # Mail Configuration
     # ==========================
-    MAIL_SERVER = "smtp.gmail.com"
-    MAIL_PORT = 465
-    MAIL_USE_SSL = True
+    MAIL_SERVER = os.environ.get("MAIL_SERVER", "smtp.gmail.com")
+    MAIL_PORT = int(os.environ.get("MAIL_PORT", 465))
+    MAIL_USE_SSL = os.environ.get("MAIL_USE_SSL", "1") == "1"
+    MAIL_USE_TLS = os.environ.get("MAIL_USE_TLS", "0") == "1"
     MAIL_USERNAME = os.environ.get("MAIL_USERNAME")
     MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD")
+    MAIL_FROM = os.environ.get("MAIL_FROM")
+    # Set to "0" for a local SMTP stand-in without login (aiosmtpd)
+    MAIL_REQUIRE_AUTH = os.environ.get("MAIL_REQUIRE_AUTH", "1") == "1"
     ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL")
 
+    # Outbox delivery: worker threads per process (0 = run
+    # "python -m utils.email_outbox" as a separate process instead)
+    EMAIL_OUTBOX_WORKERS = int(os.environ.get("EMAIL_OUTBOX_WORKERS", 2))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get("EMAIL_OUTBOX_BATCH_SIZE", 20))
+    EMAIL_OUTBOX_POLL_INTERVAL = float(os.environ.get("EMAIL_OUTBOX_POLL_INTERVAL", 5))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("EMAIL_OUTBOX_MAX_ATTEMPTS", 6))
+    EMAIL_OUTBOX_BACKOFF_BASE = int(os.environ.get("EMAIL_OUTBOX_BACKOFF_BASE", 30))
+    EMAIL_OUTBOX_BACKOFF_MAX = int(os.environ.get("EMAIL_OUTBOX_BACKOFF_MAX", 3600))
+    EMAIL_OUTBOX_LOCK_TIMEOUT = int(os.environ.get("EMAIL_OUTBOX_LOCK_TIMEOUT", 300))
+    EMAIL_SMTP_MAX_CONNECTION_AGE = int(os.environ.get("EMAIL_SMTP_MAX_CONNECTION_AGE", 300))
+
     # ==========================
     # Razorpay Configuration
     # ==========================
     RAZORPAY_KEY_ID = os.environ.get("RAZORPAY_KEY_ID")
     RAZORPAY_KEY_SECRET = os.environ.get("RAZORPAY_KEY_SECRET")
-    RAZORPAY_WEBHOOK_SECRET = os.environ.get("RAZORPAY_WEBHOOK_SECRET")
\ No newline at end of file
+    RAZORPAY_WEBHOOK_SECRET = os.environ.get("RAZORPAY_WEBHOOK_SECRET")
+    # Point at payments/fake_gateway.py for tests and benchmarks
+    RAZORPAY_API_BASE_URL = os.environ.get("RAZORPAY_API_BASE_URL")
+    RAZORPAY_CONNECT_TIMEOUT = float(os.environ.get("RAZORPAY_CONNECT_TIMEOUT", 3))
+    RAZORPAY_READ_TIMEOUT = float(os.environ.get("RAZORPAY_READ_TIMEOUT", 10))
+    RAZORPAY_HTTP_POOL_SIZE = int(os.environ.get("RAZORPAY_HTTP_POOL_SIZE", 10))
+    # A stored gateway order is reused on checkout reloads for this long
+    # (as long as the amount still matches)
+    RAZORPAY_ORDER_REUSE_TTL = int(os.environ.get("RAZORPAY_ORDER_REUSE_TTL", 86400))
+
+    # Webhook events are logged and applied in the background
+    # (0 workers = run "python -m payments.webhook_processor" instead)
+    PAYMENT_EVENTS_WORKERS = int(os.environ.get("PAYMENT_EVENTS_WORKERS", 1))
+    PAYMENT_EVENTS_BATCH_SIZE = int(os.environ.get("PAYMENT_EVENTS_BATCH_SIZE", 50))
+    PAYMENT_EVENTS_POLL_INTERVAL = float(os.environ.get("PAYMENT_EVENTS_POLL_INTERVAL", 2))
+    PAYMENT_EVENTS_MAX_ATTEMPTS = int(os.environ.get("PAYMENT_EVENTS_MAX_ATTEMPTS", 8))
+    PAYMENT_EVENTS_BACKOFF_BASE = int(os.environ.get("PAYMENT_EVENTS_BACKOFF_BASE", 10))
+    PAYMENT_EVENTS_BACKOFF_MAX = int(os.environ.get("PAYMENT_EVENTS_BACKOFF_MAX", 1800))
+    PAYMENT_EVENTS_LOCK_TIMEOUT = int(os.environ.get("PAYMENT_EVENTS_LOCK_TIMEOUT", 300))
+
+    # Sales rollup deltas are folded into sales_daily in the background
+    # (0 workers = run "python -m database.sales_rollup --apply" instead)
+    SALES_ROLLUP_WORKERS = int(os.environ.get("SALES_ROLLUP_WORKERS", 1))
+    SALES_ROLLUP_BATCH_SIZE = int(os.environ.get("SALES_ROLLUP_BATCH_SIZE", 500))
+    SALES_ROLLUP_POLL_INTERVAL = float(os.environ.get("SALES_ROLLUP_POLL_INTERVAL", 2))
+
+    # Payment reconciliation (python -m payments.reconciliation):
+    # pending Razorpay orders older than MIN_AGE seconds are checked
+    # against the gateway, at most RATE calls per second
+    RECONCILIATION_BATCH_SIZE = int(os.environ.get("RECONCILIATION_BATCH_SIZE", 200))
+    RECONCILIATION_RATE = float(os.environ.get("RECONCILIATION_RATE", 25))
+    RECONCILIATION_CONCURRENCY = int(os.environ.get("RECONCILIATION_CONCURRENCY", 8))
+    RECONCILIATION_MIN_AGE = int(os.environ.get("RECONCILIATION_MIN_AGE", 900))
+    RECONCILIATION_INTERVAL = int(os.environ.get("RECONCILIATION_INTERVAL", 300))
+
+    # Logging (utils/logging_setup.py): JSON lines written by a
+    # background thread; files rotate at LOG_MAX_BYTES. {pid} gives
+    # each worker process its own file
+    LOG_DIR = os.environ.get("LOG_DIR", "logs")
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    PAYMENT_LOG_FILE = os.environ.get("PAYMENT_LOG_FILE", "payment_webhook.{pid}.log")
+    LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+    LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
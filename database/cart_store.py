@@ -0,0 +1,332 @@
+import threading
+import time
+import uuid
+from flask import session
+from config import Config
+
+
+class CartStore:
+    """
+    Server-side cart. The session only carries session["cart_id"];
+    quantities live in the store and names/prices are always read
+    from products, so checkout never trusts a stale price.
+
+    get_items() returns the same shape the session cart used:
+        {"<product_id>": {"id", "name", "price", "stock", "quantity"}}
+
+    Writes are not committed here: callers commit together with
+    their own changes, as with any other conn.execute(). The one
+    exception is creating a user's cart (see cart_for_user).
+    """
+
+    def new_cart_id(self):
+        return uuid.uuid4().hex
+
+    def _product_rows(self, conn, quantities):
+        if not quantities:
+            return {}
+
+        ids = [int(pid) for pid in quantities]
+        placeholders = ", ".join(["?"] * len(ids))
+
+        products = conn.execute(
+            f"""
+            SELECT id, name, price, stock
+            FROM products
+            WHERE id IN ({placeholders})
+            """,
+            ids
+        ).fetchall()
+
+        by_id = {str(p["id"]): p for p in products}
+        items = {}
+
+        # Keep the order items were added in
+        for pid, quantity in quantities.items():
+            product = by_id.get(str(pid))
+
+            if product:
+                items[str(pid)] = {
+                    "id": product["id"],
+                    "name": product["name"],
+                    "price": product["price"],
+                    "stock": product["stock"],
+                    "quantity": quantity
+                }
+
+        return items
+
+
+class DatabaseCartStore(CartStore):
+    """
+    carts / cart_items tables, shared by every worker.
+    """
+
+    def _touch(self, conn, cart_id, user_id=None):
+        now = int(time.time())
+
+        conn.execute(
+            """
+            INSERT INTO carts (id, user_id, created_at, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET updated_at = excluded.updated_at
+            """,
+            (cart_id, user_id, now, now)
+        )
+
+    def cart_for_user(self, conn, user_id):
+        """
+        The user's cart, created on first use. A new row is committed
+        right away: its id goes into the session, so it must outlive
+        a read-only request that never commits. Concurrent first
+        requests converge on the same row.
+        """
+
+        row = conn.execute(
+            "SELECT id FROM carts WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+
+        if row:
+            return row["id"]
+
+        now = int(time.time())
+
+        conn.execute(
+            """
+            INSERT INTO carts (id, user_id, created_at, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id) DO NOTHING
+            """,
+            (self.new_cart_id(), user_id, now, now)
+        )
+        conn.commit()
+
+        return conn.execute(
+            "SELECT id FROM carts WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()["id"]
+
+    def get_items(self, conn, cart_id):
+        rows = conn.execute(
+            """
+            SELECT p.id, p.name, p.price, p.stock, ci.quantity
+            FROM cart_items ci
+            JOIN products p ON p.id = ci.product_id
+            WHERE ci.cart_id = ?
+            ORDER BY ci.added_at ASC, ci.product_id ASC
+            """,
+            (cart_id,)
+        ).fetchall()
+
+        return {str(row["id"]): dict(row) for row in rows}
+
+    def get_quantity(self, conn, cart_id, product_id):
+        row = conn.execute(
+            """
+            SELECT quantity FROM cart_items
+            WHERE cart_id = ? AND product_id = ?
+            """,
+            (cart_id, product_id)
+        ).fetchone()
+
+        return row["quantity"] if row else 0
+
+    def add_item(self, conn, cart_id, product_id, quantity=1):
+        self._touch(conn, cart_id)
+
+        conn.execute(
+            """
+            INSERT INTO cart_items (cart_id, product_id, quantity, added_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (cart_id, product_id)
+            DO UPDATE SET quantity = cart_items.quantity + excluded.quantity
+            """,
+            (cart_id, product_id, quantity, int(time.time()))
+        )
+
+        conn.execute(
+            """
+            DELETE FROM cart_items
+            WHERE cart_id = ? AND product_id = ? AND quantity <= 0
+            """,
+            (cart_id, product_id)
+        )
+
+    def remove_item(self, conn, cart_id, product_id):
+        conn.execute(
+            "DELETE FROM cart_items WHERE cart_id = ? AND product_id = ?",
+            (cart_id, product_id)
+        )
+
+    def replace_items(self, conn, cart_id, quantities):
+        """
+        Bulk write: the cart becomes exactly {product_id: quantity}.
+        """
+
+        self.clear(conn, cart_id)
+        self._touch(conn, cart_id)
+
+        now = int(time.time())
+        rows = [
+            (cart_id, int(pid), qty, now)
+            for pid, qty in quantities.items()
+            if qty > 0
+        ]
+
+        if rows:
+            placeholders = ", ".join(["(?, ?, ?, ?)"] * len(rows))
+            conn.execute(
+                f"""
+                INSERT INTO cart_items (cart_id, product_id, quantity, added_at)
+                VALUES {placeholders}
+                """,
+                [value for row in rows for value in row]
+            )
+
+    def clear(self, conn, cart_id):
+        conn.execute("DELETE FROM cart_items WHERE cart_id = ?", (cart_id,))
+
+    def merge(self, conn, source_cart_id, target_cart_id):
+        """
+        Move an anonymous cart into the user's cart, adding quantities
+        for products present in both.
+        """
+
+        conn.execute(
+            """
+            INSERT INTO cart_items (cart_id, product_id, quantity, added_at)
+            SELECT ?, product_id, quantity, added_at
+            FROM cart_items
+            WHERE cart_id = ?
+            ON CONFLICT (cart_id, product_id)
+            DO UPDATE SET quantity = cart_items.quantity + excluded.quantity
+            """,
+            (target_cart_id, source_cart_id)
+        )
+
+        conn.execute("DELETE FROM cart_items WHERE cart_id = ?", (source_cart_id,))
+        conn.execute("DELETE FROM carts WHERE id = ?", (source_cart_id,))
+
+
+class MemoryCartStore(CartStore):
+    """
+    In-process stand-in for tests and single-process development.
+    Product details still come from the database.
+    """
+
+    def __init__(self):
+        self._carts = {}
+        self._user_carts = {}
+        self._lock = threading.Lock()
+
+    def cart_for_user(self, conn, user_id):
+        with self._lock:
+            cart_id = self._user_carts.get(user_id)
+
+            if cart_id is None:
+                cart_id = self.new_cart_id()
+                self._user_carts[user_id] = cart_id
+
+            return cart_id
+
+    def get_items(self, conn, cart_id):
+        with self._lock:
+            quantities = dict(self._carts.get(cart_id, {}))
+
+        return self._product_rows(conn, quantities)
+
+    def get_quantity(self, conn, cart_id, product_id):
+        with self._lock:
+            return self._carts.get(cart_id, {}).get(str(product_id), 0)
+
+    def add_item(self, conn, cart_id, product_id, quantity=1):
+        with self._lock:
+            cart = self._carts.setdefault(cart_id, {})
+            pid = str(product_id)
+            cart[pid] = cart.get(pid, 0) + quantity
+
+            if cart[pid] <= 0:
+                cart.pop(pid)
+
+    def remove_item(self, conn, cart_id, product_id):
+        with self._lock:
+            self._carts.get(cart_id, {}).pop(str(product_id), None)
+
+    def replace_items(self, conn, cart_id, quantities):
+        with self._lock:
+            self._carts[cart_id] = {
+                str(pid): qty for pid, qty in quantities.items() if qty > 0
+            }
+
+    def clear(self, conn, cart_id):
+        with self._lock:
+            self._carts.pop(cart_id, None)
+
+    def merge(self, conn, source_cart_id, target_cart_id):
+        with self._lock:
+            source = self._carts.pop(source_cart_id, {})
+            target = self._carts.setdefault(target_cart_id, {})
+
+            for pid, qty in source.items():
+                target[pid] = target.get(pid, 0) + qty
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_cart_store():
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if Config.CART_STORE == "memory":
+                    _store = MemoryCartStore()
+                else:
+                    _store = DatabaseCartStore()
+
+    return _store
+
+
+# =========================
+# SESSION HELPERS
+# =========================
+def current_cart_id(conn, create=False):
+    """
+    Cart id for this visitor: the user's cart when logged in,
+    otherwise an anonymous cart created on first use. Call it before
+    the route's own writes: creating a user's cart commits.
+    """
+
+    cart_id = session.get("cart_id")
+
+    if cart_id:
+        return cart_id
+
+    if session.get("user_id"):
+        cart_id = get_cart_store().cart_for_user(conn, session["user_id"])
+    elif create:
+        cart_id = get_cart_store().new_cart_id()
+    else:
+        return None
+
+    session["cart_id"] = cart_id
+    return cart_id
+
+
+def attach_user_cart(conn, user_id, anonymous_cart_id=None):
+    """
+    On login: merge the anonymous cart into the user's cart and
+    point the session at it. Caller commits.
+    """
+
+    store = get_cart_store()
+    cart_id = store.cart_for_user(conn, user_id)
+
+    if anonymous_cart_id and anonymous_cart_id != cart_id:
+        store.merge(conn, anonymous_cart_id, cart_id)
+
+    session["cart_id"] = cart_id
+    return cart_id
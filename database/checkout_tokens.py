@@ -0,0 +1,44 @@
+import time
+import uuid
+
+
+def issue_token(conn, user_id):
+    """
+    New checkout token for the user, replacing any earlier one.
+    Caller commits.
+    """
+
+    token = str(uuid.uuid4())
+
+    conn.execute(
+        """
+        INSERT INTO checkout_tokens (user_id, token, created_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT (user_id) DO UPDATE
+        SET token = excluded.token, created_at = excluded.created_at
+        """,
+        (user_id, token, int(time.time()))
+    )
+
+    return token
+
+
+def consume_token(conn, user_id, token):
+    """
+    Delete the token if it is still live; True when this call got it.
+
+    Run inside the order's transaction: a concurrent submit of the same
+    form blocks on the row until the first commits, then finds nothing.
+    If the order is rolled back, the token comes back with it.
+    """
+
+    row = conn.execute(
+        """
+        DELETE FROM checkout_tokens
+        WHERE user_id = ? AND token = ?
+        RETURNING user_id
+        """,
+        (user_id, token)
+    ).fetchone()
+
+    return row is not None
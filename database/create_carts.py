@@ -0,0 +1,39 @@
+from database.db import get_db_connection
+
+
+def create_cart_tables():
+    conn = get_db_connection()
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS carts (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id),
+            created_at INTEGER,
+            updated_at INTEGER
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cart_items (
+            cart_id TEXT NOT NULL REFERENCES carts(id) ON DELETE CASCADE,
+            product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+            quantity INTEGER NOT NULL,
+            added_at INTEGER,
+            PRIMARY KEY (cart_id, product_id)
+        )
+    """)
+
+    # One cart per user; anonymous carts have NULL user_id
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_carts_user_id
+        ON carts (user_id)
+    """)
+
+    conn.commit()
+    conn.close()
+
+    print("✅ carts and cart_items tables created successfully.")
+
+
+if __name__ == "__main__":
+    create_cart_tables()
@@ -0,0 +1,23 @@
+from database.db import get_db_connection
+
+
+def create_checkout_tokens_table():
+    conn = get_db_connection()
+
+    # One live token per user: opening checkout again replaces it
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS checkout_tokens (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id),
+            token TEXT NOT NULL,
+            created_at INTEGER
+        )
+    """)
+
+    conn.commit()
+    conn.close()
+
+    print("✅ checkout_tokens table created successfully.")
+
+
+if __name__ == "__main__":
+    create_checkout_tokens_table()
@@ -0,0 +1,43 @@
+from database.db import get_db_connection
+from config import Config
+
+
+def create_email_outbox_table():
+    conn = get_db_connection()
+
+    if Config.DB_TYPE == "postgres":
+        pk = "SERIAL PRIMARY KEY"
+    else:
+        pk = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id {pk},
+            to_email TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            is_html INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'PENDING',
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at INTEGER,
+            locked_at INTEGER,
+            last_error TEXT,
+            created_at INTEGER,
+            sent_at INTEGER
+        )
+    """)
+
+    # Workers poll for PENDING rows that are due, oldest first
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_status_next_attempt
+        ON email_outbox (status, next_attempt_at, id)
+    """)
+
+    conn.commit()
+    conn.close()
+
+    print("✅ email_outbox table created successfully.")
+
+
+if __name__ == "__main__":
+    create_email_outbox_table()
@@ -16,9 +16,10 @@ def create_indexes():
         ON products (name);
     """)
 
+    # Description search is served by the GIN index from
+    # database/create_search_index.py
     conn.execute("""
-        CREATE INDEX IF NOT EXISTS idx_products_description
-        ON products (description);
+        DROP INDEX IF EXISTS idx_products_description;
     """)
 
     conn.execute("""
@@ -26,6 +27,22 @@ def create_indexes():
         ON products (category);
     """)
 
+    # Keyset pagination on the storefront listing
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_products_category_id
+        ON products (category, id);
+    """)
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_products_category_price_id
+        ON products (category, price, id);
+    """)
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_products_price_id
+        ON products (price, id);
+    """)
+
     conn.execute("""
         CREATE INDEX IF NOT EXISTS idx_products_is_new
         ON products (is_new);
@@ -41,9 +58,36 @@ def create_indexes():
         ON orders (user_id);
     """)
 
+    # Admin order list: each filter column followed by the default
+    # (created_at, id) keyset, so filtered pages are index range scans
+    conn.execute("""
+        DROP INDEX IF EXISTS idx_orders_status;
+    """)
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_orders_created_at_id
+        ON orders (created_at, id);
+    """)
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_orders_status_created_at_id
+        ON orders (order_status, created_at, id);
+    """)
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_orders_payment_status_created_at_id
+        ON orders (payment_status, created_at, id);
+    """)
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_orders_total_amount_id
+        ON orders (total_amount, id);
+    """)
+
+    # Payment webhooks look orders up by gateway order id
     conn.execute("""
-        CREATE INDEX IF NOT EXISTS idx_orders_status
-        ON orders (order_status);
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_razorpay_order_id
+        ON orders (razorpay_order_id);
     """)
 
     conn.execute("""
@@ -0,0 +1,46 @@
+from database.db import get_db_connection
+from config import Config
+
+
+def create_payment_events_table():
+    conn = get_db_connection()
+
+    if Config.DB_TYPE == "postgres":
+        pk = "SERIAL PRIMARY KEY"
+    else:
+        pk = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    # event_id is unique: Razorpay retries of one delivery are
+    # recorded once
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS payment_events (
+            id {pk},
+            event_id TEXT NOT NULL UNIQUE,
+            event_type TEXT,
+            payment_id TEXT,
+            razorpay_order_id TEXT,
+            payload TEXT NOT NULL,
+            status TEXT DEFAULT 'PENDING',
+            result TEXT,
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at INTEGER,
+            locked_at INTEGER,
+            last_error TEXT,
+            received_at INTEGER,
+            processed_at INTEGER
+        )
+    """)
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_payment_events_status_next_attempt
+        ON payment_events (status, next_attempt_at, id)
+    """)
+
+    conn.commit()
+    conn.close()
+
+    print("✅ payment_events table created successfully.")
+
+
+if __name__ == "__main__":
+    create_payment_events_table()
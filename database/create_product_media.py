@@ -20,6 +20,7 @@ def create_product_media_table():
         product_id {int_type} NOT NULL,
         media_url {text_type} NOT NULL,
         media_type {text_type} NOT NULL,
+        variant_key {text_type},
         created_at {int_type},
         FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
         )
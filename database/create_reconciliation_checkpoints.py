@@ -0,0 +1,23 @@
+from database.db import get_db_connection
+
+
+def create_reconciliation_checkpoints_table():
+    conn = get_db_connection()
+
+    # One row per reconciliation job: the last order id it settled
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS reconciliation_checkpoints (
+            name TEXT PRIMARY KEY,
+            last_order_id INTEGER NOT NULL DEFAULT 0,
+            updated_at INTEGER
+        )
+    """)
+
+    conn.commit()
+    conn.close()
+
+    print("✅ reconciliation_checkpoints table created successfully.")
+
+
+if __name__ == "__main__":
+    create_reconciliation_checkpoints_table()
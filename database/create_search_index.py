@@ -0,0 +1,50 @@
+from database.db import get_db_connection
+from config import Config
+
+
+def create_search_index():
+
+    # Full-text search relies on PostgreSQL features
+    if Config.DB_TYPE != "postgres":
+        print("⚠ Skipping search index creation (Not PostgreSQL)")
+        return
+
+    conn = get_db_connection()
+
+    conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
+    # Generated column: PostgreSQL keeps it current on every
+    # INSERT/UPDATE of products, no application code involved.
+    conn.execute("""
+        ALTER TABLE products
+        ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED;
+    """)
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_products_search_vector
+        ON products USING GIN (search_vector);
+    """)
+
+    # Fuzzy / partial matches on product names
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_products_name_trgm
+        ON products USING GIN (name gin_trgm_ops);
+    """)
+
+    # The btree on description never served a search and
+    # only slowed down writes.
+    conn.execute("DROP INDEX IF EXISTS idx_products_description;")
+
+    conn.commit()
+    conn.close()
+
+    print("✅ Product search index created successfully.")
+
+
+if __name__ == "__main__":
+    create_search_index()
@@ -0,0 +1,196 @@
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+
+
+ORDER_STATUSES = ("PLACED", "CONFIRMED", "SHIPPED", "DELIVERED", "CANCELLED")
+
+LOW_STOCK_THRESHOLD = 5
+DAILY_SALES_DAYS = 7
+
+
+@dataclass
+class DashboardMetrics:
+    total_orders: int = 0
+    total_revenue: float = 0.0
+    pending_upi: int = 0
+    current_month_revenue: float = 0.0
+    last_month_revenue: float = 0.0
+    status_counts: dict = field(default_factory=dict)
+    cancellation_rate: float = 0.0
+
+    total_products: int = 0
+    total_stock_units: int = 0
+    out_of_stock: int = 0
+    low_stock_products: list = field(default_factory=list)
+
+    top_products: list = field(default_factory=list)
+    daily_sales: list = field(default_factory=list)
+
+    def template_context(self):
+        context = asdict(self)
+        status_counts = context.pop("status_counts")
+
+        for status in ORDER_STATUSES:
+            context[f"{status.lower()}_orders"] = status_counts.get(status, 0)
+
+        context["in_transit_orders"] = 0  # placeholder if not implemented
+
+        return context
+
+
+# =========================
+# TIME WINDOWS
+# =========================
+def _month_starts(now):
+    this_month = datetime(now.year, now.month, 1)
+
+    if now.month == 1:
+        last_month = datetime(now.year - 1, 12, 1)
+    else:
+        last_month = datetime(now.year, now.month - 1, 1)
+
+    return last_month.strftime("%Y-%m-%d"), this_month.strftime("%Y-%m-%d")
+
+
+def _recent_days(now, days):
+    today = datetime(now.year, now.month, now.day)
+
+    return [
+        (today - timedelta(days=offset)).strftime("%Y-%m-%d")
+        for offset in range(days - 1, -1, -1)
+    ]
+
+
+# =========================
+# QUERIES
+# =========================
+def _order_metrics(conn, metrics, now):
+    """
+    Every order figure, including the daily buckets, from one pass
+    over sales_daily (one row per day, see database/sales_rollup.py).
+    """
+
+    last_month_start, this_month_start = _month_starts(now)
+    recent_days = _recent_days(now, DAILY_SALES_DAYS)
+
+    status_columns = [
+        f"SUM({status.lower()}) AS status_{status.lower()}"
+        for status in ORDER_STATUSES
+    ]
+
+    day_columns = [
+        f"SUM(CASE WHEN day = ? THEN paid_revenue ELSE 0 END) AS day_{i}"
+        for i in range(DAILY_SALES_DAYS)
+    ]
+
+    row = conn.execute(
+        f"""
+        SELECT
+            SUM(orders) AS total_orders,
+            SUM(delivered_paid_revenue) AS total_revenue,
+            SUM(pending_upi) AS pending_upi,
+            SUM(CASE WHEN day >= ? THEN paid_revenue ELSE 0 END) AS current_month_revenue,
+            SUM(CASE WHEN day >= ? AND day < ? THEN paid_revenue ELSE 0 END) AS last_month_revenue,
+            {", ".join(status_columns)},
+            {", ".join(day_columns)}
+        FROM sales_daily
+        """,
+        [this_month_start, last_month_start, this_month_start] + recent_days
+    ).fetchone()
+
+    metrics.total_orders = int(row["total_orders"] or 0)
+    metrics.total_revenue = float(row["total_revenue"] or 0)
+    metrics.pending_upi = int(row["pending_upi"] or 0)
+    metrics.current_month_revenue = float(row["current_month_revenue"] or 0)
+    metrics.last_month_revenue = float(row["last_month_revenue"] or 0)
+
+    metrics.status_counts = {
+        status: int(row[f"status_{status.lower()}"] or 0)
+        for status in ORDER_STATUSES
+    }
+
+    if metrics.total_orders > 0:
+        metrics.cancellation_rate = round(
+            (metrics.status_counts["CANCELLED"] / metrics.total_orders) * 100, 2
+        )
+
+    metrics.daily_sales = [
+        {"date": day, "revenue": float(row[f"day_{i}"] or 0)}
+        for i, day in enumerate(recent_days)
+    ]
+
+
+def _product_metrics(conn, metrics):
+    """
+    Inventory totals and the low-stock list in one statement: the
+    totals row is repeated on each low-stock product (or returned
+    once with NULLs when there are none).
+    """
+
+    rows = conn.execute(
+        """
+        SELECT t.total_products, t.total_stock_units, t.out_of_stock,
+               low.id, low.name, low.stock
+        FROM (
+            SELECT
+                COUNT(*) AS total_products,
+                COALESCE(SUM(stock), 0) AS total_stock_units,
+                SUM(CASE WHEN stock = 0 THEN 1 ELSE 0 END) AS out_of_stock
+            FROM products
+        ) t
+        LEFT JOIN (
+            SELECT id, name, stock
+            FROM products
+            WHERE stock <= ?
+        ) low ON 1 = 1
+        ORDER BY low.stock ASC
+        """,
+        (LOW_STOCK_THRESHOLD,)
+    ).fetchall()
+
+    first = rows[0]
+    metrics.total_products = int(first["total_products"] or 0)
+    metrics.total_stock_units = int(first["total_stock_units"] or 0)
+    metrics.out_of_stock = int(first["out_of_stock"] or 0)
+
+    metrics.low_stock_products = [
+        {"id": row["id"], "name": row["name"], "stock": row["stock"]}
+        for row in rows
+        if row["id"] is not None
+    ]
+
+
+def _top_products(conn, metrics, limit=5):
+    rows = conn.execute(
+        """
+        SELECT s.product_id, COALESCE(p.name, MAX(s.product_name)) AS product_name,
+               SUM(s.units) AS total_sold
+        FROM sales_daily_products s
+        LEFT JOIN products p ON p.id = s.product_id
+        GROUP BY s.product_id, p.name
+        ORDER BY total_sold DESC
+        LIMIT ?
+        """,
+        (limit,)
+    ).fetchall()
+
+    metrics.top_products = [
+        {"product_name": row["product_name"], "total_sold": int(row["total_sold"])}
+        for row in rows
+    ]
+
+
+def load_dashboard_metrics(conn, now=None):
+    """
+    Three statements regardless of order volume: the sales rollup
+    tables grow per day, not per order, plus one scan of products.
+    """
+
+    now = now or datetime.now()
+    metrics = DashboardMetrics()
+
+    _order_metrics(conn, metrics, now)
+    _product_metrics(conn, metrics)
+    _top_products(conn, metrics)
+
+    return metrics
@@ -1,8 +1,14 @@
 import os
 import sqlite3
+import threading
+import time
+import uuid
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
+from flask import g, has_app_context
 from config import Config
+from database.query_stats import current_recorder
 
 
 class ResultWrapper:
@@ -12,9 +18,18 @@ class ResultWrapper:
         conn.execute(...).fetchall()
     """
 
-    def __init__(self, cursor, db_type):
+    def __init__(self, cursor, db_type, stats=None):
         self.cursor = cursor
         self.db_type = db_type
+        self.stats = stats
+
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
 
     def fetchone(self):
         row = self.cursor.fetchone()
@@ -22,6 +37,9 @@ class ResultWrapper:
         if not row:
             return None
 
+        if self.stats:
+            self.stats.rows += 1
+
         if self.db_type == "sqlite":
             return dict(row)
 
@@ -30,6 +48,9 @@ class ResultWrapper:
     def fetchall(self):
         rows = self.cursor.fetchall()
 
+        if self.stats:
+            self.stats.rows += len(rows)
+
         if self.db_type == "sqlite":
             return [dict(row) for row in rows]
 
@@ -44,11 +65,18 @@ class DatabaseWrapper:
         conn.execute(...).fetchone()
         conn.commit()
         conn.close()
+
+    Inside a request every wrapper shares the connection bound to
+    flask.g, so close() leaves it alone: a helper closing its wrapper
+    must not discard the caller's uncommitted work. Whatever is still
+    uncommitted is rolled back when the connection goes back to the
+    pool at teardown.
     """
 
-    def __init__(self, conn, db_type):
+    def __init__(self, conn, db_type, request_bound=False):
         self.conn = conn
         self.db_type = db_type
+        self.request_bound = request_bound
 
     def execute(self, query, params=None):
 
@@ -65,44 +93,274 @@ class DatabaseWrapper:
         else:
             cursor = self.conn.cursor()
 
+        recorder = current_recorder()
+
+        if recorder is None:
+            cursor.execute(query, params)
+            return ResultWrapper(cursor, self.db_type)
+
+        started = time.perf_counter()
         cursor.execute(query, params)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        stats = recorder.record(query, params, duration_ms)
+
+        return ResultWrapper(cursor, self.db_type, stats)
+
+    def stream(self, query, params=None, batch_size=1000):
+        """
+        Yield rows one at a time without loading the result set.
+
+        PostgreSQL uses a named (server-side) cursor fetched in
+        batches of batch_size; SQLite cursors are already lazy.
+        Must be consumed inside the transaction that started it.
+        """
+
+        if params is None:
+            params = []
+
+        if self.db_type == "postgres":
+            query = query.replace("?", "%s")
+
+            cursor = self.conn.cursor(
+                name=f"stream_{uuid.uuid4().hex}",
+                cursor_factory=psycopg2.extras.RealDictCursor
+            )
+            cursor.itersize = batch_size
+        else:
+            cursor = self.conn.cursor()
+
+        recorder = current_recorder()
+        started = time.perf_counter()
+
+        try:
+            cursor.execute(query, params)
 
-        return ResultWrapper(cursor, self.db_type)
+            stats = None
+            if recorder is not None:
+                duration_ms = (time.perf_counter() - started) * 1000
+                stats = recorder.record(query, params, duration_ms)
+
+            while True:
+                rows = cursor.fetchmany(batch_size)
+
+                if not rows:
+                    break
+
+                if stats:
+                    stats.rows += len(rows)
+
+                for row in rows:
+                    yield dict(row) if self.db_type == "sqlite" else row
+
+        finally:
+            cursor.close()
 
     def commit(self):
         self.conn.commit()
 
+    def rollback(self):
+        self.conn.rollback()
+
     def close(self):
-        self.conn.close()
+        if self.conn is None:
+            return
 
+        if not self.request_bound:
+            _release_connection(self.conn, self.db_type)
 
-def get_db_connection():
+        self.conn = None
 
-    # ===============================
-    # PostgreSQL (Production - Railway)
-    # ===============================
-    if Config.DB_TYPE == "postgres":
 
-        database_url = Config.DATABASE_URI
+# ===============================
+# PostgreSQL connection pool
+# ===============================
+# Up to DB_POOL_MAX_SIZE connections per process, each either checked
+# out (holding a slot) or idle in _idle. Idle connections stay open
+# until they fail a health check: psycopg2's own pools close anything
+# returned beyond minconn, so under load they reconnect on most
+# checkouts.
+_idle = []
+_pool_slots = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_last_used = {}
 
-        # Railway may provide postgres://
-        if database_url.startswith("postgres://"):
-            database_url = database_url.replace(
-                "postgres://", "postgresql://", 1
-            )
 
-        conn = psycopg2.connect(database_url)
+def _database_url():
+    database_url = Config.DATABASE_URI
+
+    # Railway may provide postgres://
+    if database_url.startswith("postgres://"):
+        database_url = database_url.replace(
+            "postgres://", "postgresql://", 1
+        )
+
+    return database_url
+
+
+def _open_connection():
+    conn = psycopg2.connect(_database_url())
+    _last_used[id(conn)] = time.monotonic()
+    return conn
+
+
+def _close_connection(conn):
+    _last_used.pop(id(conn), None)
+
+    try:
+        conn.close()
+    except psycopg2.Error:
+        pass
+
+
+def init_pool():
+    """
+    Lazily set up the pool once per process, opening DB_POOL_MIN_SIZE
+    connections up front. Gunicorn forks workers, so connections
+    inherited from the master process are never reused.
+    """
+
+    global _pool_slots, _pool_pid
+
+    if _pool_pid == os.getpid():
+        return
+
+    with _pool_lock:
+        if _pool_pid == os.getpid():
+            return
+
+        _idle.clear()
+        _last_used.clear()
+
+        # Request threads and background workers queue here for a slot
+        _pool_slots = threading.BoundedSemaphore(Config.DB_POOL_MAX_SIZE)
+
+        for _ in range(min(Config.DB_POOL_MIN_SIZE, Config.DB_POOL_MAX_SIZE)):
+            _idle.append(_open_connection())
+
+        _pool_pid = os.getpid()
+
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+
+    idle_for = time.monotonic() - _last_used.get(id(conn), 0)
+
+    if idle_for < Config.DB_POOL_PING_INTERVAL:
+        return True
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout_pooled():
+    init_pool()
+    slots = _pool_slots
+
+    if not slots.acquire(timeout=Config.DB_POOL_TIMEOUT):
+        raise psycopg2.pool.PoolError(
+            f"No database connection free after {Config.DB_POOL_TIMEOUT}s."
+        )
+
+    try:
+        # Most recently used first; dead connections left behind by a
+        # database restart are closed and skipped
+        while True:
+            with _pool_lock:
+                conn = _idle.pop() if _idle else None
+
+            if conn is None:
+                conn = _open_connection()
+                break
+
+            if _is_healthy(conn):
+                break
+
+            _close_connection(conn)
+
         conn.autocommit = False
+        return conn
+    except Exception:
+        slots.release()
+        raise
+
+
+def _return_to_pool(conn):
+    if conn.closed:
+        _close_connection(conn)
+        return
+
+    try:
+        conn.rollback()
+    except psycopg2.Error:
+        _close_connection(conn)
+        return
+
+    _last_used[id(conn)] = time.monotonic()
 
-        return DatabaseWrapper(conn, "postgres")
+    with _pool_lock:
+        _idle.append(conn)
+
+
+def _release_connection(conn, db_type):
+    if db_type == "postgres":
+        try:
+            _return_to_pool(conn)
+        finally:
+            _pool_slots.release()
+    else:
+        conn.close()
+
+
+def _connect():
+    # ===============================
+    # PostgreSQL (Production - Railway)
+    # ===============================
+    if Config.DB_TYPE == "postgres":
+        return _checkout_pooled(), "postgres"
 
     # ===============================
     # SQLite (Local Development)
     # ===============================
-    else:
-        os.makedirs(os.path.dirname(Config.DATABASE_URI), exist_ok=True)
+    os.makedirs(os.path.dirname(Config.DATABASE_URI), exist_ok=True)
+
+    conn = sqlite3.connect(Config.DATABASE_URI)
+    conn.row_factory = sqlite3.Row
+
+    return conn, "sqlite"
+
+
+def get_db_connection():
+    """
+    Inside an app context the connection is bound to flask.g,
+    so every call during one request shares a single connection.
+    Scripts outside Flask get a dedicated one.
+    """
+
+    if not has_app_context():
+        conn, db_type = _connect()
+        return DatabaseWrapper(conn, db_type)
+
+    if "db_conn" not in g:
+        g.db_conn, g.db_type = _connect()
+
+    return DatabaseWrapper(g.db_conn, g.db_type, request_bound=True)
+
+
+def close_db(exception=None):
+    conn = g.pop("db_conn", None)
+    db_type = g.pop("db_type", None)
+
+    if conn is not None:
+        _release_connection(conn, db_type)
 
-        conn = sqlite3.connect(Config.DATABASE_URI)
-        conn.row_factory = sqlite3.Row
 
-        return DatabaseWrapper(conn, "sqlite")
+def init_app(app):
+    app.teardown_appcontext(close_db)
@@ -1,5 +1,6 @@
 from database.db import get_db_connection
 from config import Config
+from database.sales_rollup import create_rollup_tables
 
 
 def init_db():
@@ -36,6 +37,7 @@ def init_db():
     conn.execute(f"""
     CREATE TABLE IF NOT EXISTS products (
         id {pk},
+        sku TEXT,
         name TEXT NOT NULL,
         description TEXT,
         price {real_type} NOT NULL,
@@ -43,10 +45,20 @@ def init_db():
         image TEXT,
         is_new {int_type} DEFAULT 0,
         category TEXT,
+        primary_media_url TEXT,
+        primary_media_type TEXT,
+        primary_media_key TEXT,
         created_at {int_type}
     )
     """)
 
+    # Upsert target for CSV imports (database/product_import.py);
+    # products added by hand may leave it NULL
+    conn.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku
+    ON products (sku)
+    """)
+
     # ===============================
     # ORDERS
     # ===============================
@@ -59,6 +71,8 @@ def init_db():
         payment_status TEXT,
         order_status TEXT,
         razorpay_order_id TEXT,
+        razorpay_order_amount {int_type},
+        razorpay_order_created_at {int_type},
         full_name TEXT,
         phone TEXT,
         address TEXT,
@@ -71,6 +85,12 @@ def init_db():
     )
     """)
 
+    # Webhook and reconciliation lookups; one gateway order per order
+    conn.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_razorpay_order_id
+    ON orders (razorpay_order_id)
+    """)
+
     # ===============================
     # ORDER ITEMS
     # ===============================
@@ -122,6 +142,112 @@ def init_db():
         """)
 
 
+    # ===============================
+    # CARTS
+    # ===============================
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS carts (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id),
+        created_at INTEGER,
+        updated_at INTEGER
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS cart_items (
+        cart_id TEXT NOT NULL REFERENCES carts(id) ON DELETE CASCADE,
+        product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+        quantity INTEGER NOT NULL,
+        added_at INTEGER,
+        PRIMARY KEY (cart_id, product_id)
+    )
+    """)
+
+    conn.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_carts_user_id
+    ON carts (user_id)
+    """)
+
+    # ===============================
+    # CHECKOUT TOKENS
+    # ===============================
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS checkout_tokens (
+        user_id INTEGER PRIMARY KEY REFERENCES users(id),
+        token TEXT NOT NULL,
+        created_at INTEGER
+    )
+    """)
+
+    # ===============================
+    # EMAIL OUTBOX
+    # ===============================
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id {pk},
+        to_email TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        is_html INTEGER DEFAULT 0,
+        status TEXT DEFAULT 'PENDING',
+        attempts INTEGER DEFAULT 0,
+        next_attempt_at INTEGER,
+        locked_at INTEGER,
+        last_error TEXT,
+        created_at INTEGER,
+        sent_at INTEGER
+    )
+    """)
+
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_email_outbox_status_next_attempt
+    ON email_outbox (status, next_attempt_at, id)
+    """)
+
+    # ===============================
+    # PAYMENT EVENTS (webhook log)
+    # ===============================
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS payment_events (
+        id {pk},
+        event_id TEXT NOT NULL UNIQUE,
+        event_type TEXT,
+        payment_id TEXT,
+        razorpay_order_id TEXT,
+        payload TEXT NOT NULL,
+        status TEXT DEFAULT 'PENDING',
+        result TEXT,
+        attempts INTEGER DEFAULT 0,
+        next_attempt_at INTEGER,
+        locked_at INTEGER,
+        last_error TEXT,
+        received_at INTEGER,
+        processed_at INTEGER
+    )
+    """)
+
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_payment_events_status_next_attempt
+    ON payment_events (status, next_attempt_at, id)
+    """)
+
+    # ===============================
+    # RECONCILIATION CHECKPOINTS
+    # ===============================
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS reconciliation_checkpoints (
+        name TEXT PRIMARY KEY,
+        last_order_id INTEGER NOT NULL DEFAULT 0,
+        updated_at INTEGER
+    )
+    """)
+
+    # ===============================
+    # SALES ROLLUP
+    # ===============================
+    create_rollup_tables(conn)
+
     conn.commit()
     conn.close()
 
@@ -0,0 +1,114 @@
+def _values_list(rows):
+    placeholders = ", ".join(["(?, ?)"] * len(rows))
+    params = [value for row in rows for value in row]
+    return placeholders, params
+
+
+def reserve_stock(conn, quantities):
+    """
+    Decrement stock for every line of an order in one conditional,
+    set-based UPDATE.
+
+        quantities: {product_id: quantity}
+
+    Returns (products, shortages):
+        products  - {product_id: {"id", "name", "price"}} on success
+        shortages - [{"product_id", "name", "requested", "available"}]
+
+    On shortage nothing is changed: the transaction is rolled back.
+    On success the caller commits together with the order rows.
+    """
+
+    lines = sorted((int(pid), int(qty)) for pid, qty in quantities.items())
+    ids = [pid for pid, _ in lines]
+    id_placeholders = ", ".join(["?"] * len(ids))
+
+    if conn.db_type == "postgres":
+        # Lock in id order so two overlapping orders cannot deadlock
+        conn.execute(
+            f"""
+            SELECT id FROM products
+            WHERE id IN ({id_placeholders})
+            ORDER BY id
+            FOR UPDATE
+            """,
+            ids
+        ).fetchall()
+
+    # SQLite takes the database write lock on this UPDATE
+    values_sql, values_params = _values_list(lines)
+
+    reserved = conn.execute(
+        f"""
+        WITH wanted(id, qty) AS (VALUES {values_sql})
+        UPDATE products
+        SET stock = products.stock - wanted.qty
+        FROM wanted
+        WHERE products.id = wanted.id
+          AND products.stock >= wanted.qty
+        RETURNING products.id, products.name, products.price
+        """,
+        values_params
+    ).fetchall()
+
+    if len(reserved) == len(lines):
+        return {row["id"]: dict(row) for row in reserved}, []
+
+    conn.rollback()
+
+    return {}, find_shortages(conn, lines)
+
+
+def find_shortages(conn, lines):
+    ids = [pid for pid, _ in lines]
+    id_placeholders = ", ".join(["?"] * len(ids))
+
+    rows = conn.execute(
+        f"""
+        SELECT id, name, stock
+        FROM products
+        WHERE id IN ({id_placeholders})
+        """,
+        ids
+    ).fetchall()
+
+    by_id = {row["id"]: row for row in rows}
+    shortages = []
+
+    for pid, qty in lines:
+        product = by_id.get(pid)
+        available = product["stock"] if product else 0
+
+        if available < qty:
+            shortages.append({
+                "product_id": pid,
+                "name": product["name"] if product else None,
+                "requested": qty,
+                "available": max(available, 0)
+            })
+
+    return shortages
+
+
+def insert_order_items(conn, order_id, lines):
+    """
+    Bulk insert order_items in one multi-row statement.
+
+        lines: [(product_id, product_name, quantity, price), ...]
+    """
+
+    placeholders = ", ".join(["(?, ?, ?, ?, ?)"] * len(lines))
+    params = [
+        value
+        for product_id, name, quantity, price in lines
+        for value in (order_id, product_id, name, quantity, price)
+    ]
+
+    conn.execute(
+        f"""
+        INSERT INTO order_items
+        (order_id, product_id, product_name, quantity, price)
+        VALUES {placeholders}
+        """,
+        params
+    )
@@ -0,0 +1,23 @@
+from database.db import get_db_connection
+
+conn = get_db_connection()
+
+def add_column(query):
+    try:
+        conn.execute(query)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        # Ignore duplicate column error only
+        if "duplicate column" in str(e).lower() or "already exists" in str(e).lower():
+            pass
+        else:
+            raise
+
+add_column("ALTER TABLE product_media ADD COLUMN variant_key TEXT")
+add_column("ALTER TABLE products ADD COLUMN primary_media_key TEXT")
+
+conn.close()
+
+print("✅ Media variants migration completed")
+print("   Run `python -m utils.image_pipeline` to generate variants for existing images")
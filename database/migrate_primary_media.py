@@ -0,0 +1,42 @@
+from database.db import get_db_connection
+
+conn = get_db_connection()
+
+def add_column(query):
+    try:
+        conn.execute(query)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        # Ignore duplicate column error only
+        if "duplicate column" in str(e).lower() or "already exists" in str(e).lower():
+            pass
+        else:
+            raise
+
+add_column("ALTER TABLE products ADD COLUMN primary_media_url TEXT")
+add_column("ALTER TABLE products ADD COLUMN primary_media_type TEXT")
+
+# Backfill from the first media row of every product
+conn.execute("""
+    UPDATE products
+    SET primary_media_url = (
+            SELECT pm.media_url
+            FROM product_media pm
+            WHERE pm.product_id = products.id
+            ORDER BY pm.id ASC
+            LIMIT 1
+        ),
+        primary_media_type = (
+            SELECT pm.media_type
+            FROM product_media pm
+            WHERE pm.product_id = products.id
+            ORDER BY pm.id ASC
+            LIMIT 1
+        )
+""")
+
+conn.commit()
+conn.close()
+
+print("✅ Primary media migration completed")
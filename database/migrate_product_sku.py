@@ -0,0 +1,27 @@
+from database.db import get_db_connection
+
+conn = get_db_connection()
+
+def add_column(query):
+    try:
+        conn.execute(query)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        # Ignore duplicate column error only
+        if "duplicate column" in str(e).lower() or "already exists" in str(e).lower():
+            pass
+        else:
+            raise
+
+add_column("ALTER TABLE products ADD COLUMN sku TEXT")
+
+conn.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku
+    ON products (sku)
+""")
+
+conn.commit()
+conn.close()
+
+print("✅ Product SKU migration completed")
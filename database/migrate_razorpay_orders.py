@@ -0,0 +1,24 @@
+from database.db import get_db_connection
+
+conn = get_db_connection()
+
+def add_column(query):
+    try:
+        conn.execute(query)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        # Ignore duplicate column error only
+        if "duplicate column" in str(e).lower() or "already exists" in str(e).lower():
+            pass
+        else:
+            raise
+
+# Amount (paise) and creation time of the stored Razorpay order, so
+# checkout reloads can reuse it instead of creating a new one
+add_column("ALTER TABLE orders ADD COLUMN razorpay_order_amount INTEGER")
+add_column("ALTER TABLE orders ADD COLUMN razorpay_order_created_at INTEGER")
+
+conn.close()
+
+print("✅ Razorpay order columns migration completed")
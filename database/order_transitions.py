@@ -0,0 +1,159 @@
+import time
+from database.sales_rollup import record_order_changes
+from utils.email_outbox import enqueue_many
+from utils.email_templates import (
+    order_confirmed_email,
+    order_shipped_email,
+    order_delivered_email,
+)
+
+
+# Forward-only moves allowed in bulk; the per-order admin form can
+# still override anything.
+ORDER_TRANSITIONS = {
+    "PLACED": {"CONFIRMED", "SHIPPED", "CANCELLED"},
+    "CONFIRMED": {"SHIPPED", "CANCELLED"},
+    "SHIPPED": {"DELIVERED"},
+    "DELIVERED": set(),
+    "CANCELLED": set(),
+}
+
+STATUS_EMAILS = {
+    "CONFIRMED": order_confirmed_email,
+    "SHIPPED": order_shipped_email,
+    "DELIVERED": order_delivered_email,
+}
+
+MAX_BULK_ORDERS = 500
+
+
+def _in_list(ids):
+    return ", ".join(["?"] * len(ids))
+
+
+def restock_orders(conn, order_ids):
+    """
+    Put cancelled orders' units back in one statement. Every path
+    that cancels an order goes through here. Caller commits.
+    """
+
+    conn.execute(
+        f"""
+        WITH returned AS (
+            SELECT product_id, SUM(quantity) AS quantity
+            FROM order_items
+            WHERE order_id IN ({_in_list(order_ids)})
+            GROUP BY product_id
+        )
+        UPDATE products
+        SET stock = products.stock + returned.quantity
+        FROM returned
+        WHERE products.id = returned.product_id
+        """,
+        order_ids
+    )
+
+
+def bulk_transition(conn, order_ids, target_status):
+    """
+    Move many orders to target_status in one set-based transaction:
+    the UPDATE, the history rows, the sales rollup and the customer
+    emails each take a single statement.
+
+    Returns (updated_ids, rejected) where rejected is
+    [{"id", "status", "reason"}]. Ids past MAX_BULK_ORDERS are not
+    touched and come back as "over bulk limit". Caller commits.
+    """
+
+    order_ids = sorted({int(i) for i in order_ids})
+    overflow = [
+        {"id": i, "status": None, "reason": "over bulk limit"}
+        for i in order_ids[MAX_BULK_ORDERS:]
+    ]
+    order_ids = order_ids[:MAX_BULK_ORDERS]
+
+    if not order_ids or target_status not in ORDER_TRANSITIONS:
+        return [], [{"id": i, "status": None, "reason": "invalid request"} for i in order_ids] + overflow
+
+    lock_clause = "FOR UPDATE OF o" if conn.db_type == "postgres" else ""
+
+    # Locked in id order, like reserve_stock, so concurrent bulk
+    # actions cannot deadlock
+    orders = conn.execute(
+        f"""
+        SELECT o.id, o.user_id, o.created_at, o.total_amount,
+               o.payment_method, o.payment_status, o.order_status,
+               o.full_name, u.email
+        FROM orders o
+        JOIN users u ON u.id = o.user_id
+        WHERE o.id IN ({_in_list(order_ids)})
+        ORDER BY o.id
+        {lock_clause}
+        """,
+        order_ids
+    ).fetchall()
+
+    found = {order["id"]: dict(order) for order in orders}
+    movable = []
+    rejected = []
+
+    for order_id in order_ids:
+        order = found.get(order_id)
+
+        if order is None:
+            rejected.append({"id": order_id, "status": None, "reason": "not found"})
+        elif target_status not in ORDER_TRANSITIONS.get(order["order_status"], set()):
+            rejected.append({
+                "id": order_id,
+                "status": order["order_status"],
+                "reason": f"cannot move {order['order_status']} to {target_status}"
+            })
+        else:
+            movable.append(order)
+
+    rejected.extend(overflow)
+
+    if not movable:
+        return [], rejected
+
+    ids = [order["id"] for order in movable]
+    now = int(time.time())
+
+    conn.execute(
+        f"UPDATE orders SET order_status = ? WHERE id IN ({_in_list(ids)})",
+        [target_status] + ids
+    )
+
+    conn.execute(
+        f"""
+        INSERT INTO order_status_history
+        (order_id, status, message, created_at)
+        VALUES {", ".join(["(?, ?, ?, ?)"] * len(ids))}
+        """,
+        [
+            value
+            for order_id in ids
+            for value in (order_id, target_status, f"Order moved to {target_status}", now)
+        ]
+    )
+
+    if target_status == "CANCELLED":
+        restock_orders(conn, ids)
+
+    record_order_changes(conn, [
+        (order, dict(order, order_status=target_status)) for order in movable
+    ])
+
+    template = STATUS_EMAILS.get(target_status)
+
+    if template:
+        messages = []
+
+        for order in movable:
+            if order["email"]:
+                subject, body = template(order["full_name"], order["id"])
+                messages.append((order["email"], subject, body, True))
+
+        enqueue_many(conn, messages)
+
+    return ids, rejected
@@ -0,0 +1,190 @@
+import base64
+import json
+from config import Config
+from utils.cache import Cache, MemoryBackend
+
+
+# =========================
+# OPAQUE CURSORS
+# =========================
+def encode_cursor(values, direction):
+    """
+    values: sort-key values of the boundary row, in ORDER BY order.
+    direction: "next" or "prev".
+    """
+
+    raw = json.dumps({"k": list(values), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Returns (values, direction) or (None, None) for a missing,
+    tampered or malformed cursor.
+    """
+
+    if not token:
+        return None, None
+
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = data["k"], data["d"]
+    except (ValueError, KeyError, TypeError):
+        return None, None
+
+    if direction not in ("next", "prev") or not isinstance(values, list):
+        return None, None
+
+    return values, direction
+
+
+# =========================
+# KEYSET QUERIES
+# =========================
+class KeysetSort:
+    """
+    An ORDER BY made of columns that all run in the same direction,
+    with a unique column (the id) last as tiebreaker.
+
+        columns: [(sql_expression, params, row_key), ...]
+    """
+
+    def __init__(self, columns, descending):
+        self.columns = columns
+        self.descending = descending
+
+    def _expressions(self):
+        sql = ", ".join(expr for expr, _, _ in self.columns)
+        params = [p for _, expr_params, _ in self.columns for p in expr_params]
+        return sql, params
+
+    def order_by(self, backwards=False):
+        descending = self.descending != backwards
+        direction = "DESC" if descending else "ASC"
+
+        sql = ", ".join(f"{expr} {direction}" for expr, _, _ in self.columns)
+        params = [p for _, expr_params, _ in self.columns for p in expr_params]
+
+        return " ORDER BY " + sql + " ", params
+
+    def seek(self, values, backwards=False):
+        """
+        Row-value comparison that starts strictly after (or before,
+        when paging backwards) the boundary row.
+        """
+
+        descending = self.descending != backwards
+        operator = "<" if descending else ">"
+
+        sql, params = self._expressions()
+        placeholders = ", ".join(["?"] * len(values))
+
+        return f" AND ({sql}) {operator} ({placeholders}) ", params + list(values)
+
+    def key_of(self, row):
+        return [row[key] for _, _, key in self.columns]
+
+
+def keyset_page(conn, select_sql, select_params, from_where_sql, where_params,
+                sort, cursor, per_page, offset=0):
+    """
+    Fetch one page using keyset pagination.
+
+    Returns (rows, next_cursor, prev_cursor). An explicit offset is
+    only honoured without a cursor, for old ?page=N links.
+    """
+
+    values, direction = decode_cursor(cursor)
+
+    if values is not None and len(values) != len(sort.columns):
+        values, direction = None, None
+
+    backwards = direction == "prev"
+
+    sql = select_sql + from_where_sql
+    params = list(select_params) + list(where_params)
+
+    if values is not None:
+        seek_sql, seek_params = sort.seek(values, backwards)
+        sql += seek_sql
+        params += seek_params
+
+    order_sql, order_params = sort.order_by(backwards)
+    sql += order_sql + " LIMIT ? "
+    params += order_params + [per_page + 1]
+
+    if values is None and offset:
+        sql += " OFFSET ? "
+        params.append(offset)
+
+    rows = conn.execute(sql, params).fetchall()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if backwards:
+        rows.reverse()
+        has_next = True
+        has_prev = has_more
+    else:
+        has_next = has_more
+        has_prev = values is not None or offset > 0
+
+    next_cursor = encode_cursor(sort.key_of(rows[-1]), "next") if rows and has_next else None
+    prev_cursor = encode_cursor(sort.key_of(rows[0]), "prev") if rows and has_prev else None
+
+    return rows, next_cursor, prev_cursor
+
+
+# =========================
+# TOTAL COUNTS
+# =========================
+_count_cache = Cache("listing:counts", backend=MemoryBackend(1000))
+
+
+def _estimate_rows(conn, from_where_sql, params):
+    plan = conn.execute(
+        "EXPLAIN (FORMAT JSON) SELECT 1 " + from_where_sql,
+        params
+    ).fetchone()["QUERY PLAN"]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(conn, from_where_sql, params, mode=None, cache=None):
+    """
+    Total rows for a page counter.
+    Returns (count, is_estimate).
+
+    Modes (LISTING_COUNT_MODE):
+        exact    - COUNT(*) on every call
+        cached   - COUNT(*) reused for LISTING_COUNT_TTL seconds, kept in
+                   `cache` so catalog invalidation also drops it
+        estimate - planner row estimate, no scan (PostgreSQL only)
+    """
+
+    mode = mode or Config.LISTING_COUNT_MODE
+
+    if mode == "estimate" and conn.db_type == "postgres":
+        return _estimate_rows(conn, from_where_sql, params), True
+
+    def load():
+        return conn.execute(
+            "SELECT COUNT(*) AS count " + from_where_sql,
+            params
+        ).fetchone()["count"]
+
+    if mode != "cached":
+        return load(), False
+
+    count = (cache or _count_cache).get_or_set(
+        ("count", from_where_sql, list(params)),
+        load,
+        ttl=Config.LISTING_COUNT_TTL
+    )
+
+    return count, False
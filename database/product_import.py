@@ -0,0 +1,210 @@
+import csv
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+
+
+REQUIRED_COLUMNS = ("sku", "name", "price", "stock")
+OPTIONAL_COLUMNS = ("description", "category", "is_new")
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    upserted: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, sku, message):
+        self.error_count += 1
+
+        # Counted past the cap, but not kept, so a broken file
+        # cannot blow up the response
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "sku": sku, "error": message})
+
+    def as_dict(self):
+        return asdict(self)
+
+
+# =========================
+# PARSING
+# =========================
+def _parse_row(row, columns):
+    """
+    Validated values in `columns` order; ValueError explains a bad row.
+    """
+
+    sku = (row.get("sku") or "").strip()
+    name = (row.get("name") or "").strip()
+
+    if not sku:
+        raise ValueError("sku is required")
+
+    if not name:
+        raise ValueError("name is required")
+
+    try:
+        price = float(row["price"])
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {row.get('price')!r}")
+
+    try:
+        stock = int(row["stock"])
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid stock {row.get('stock')!r}")
+
+    if price < 0 or stock < 0:
+        raise ValueError("price and stock cannot be negative")
+
+    values = {
+        "sku": sku,
+        "name": name,
+        "price": price,
+        "stock": stock,
+        "description": (row.get("description") or "").strip() or None,
+        "category": (row.get("category") or "").strip() or "General",
+        "is_new": 1 if (row.get("is_new") or "").strip().lower() in TRUE_VALUES else 0,
+        "created_at": int(time.time()),
+    }
+
+    return tuple(values[column] for column in columns)
+
+
+# =========================
+# WRITES
+# =========================
+def _upsert_sql(columns, count):
+    """
+    Multi-row upsert keyed on sku. created_at is only set on insert;
+    optional columns missing from the CSV are left untouched.
+    """
+
+    placeholders = "(" + ", ".join(["?"] * len(columns)) + ")"
+    updates = ", ".join(
+        f"{column} = excluded.{column}"
+        for column in columns
+        if column not in ("sku", "created_at")
+    )
+
+    return f"""
+        INSERT INTO products ({", ".join(columns)})
+        VALUES {", ".join([placeholders] * count)}
+        ON CONFLICT (sku) DO UPDATE SET {updates}
+    """
+
+
+def _write_batch(conn, columns, batch, result):
+    """
+    batch: {sku: (line, values)}. One statement and one commit per
+    batch; if the database rejects it, rows are retried one by one so
+    the error lands on the offending line.
+    """
+
+    rows = list(batch.values())
+
+    try:
+        conn.execute(
+            _upsert_sql(columns, len(rows)),
+            [value for _, values in rows for value in values]
+        )
+        conn.commit()
+        result.upserted += len(rows)
+        return
+    except Exception:
+        conn.rollback()
+
+    for line, values in rows:
+        try:
+            conn.execute(_upsert_sql(columns, 1), values)
+            conn.commit()
+            result.upserted += 1
+        except Exception as e:
+            conn.rollback()
+            result.add_error(line, values[0], str(e).strip())
+
+
+def import_products(conn, stream, batch_size=IMPORT_BATCH_SIZE, result=None):
+    """
+    Upsert products from a CSV text stream (read row by row, never
+    loaded whole). Header names are case-insensitive; sku, name,
+    price and stock are required, description, category and is_new
+    optional. A SKU repeated within a batch keeps its last row.
+
+    Commits per batch. Callers invalidate catalog caches afterwards.
+    Pass your own `result` to still see what was committed when
+    reading the stream fails part way (e.g. UnicodeDecodeError).
+    """
+
+    if result is None:
+        result = ImportResult()
+    reader = csv.DictReader(stream)
+
+    header = [(name or "").strip().lower() for name in (reader.fieldnames or [])]
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+
+    if missing:
+        result.add_error(1, None, f"missing columns: {', '.join(missing)}")
+        return result
+
+    reader.fieldnames = header
+
+    columns = (
+        list(REQUIRED_COLUMNS)
+        + [column for column in OPTIONAL_COLUMNS if column in header]
+        + ["created_at"]
+    )
+
+    batch = {}
+
+    for row in reader:
+        result.rows += 1
+
+        try:
+            values = _parse_row(row, columns)
+        except ValueError as e:
+            result.add_error(reader.line_num, (row.get("sku") or "").strip() or None, str(e))
+            continue
+
+        batch[values[0]] = (reader.line_num, values)
+
+        if len(batch) >= batch_size:
+            _write_batch(conn, columns, batch, result)
+            batch = {}
+
+    if batch:
+        _write_batch(conn, columns, batch, result)
+
+    return result
+
+
+if __name__ == "__main__":
+    from database.db import get_db_connection
+    from utils.catalog_cache import invalidate_products
+
+    if len(sys.argv) != 2:
+        print("Usage: python -m database.product_import <products.csv>")
+        sys.exit(2)
+
+    started = time.time()
+    conn = get_db_connection()
+
+    with open(sys.argv[1], newline="", encoding="utf-8-sig") as f:
+        result = import_products(conn, f)
+
+    conn.close()
+
+    invalidate_products()
+
+    print(
+        f"✅ {result.upserted} of {result.rows} rows imported "
+        f"in {time.time() - started:.1f}s, {result.error_count} errors"
+    )
+
+    for error in result.errors[:20]:
+        print(f"   line {error['line']} ({error['sku']}): {error['error']}")
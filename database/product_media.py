@@ -0,0 +1,67 @@
+import time
+
+
+def refresh_primary_media(conn, product_id):
+    """
+    Keep products.primary_media_url / primary_media_type /
+    primary_media_key pointing at the product's first media row
+    (lowest id). Call after inserting or deleting product_media rows,
+    inside the same transaction.
+    """
+
+    conn.execute(
+        """
+        UPDATE products
+        SET primary_media_url = (
+                SELECT pm.media_url
+                FROM product_media pm
+                WHERE pm.product_id = products.id
+                ORDER BY pm.id ASC
+                LIMIT 1
+            ),
+            primary_media_type = (
+                SELECT pm.media_type
+                FROM product_media pm
+                WHERE pm.product_id = products.id
+                ORDER BY pm.id ASC
+                LIMIT 1
+            ),
+            primary_media_key = (
+                SELECT pm.variant_key
+                FROM product_media pm
+                WHERE pm.product_id = products.id
+                ORDER BY pm.id ASC
+                LIMIT 1
+            )
+        WHERE id = ?
+        """,
+        (product_id,)
+    )
+
+
+def insert_product_media(conn, product_id, media):
+    """
+    Insert every uploaded file for a product in one statement.
+
+        media: [(media_url, media_type, variant_key), ...]
+    """
+
+    if not media:
+        return
+
+    now = int(time.time())
+    placeholders = ", ".join(["(?, ?, ?, ?, ?)"] * len(media))
+    params = [
+        value
+        for media_url, media_type, key in media
+        for value in (product_id, media_url, media_type, key, now)
+    ]
+
+    conn.execute(
+        f"""
+        INSERT INTO product_media
+        (product_id, media_url, media_type, variant_key, created_at)
+        VALUES {placeholders}
+        """,
+        params
+    )
@@ -0,0 +1,169 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from flask import current_app, g, has_app_context, request
+from config import Config
+
+
+logger = logging.getLogger("query_stats")
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+# Summaries of the most recent requests, newest last
+_recent = deque(maxlen=50)
+_recent_lock = threading.Lock()
+
+
+def statement_shape(query):
+    """
+    Collapse whitespace and inline literals so the same statement
+    issued with different values groups under one shape.
+    """
+
+    shape = _WHITESPACE.sub(" ", query).strip()
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+
+    return shape.replace("%s", "?")
+
+
+def params_shape(params):
+    if params is None:
+        return "()"
+
+    if isinstance(params, dict):
+        return "{" + ", ".join(sorted(params)) + "}"
+
+    return "(" + ", ".join(type(p).__name__ for p in params) + ")"
+
+
+class QueryRecord:
+
+    __slots__ = ("shape", "params", "duration_ms", "rows")
+
+    def __init__(self, shape, params, duration_ms):
+        self.shape = shape
+        self.params = params
+        self.duration_ms = duration_ms
+        self.rows = 0
+
+    def to_dict(self):
+        return {
+            "statement": self.shape,
+            "params": self.params,
+            "duration_ms": round(self.duration_ms, 3),
+            "rows": self.rows
+        }
+
+
+class QueryRecorder:
+    """
+    Collects every statement executed through DatabaseWrapper
+    during one request.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.started = time.perf_counter()
+
+    def record(self, query, params, duration_ms):
+        entry = QueryRecord(
+            statement_shape(query),
+            params_shape(params),
+            duration_ms
+        )
+        self.records.append(entry)
+        return entry
+
+    @property
+    def total_ms(self):
+        return sum(r.duration_ms for r in self.records)
+
+    @property
+    def total_rows(self):
+        return sum(r.rows for r in self.records)
+
+    def repeated(self):
+        """
+        Statement shapes issued at least QUERY_REPEAT_THRESHOLD times,
+        the usual signature of an N+1 loop.
+        """
+
+        counts = Counter(r.shape for r in self.records)
+
+        return {
+            shape: count
+            for shape, count in counts.items()
+            if count >= Config.QUERY_REPEAT_THRESHOLD
+        }
+
+    def summary(self):
+        return {
+            "path": request.path,
+            "method": request.method,
+            "query_count": len(self.records),
+            "db_ms": round(self.total_ms, 3),
+            "request_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "rows": self.total_rows,
+            "repeated": self.repeated(),
+            "queries": [r.to_dict() for r in self.records]
+        }
+
+
+def current_recorder():
+    if not has_app_context():
+        return None
+
+    return g.get("query_recorder")
+
+
+def recent_summaries():
+    with _recent_lock:
+        return list(_recent)
+
+
+# =========================
+# REQUEST HOOKS
+# =========================
+def _start_recording():
+    g.query_recorder = QueryRecorder()
+
+
+def _finish_recording(response):
+    recorder = g.pop("query_recorder", None)
+
+    if recorder is None:
+        return response
+
+    summary = recorder.summary()
+
+    if summary["repeated"]:
+        for shape, count in summary["repeated"].items():
+            logger.warning(
+                f"Possible N+1 on {summary['method']} {summary['path']}: "
+                f"{count}x {shape[:200]}"
+            )
+
+    with _recent_lock:
+        _recent.append(summary)
+
+    if Config.QUERY_STATS_HEADERS or current_app.debug:
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={summary["db_ms"]};desc="{summary["query_count"]} queries"'
+        )
+        response.headers["X-DB-Query-Count"] = str(summary["query_count"])
+
+    return response
+
+
+def init_app(app):
+    if not Config.QUERY_STATS_ENABLED:
+        return
+
+    app.before_request(_start_recording)
+    app.after_request(_finish_recording)
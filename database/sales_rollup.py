@@ -0,0 +1,504 @@
+"""
+Daily sales rollup.
+
+sales_daily holds one row per local calendar day (the day an order was
+placed) with the order counters the dashboard needs; sales_daily_products
+holds units sold per product per day.
+
+Order changes do not touch those rows directly: every day's counters
+live in one row, and updating it inside checkout would serialize all
+concurrent orders on it. Instead the difference between an order's
+state before and after a change is appended to sales_rollup_deltas in
+the same transaction as the change, and a small worker folds pending
+deltas into the rollup tables every SALES_ROLLUP_POLL_INTERVAL seconds.
+
+Backfill / repair from the raw orders (run while the shop is quiet):
+    python -m database.sales_rollup
+Fold pending deltas (when no in-app worker runs):
+    python -m database.sales_rollup --apply
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from config import Config
+from database.db import get_db_connection
+
+
+logger = logging.getLogger("sales_rollup")
+
+ROLLUP_COLUMNS = (
+    "orders",
+    "paid_orders",
+    "paid_revenue",
+    "delivered_paid_revenue",
+    "pending_upi",
+    "placed",
+    "confirmed",
+    "shipped",
+    "delivered",
+    "cancelled",
+)
+
+SNAPSHOT_COLUMNS = "id, user_id, created_at, total_amount, payment_method, payment_status, order_status"
+
+_wakeup = threading.Event()
+_workers = []
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+def day_of(timestamp):
+    return datetime.fromtimestamp(int(timestamp)).strftime("%Y-%m-%d")
+
+
+def order_contribution(order):
+    """
+    What a single order adds to its day's row in its current state.
+    """
+
+    paid = order["payment_status"] == "PAID"
+    amount = float(order["total_amount"] or 0)
+    status = order["order_status"]
+
+    contribution = {
+        "orders": 1,
+        "paid_orders": 1 if paid else 0,
+        "paid_revenue": amount if paid else 0.0,
+        "delivered_paid_revenue": amount if paid and status == "DELIVERED" else 0.0,
+        "pending_upi": 1 if order["payment_method"] == "UPI"
+                           and order["payment_status"] == "PENDING" else 0,
+    }
+
+    for column in ("placed", "confirmed", "shipped", "delivered", "cancelled"):
+        contribution[column] = 1 if status == column.upper() else 0
+
+    return contribution
+
+
+# =========================
+# INCREMENTAL UPDATES
+# =========================
+def order_snapshot(conn, order_id):
+    """
+    The order's rollup-relevant columns, locked on PostgreSQL so the
+    before/after pair cannot interleave with another writer.
+    """
+
+    lock_clause = "FOR UPDATE" if conn.db_type == "postgres" else ""
+
+    row = conn.execute(
+        f"SELECT {SNAPSHOT_COLUMNS} FROM orders WHERE id = ? {lock_clause}",
+        (order_id,)
+    ).fetchone()
+
+    return dict(row) if row else None
+
+
+def _queue_delta(conn, delta):
+    """
+    Append-only, so concurrent orders never wait on each other here.
+    Committed (or rolled back) with the caller's transaction.
+    """
+
+    conn.execute(
+        "INSERT INTO sales_rollup_deltas (payload, created_at) VALUES (?, ?)",
+        (json.dumps(delta), int(time.time()))
+    )
+
+    _wakeup.set()
+
+
+def record_order_changes(conn, changes):
+    """
+    changes: [(before, after), ...] queued as one delta.
+    before is None for a new order. Caller commits together with
+    the order changes.
+    """
+
+    days = {}
+
+    for before, after in changes:
+        order = after or before
+
+        if order is None:
+            continue
+
+        old = order_contribution(before) if before else dict.fromkeys(ROLLUP_COLUMNS, 0)
+        new = order_contribution(after) if after else dict.fromkeys(ROLLUP_COLUMNS, 0)
+
+        day = days.setdefault(day_of(order["created_at"]), dict.fromkeys(ROLLUP_COLUMNS, 0))
+
+        for column in ROLLUP_COLUMNS:
+            day[column] += new[column] - old[column]
+
+    days = {day: delta for day, delta in days.items() if any(delta.values())}
+
+    if days:
+        _queue_delta(conn, {"days": days})
+
+
+def record_order_change(conn, before, after):
+    """
+    Queue after - before for the order's day.
+    """
+
+    record_order_changes(conn, [(before, after)])
+
+
+def record_order_items(conn, created_at, lines):
+    """
+    lines: [(product_id, product_name, quantity, price), ...]
+    """
+
+    day = day_of(created_at)
+    units = {}
+
+    for product_id, product_name, quantity, _ in lines:
+        key = (day, int(product_id))
+        units[key] = (product_name, units.get(key, (None, 0))[1] + quantity)
+
+    if units:
+        _queue_delta(conn, {
+            "units": [
+                [day, product_id, product_name, quantity]
+                for (day, product_id), (product_name, quantity) in units.items()
+            ]
+        })
+
+
+# =========================
+# ROLLUP WRITES
+# =========================
+def _upsert_days(conn, rows):
+    """
+    rows: {day: {column: delta}} added onto existing counters.
+    """
+
+    if not rows:
+        return
+
+    columns = ", ".join(ROLLUP_COLUMNS)
+    placeholders = ", ".join(
+        ["(" + ", ".join(["?"] * (len(ROLLUP_COLUMNS) + 1)) + ")"] * len(rows)
+    )
+    updates = ", ".join(
+        f"{column} = sales_daily.{column} + excluded.{column}"
+        for column in ROLLUP_COLUMNS
+    )
+
+    params = [
+        value
+        for day, delta in rows.items()
+        for value in [day] + [delta[column] for column in ROLLUP_COLUMNS]
+    ]
+
+    conn.execute(
+        f"""
+        INSERT INTO sales_daily (day, {columns})
+        VALUES {placeholders}
+        ON CONFLICT (day) DO UPDATE SET {updates}
+        """,
+        params
+    )
+
+
+def _upsert_product_units(conn, rows):
+    """
+    rows: {(day, product_id): (product_name, units)}. The latest
+    name seen is kept for products that no longer exist.
+    """
+
+    if not rows:
+        return
+
+    placeholders = ", ".join(["(?, ?, ?, ?)"] * len(rows))
+    params = [
+        value
+        for (day, product_id), (product_name, units) in rows.items()
+        for value in (day, product_id, product_name, units)
+    ]
+
+    conn.execute(
+        f"""
+        INSERT INTO sales_daily_products (day, product_id, product_name, units)
+        VALUES {placeholders}
+        ON CONFLICT (day, product_id)
+        DO UPDATE SET units = sales_daily_products.units + excluded.units,
+                      product_name = excluded.product_name
+        """,
+        params
+    )
+
+
+def apply_deltas(conn, batch_size=None):
+    """
+    Fold up to batch_size pending deltas into the rollup tables.
+    The deltas are deleted in the same transaction, so each is
+    applied exactly once even with several workers. Caller commits.
+    Returns the number of deltas applied.
+    """
+
+    lock_clause = "FOR UPDATE SKIP LOCKED" if conn.db_type == "postgres" else ""
+
+    rows = conn.execute(
+        f"""
+        DELETE FROM sales_rollup_deltas
+        WHERE id IN (
+            SELECT id FROM sales_rollup_deltas
+            ORDER BY id
+            LIMIT ?
+            {lock_clause}
+        )
+        RETURNING payload
+        """,
+        (batch_size or Config.SALES_ROLLUP_BATCH_SIZE,)
+    ).fetchall()
+
+    days = {}
+    units = {}
+
+    for row in rows:
+        delta = json.loads(row["payload"])
+
+        for day, counters in delta.get("days", {}).items():
+            total = days.setdefault(day, dict.fromkeys(ROLLUP_COLUMNS, 0))
+
+            for column in ROLLUP_COLUMNS:
+                total[column] += counters.get(column, 0)
+
+        for day, product_id, product_name, quantity in delta.get("units", []):
+            key = (day, product_id)
+            units[key] = (product_name, units.get(key, (None, 0))[1] + quantity)
+
+    _upsert_days(conn, days)
+    _upsert_product_units(conn, units)
+
+    return len(rows)
+
+
+def process_batch(batch_size=None):
+    conn = get_db_connection()
+
+    try:
+        count = apply_deltas(conn, batch_size)
+        conn.commit()
+        return count
+    finally:
+        conn.close()
+
+
+def drain():
+    """
+    Apply everything pending (CLI, benchmarks, checks).
+    """
+
+    total = 0
+
+    while True:
+        count = process_batch()
+
+        if not count:
+            return total
+
+        total += count
+
+
+# =========================
+# WORKERS
+# =========================
+def _worker_loop(stop_event):
+    while not stop_event.is_set():
+        try:
+            handled = process_batch()
+        except Exception as e:
+            logger.error(f"Sales rollup worker error: {str(e)}")
+            handled = 0
+
+        if handled:
+            continue
+
+        if _wakeup.wait(Config.SALES_ROLLUP_POLL_INTERVAL):
+            _wakeup.clear()
+
+
+def start_workers(count=None):
+    """
+    Start the worker thread(s) once per process; see
+    utils.email_outbox.start_workers.
+    """
+
+    global _workers_pid
+
+    count = Config.SALES_ROLLUP_WORKERS if count is None else count
+
+    if count <= 0 or _workers_pid == os.getpid():
+        return
+
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+
+        stop_event = threading.Event()
+        _workers.clear()
+
+        for i in range(count):
+            thread = threading.Thread(
+                target=_worker_loop,
+                args=(stop_event,),
+                name=f"sales-rollup-{i}",
+                daemon=True
+            )
+            thread.start()
+            _workers.append(thread)
+
+        _workers_pid = os.getpid()
+
+
+def init_app(app):
+    app.before_request(start_workers)
+
+
+# =========================
+# REBUILD
+# =========================
+def rebuild(conn, batch_size=5000):
+    """
+    Recompute both tables from orders / order_items. Days are
+    bucketed in Python exactly as the incremental path does; pending
+    deltas are dropped since the recount already includes them.
+    """
+
+    days = {}
+    units = {}
+
+    conn.execute("DELETE FROM sales_rollup_deltas")
+    conn.execute("DELETE FROM sales_daily")
+    conn.execute("DELETE FROM sales_daily_products")
+
+    last_id = 0
+
+    while True:
+        orders = conn.execute(
+            f"""
+            SELECT {SNAPSHOT_COLUMNS}
+            FROM orders
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, batch_size)
+        ).fetchall()
+
+        if not orders:
+            break
+
+        last_id = orders[-1]["id"]
+
+        for order in orders:
+            day = days.setdefault(
+                day_of(order["created_at"]), dict.fromkeys(ROLLUP_COLUMNS, 0)
+            )
+
+            for column, value in order_contribution(order).items():
+                day[column] += value
+
+    last_id = 0
+
+    while True:
+        items = conn.execute(
+            """
+            SELECT oi.id, oi.product_id, COALESCE(p.name, oi.product_name) AS product_name,
+                   oi.quantity, o.created_at
+            FROM order_items oi
+            JOIN orders o ON o.id = oi.order_id
+            LEFT JOIN products p ON p.id = oi.product_id
+            WHERE oi.id > ?
+            ORDER BY oi.id
+            LIMIT ?
+            """,
+            (last_id, batch_size)
+        ).fetchall()
+
+        if not items:
+            break
+
+        last_id = items[-1]["id"]
+
+        for item in items:
+            key = (day_of(item["created_at"]), item["product_id"])
+            units[key] = (item["product_name"], units.get(key, (None, 0))[1] + item["quantity"])
+
+    day_items = list(days.items())
+    for i in range(0, len(day_items), 500):
+        _upsert_days(conn, dict(day_items[i:i + 500]))
+
+    unit_items = list(units.items())
+    for i in range(0, len(unit_items), 1000):
+        _upsert_product_units(conn, dict(unit_items[i:i + 1000]))
+
+    return len(days), len(units)
+
+
+def create_rollup_tables(conn):
+    real_type = "DOUBLE PRECISION" if Config.DB_TYPE == "postgres" else "REAL"
+    pk = "SERIAL PRIMARY KEY" if Config.DB_TYPE == "postgres" else "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS sales_daily (
+            day TEXT PRIMARY KEY,
+            orders INTEGER NOT NULL DEFAULT 0,
+            paid_orders INTEGER NOT NULL DEFAULT 0,
+            paid_revenue {real_type} NOT NULL DEFAULT 0,
+            delivered_paid_revenue {real_type} NOT NULL DEFAULT 0,
+            pending_upi INTEGER NOT NULL DEFAULT 0,
+            placed INTEGER NOT NULL DEFAULT 0,
+            confirmed INTEGER NOT NULL DEFAULT 0,
+            shipped INTEGER NOT NULL DEFAULT 0,
+            delivered INTEGER NOT NULL DEFAULT 0,
+            cancelled INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Keyed by product id so a renamed product keeps its history;
+    # product_name is only a fallback label for deleted products
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_products (
+            day TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            product_name TEXT,
+            units INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, product_id)
+        )
+    """)
+
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS sales_rollup_deltas (
+            id {pk},
+            payload TEXT NOT NULL,
+            created_at INTEGER
+        )
+    """)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sales rollup maintenance")
+    parser.add_argument("--apply", action="store_true", help="fold pending deltas and exit")
+    args = parser.parse_args()
+
+    if args.apply:
+        print(f"✅ {drain()} pending rollup deltas applied.")
+    else:
+        conn = get_db_connection()
+
+        create_rollup_tables(conn)
+        day_count, product_rows = rebuild(conn)
+
+        conn.commit()
+        conn.close()
+
+        print(f"✅ sales rollup rebuilt: {day_count} days, {product_rows} product rows.")
@@ -0,0 +1,90 @@
+"""
+Product search backed by PostgreSQL full-text search.
+
+Requires the search_vector column and indexes from
+database/create_search_index.py. Matches come from three sources:
+
+    - full-text match on name / category / description (GIN on search_vector)
+    - fuzzy word match on the name, for typos (GIN trigram on name)
+    - substring match on the name, for partial words (same trigram index)
+"""
+
+TS_CONFIG = "english"
+
+
+def _like_pattern(term):
+    escaped = (
+        term.replace("\\", "\\\\")
+            .replace("%", "\\%")
+            .replace("_", "\\_")
+    )
+    return f"%{escaped}%"
+
+
+def match_clause(term):
+    """
+    WHERE fragment (alias p = products) and its params.
+    """
+
+    sql = f"""
+        (
+            p.search_vector @@ websearch_to_tsquery('{TS_CONFIG}', %s)
+            OR %s <%% p.name
+            OR p.name ILIKE %s
+        )
+    """
+
+    return sql, [term, term, _like_pattern(term)]
+
+
+def rank_expression(term):
+    """
+    Relevance score: full-text rank plus name similarity.
+    Cast to double precision so the value survives a round trip
+    through a pagination cursor unchanged.
+    """
+
+    sql = f"""
+        (
+            ts_rank_cd(p.search_vector, websearch_to_tsquery('{TS_CONFIG}', %s))
+            + word_similarity(%s, p.name)
+        )::double precision
+    """
+
+    return sql, [term, term]
+
+
+def search_products(conn, term, page=1, per_page=12):
+    """
+    Ranked, paginated search.
+    Returns (products, total_matches).
+    """
+
+    page = max(page, 1)
+
+    where_sql, where_params = match_clause(term)
+    rank_sql, rank_params = rank_expression(term)
+
+    rows = conn.execute(f"""
+        SELECT p.*,
+               p.primary_media_url AS preview_image,
+               {rank_sql} AS rank,
+               COUNT(*) OVER () AS total_matches
+        FROM products p
+        WHERE {where_sql}
+        ORDER BY rank DESC, p.id DESC
+        LIMIT %s OFFSET %s
+    """, rank_params + where_params + [per_page, (page - 1) * per_page]).fetchall()
+
+    if rows:
+        total = rows[0]["total_matches"]
+    elif page > 1:
+        # Past the last page: window count is unavailable
+        total = conn.execute(
+            f"SELECT COUNT(*) AS count FROM products p WHERE {where_sql}",
+            where_params
+        ).fetchone()["count"]
+    else:
+        total = 0
+
+    return rows, total
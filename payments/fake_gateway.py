@@ -0,0 +1,303 @@
+"""
+Local Razorpay API stand-in for tests and benchmarks.
+
+Implements the few endpoints this app uses, in memory:
+    POST /v1/orders                  create an order
+    GET  /v1/orders/<id>             fetch an order
+    GET  /v1/orders/<id>/payments    payments made against an order
+    GET  /v1/payments/<id>           fetch a payment
+
+plus helpers that are not part of the real API:
+    POST /_fake/orders/<id>/pay      {"status": "captured"} records a payment
+    GET  /_fake/stats                request and order counters
+    POST /_fake/reset                forget everything
+
+With a rate limit set, API calls beyond it get 429, like the real API.
+
+Run it and point the app at it:
+    python -m payments.fake_gateway --port 9090 [--latency-ms 50] [--rate-limit 25]
+    RAZORPAY_API_BASE_URL=http://127.0.0.1:9090 RAZORPAY_KEY_ID=x RAZORPAY_KEY_SECRET=y
+
+or in-process: gateway = start_fake_gateway(); ...; gateway.shutdown()
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class GatewayState:
+
+    def __init__(self, latency=0.0, rate_limit=0):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.orders = {}
+        self.payments = {}
+        self.requests = 0
+        self.throttled = 0
+        self.window = []
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """
+        Count an API call; False when it exceeds rate_limit per second.
+        """
+
+        with self.lock:
+            self.requests += 1
+
+            if not self.rate_limit:
+                return True
+
+            now = time.monotonic()
+            self.window = [t for t in self.window if now - t < 1.0]
+
+            if len(self.window) >= self.rate_limit:
+                self.throttled += 1
+                return False
+
+            self.window.append(now)
+            return True
+
+    def reset(self):
+        with self.lock:
+            self.orders.clear()
+            self.payments.clear()
+            self.requests = 0
+            self.throttled = 0
+            self.window = []
+
+    def create_order(self, data):
+        order = {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": int(data.get("amount", 0)),
+            "amount_paid": 0,
+            "amount_due": int(data.get("amount", 0)),
+            "currency": data.get("currency", "INR"),
+            "receipt": data.get("receipt"),
+            "status": "created",
+            "attempts": 0,
+            "notes": data.get("notes", []),
+            "created_at": int(time.time()),
+        }
+
+        with self.lock:
+            self.orders[order["id"]] = order
+
+        return order
+
+    def pay(self, order_id, status="captured"):
+        with self.lock:
+            order = self.orders.get(order_id)
+
+            if order is None:
+                return None
+
+            payment = {
+                "id": f"pay_{uuid.uuid4().hex[:14]}",
+                "entity": "payment",
+                "amount": order["amount"],
+                "currency": order["currency"],
+                "status": status,
+                "order_id": order_id,
+                "method": "upi",
+                "captured": status == "captured",
+                "created_at": int(time.time()),
+            }
+
+            self.payments[payment["id"]] = payment
+            order["attempts"] += 1
+
+            if status == "captured":
+                order["status"] = "paid"
+                order["amount_paid"] = order["amount"]
+                order["amount_due"] = 0
+            else:
+                order["status"] = "attempted"
+
+            return payment
+
+    def order_payments(self, order_id):
+        with self.lock:
+            items = [p for p in self.payments.values() if p["order_id"] == order_id]
+
+        return {"entity": "collection", "count": len(items), "items": items}
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "orders": len(self.orders),
+                "payments": len(self.payments),
+            }
+
+
+def _not_found(what):
+    return 400, {
+        "error": {
+            "code": "BAD_REQUEST_ERROR",
+            "description": f"The id provided does not exist: {what}"
+        }
+    }
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API, so client pooling is exercised
+    protocol_version = "HTTP/1.1"
+
+    routes = [
+        ("POST", re.compile(r"^/v1/orders$"), "create_order"),
+        ("GET", re.compile(r"^/v1/orders/([\w]+)/payments$"), "order_payments"),
+        ("GET", re.compile(r"^/v1/orders/([\w]+)$"), "fetch_order"),
+        ("GET", re.compile(r"^/v1/payments/([\w]+)$"), "fetch_payment"),
+        ("POST", re.compile(r"^/_fake/orders/([\w]+)/pay$"), "fake_pay"),
+        ("GET", re.compile(r"^/_fake/stats$"), "fake_stats"),
+        ("POST", re.compile(r"^/_fake/reset$"), "fake_reset"),
+    ]
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+
+        if not length:
+            return {}
+
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method):
+        path = self.path.split("?", 1)[0]
+
+        for route_method, pattern, name in self.routes:
+            match = pattern.match(path)
+
+            if route_method == method and match:
+                if not path.startswith("/_fake/"):
+                    if not self.state.allow():
+                        self._send(429, {
+                            "error": {
+                                "code": "BAD_REQUEST_ERROR",
+                                "description": "Too many requests"
+                            }
+                        })
+                        return
+
+                    if self.state.latency:
+                        time.sleep(self.state.latency)
+
+                status, payload = getattr(self, name)(*match.groups())
+                self._send(status, payload)
+                return
+
+        self._send(404, {"error": {"code": "BAD_REQUEST_ERROR", "description": "No such route"}})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    # ---- API ----
+    def create_order(self):
+        return 200, self.state.create_order(self._body())
+
+    def fetch_order(self, order_id):
+        order = self.state.orders.get(order_id)
+        return (200, order) if order else _not_found(order_id)
+
+    def order_payments(self, order_id):
+        if order_id not in self.state.orders:
+            return _not_found(order_id)
+
+        return 200, self.state.order_payments(order_id)
+
+    def fetch_payment(self, payment_id):
+        payment = self.state.payments.get(payment_id)
+        return (200, payment) if payment else _not_found(payment_id)
+
+    # ---- Test helpers ----
+    def fake_pay(self, order_id):
+        payment = self.state.pay(order_id, self._body().get("status", "captured"))
+        return (200, payment) if payment else _not_found(order_id)
+
+    def fake_stats(self):
+        return 200, self.state.stats()
+
+    def fake_reset(self):
+        self.state.reset()
+        return 200, {}
+
+
+class GatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up (timeouts in tests) are expected
+        pass
+
+
+class FakeGateway:
+    """
+    A running fake gateway; url is what RAZORPAY_API_BASE_URL should be.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, rate_limit=0):
+        self.server = GatewayServer((host, port), GatewayHandler)
+        self.server.state = GatewayState(latency, rate_limit)
+        self.state = self.server.state
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever,
+            name="fake-razorpay",
+            daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_fake_gateway(host="127.0.0.1", port=0, latency=0.0, rate_limit=0):
+    return FakeGateway(host, port, latency, rate_limit).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Razorpay API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9090)
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every API call")
+    parser.add_argument("--rate-limit", type=int, default=0, help="API calls per second before 429 (0 = off)")
+    args = parser.parse_args()
+
+    gateway = FakeGateway(args.host, args.port, args.latency_ms / 1000, args.rate_limit)
+    print(f"Fake Razorpay listening on {gateway.url}")
+
+    try:
+        gateway.server.serve_forever()
+    except KeyboardInterrupt:
+        gateway.shutdown()
@@ -1,8 +1,53 @@
 import razorpay
+import requests
 import hmac
 import hashlib
 import json
-from flask import current_app
+import threading
+from requests.adapters import HTTPAdapter
+from flask import current_app, has_app_context
+from config import Config
+
+
+_client = None
+_client_settings = None
+_client_lock = threading.Lock()
+
+
+def _setting(name):
+    """
+    App config inside a request (tests override it there), the Config
+    class for CLI jobs such as reconciliation.
+    """
+
+    if has_app_context():
+        return current_app.config.get(name)
+
+    return getattr(Config, name, None)
+
+
+def to_paise(amount):
+    # round() first: int(19.99 * 100) would give 1998
+    return int(round(float(amount) * 100))
+
+
+class TimeoutSession(requests.Session):
+    """
+    requests has no session-wide timeout; without one a stalled
+    gateway would hold a web worker indefinitely.
+    """
+
+    def __init__(self, timeout, pool_size):
+        super().__init__()
+        self.timeout = timeout
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(*args, **kwargs)
 
 
 class RazorpayService:
@@ -14,18 +59,38 @@ class RazorpayService:
     @staticmethod
     def get_client():
         """
-        Initialize Razorpay client using config keys.
+        Process-wide Razorpay client: one keep-alive connection pool
+        shared by every request. Rebuilt if the keys or base URL change.
         """
 
-        key_id = current_app.config.get("RAZORPAY_KEY_ID")
-        key_secret = current_app.config.get("RAZORPAY_KEY_SECRET")
+        global _client, _client_settings
+
+        key_id = _setting("RAZORPAY_KEY_ID")
+        key_secret = _setting("RAZORPAY_KEY_SECRET")
+        base_url = _setting("RAZORPAY_API_BASE_URL")
 
         if not key_id or not key_secret:
             raise ValueError("Razorpay API keys are not configured properly.")
 
-        return razorpay.Client(
-            auth=(key_id, key_secret)
-        )
+        settings = (key_id, key_secret, base_url)
+
+        if _client is None or _client_settings != settings:
+            with _client_lock:
+                if _client is None or _client_settings != settings:
+                    session = TimeoutSession(
+                        (Config.RAZORPAY_CONNECT_TIMEOUT, Config.RAZORPAY_READ_TIMEOUT),
+                        Config.RAZORPAY_HTTP_POOL_SIZE
+                    )
+                    options = {"base_url": base_url} if base_url else {}
+
+                    _client = razorpay.Client(
+                        session=session,
+                        auth=(key_id, key_secret),
+                        **options
+                    )
+                    _client_settings = settings
+
+        return _client
 
     @staticmethod
     def create_order(order_id: int, amount: float):
@@ -37,7 +102,7 @@ class RazorpayService:
         client = RazorpayService.get_client()
 
         razorpay_order = client.order.create({
-            "amount": int(amount * 100),  # Convert INR to paise
+            "amount": to_paise(amount),  # Convert INR to paise
             "currency": "INR",
             "receipt": f"order_{order_id}",
             "payment_capture": 1
@@ -45,6 +110,16 @@ class RazorpayService:
 
         return razorpay_order
 
+    @staticmethod
+    def fetch_order_payments(razorpay_order_id):
+        """
+        Payments attempted against a Razorpay order (any status).
+        """
+
+        client = RazorpayService.get_client()
+
+        return client.order.payments(razorpay_order_id).get("items", [])
+
     @staticmethod
     def verify_payment_signature(
         razorpay_order_id,
@@ -55,7 +130,7 @@ class RazorpayService:
         Verify frontend payment signature (optional extra layer).
         """
 
-        key_secret = current_app.config.get("RAZORPAY_KEY_SECRET")
+        key_secret = _setting("RAZORPAY_KEY_SECRET")
 
         if not key_secret:
             return False
@@ -70,6 +145,19 @@ class RazorpayService:
 
         return hmac.compare_digest(expected_signature, razorpay_signature)
 
+    @staticmethod
+    def webhook_signature(request_body, webhook_secret):
+        """
+        X-Razorpay-Signature for a raw webhook body (also used by
+        benchmarks/webhook.py to sign synthetic events).
+        """
+
+        return hmac.new(
+            webhook_secret.encode(),
+            request_body,
+            hashlib.sha256
+        ).hexdigest()
+
     @staticmethod
     def verify_webhook_signature(request_body, received_signature):
         """
@@ -77,16 +165,15 @@ class RazorpayService:
         This is CRITICAL for security.
         """
 
-        webhook_secret = current_app.config.get("RAZORPAY_WEBHOOK_SECRET")
+        webhook_secret = _setting("RAZORPAY_WEBHOOK_SECRET")
 
         if not webhook_secret:
             return False
 
-        expected_signature = hmac.new(
-            webhook_secret.encode(),
+        expected_signature = RazorpayService.webhook_signature(
             request_body,
-            hashlib.sha256
-        ).hexdigest()
+            webhook_secret
+        )
 
         return hmac.compare_digest(expected_signature, received_signature)
 
@@ -0,0 +1,295 @@
+"""
+Payment reconciliation.
+
+Razorpay orders left in payment_status = 'PENDING' (a lost webhook, a
+closed tab after paying) are checked against the gateway in batches
+and settled through the same apply_payment_captured() the webhook
+uses. Gateway calls are rate limited; progress is checkpointed per
+batch in reconciliation_checkpoints so a restart resumes mid-pass.
+
+Run as its own scheduled process (cron, Procfile):
+    python -m payments.reconciliation --once            # one full pass
+    python -m payments.reconciliation                   # pass every RECONCILIATION_INTERVAL
+    python -m payments.reconciliation --once --gateway-url http://127.0.0.1:9090
+"""
+
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from config import Config
+from database.db import get_db_connection
+from payments.razorpay_service import RazorpayService
+from payments.webhook_processor import apply_payment_captured
+from utils import logging_setup
+
+
+logger = logging.getLogger("reconciliation")
+
+CHECKPOINT = "razorpay_pending"
+
+
+# =========================
+# GATEWAYS
+# =========================
+class PaymentGateway:
+    """
+    Looks up the payments made against one gateway order.
+    """
+
+    def order_payments(self, razorpay_order_id):
+        raise NotImplementedError
+
+
+class RazorpayGateway(PaymentGateway):
+    """
+    The real API, or payments/fake_gateway.py when
+    RAZORPAY_API_BASE_URL points at it.
+    """
+
+    def order_payments(self, razorpay_order_id):
+        return RazorpayService.fetch_order_payments(razorpay_order_id)
+
+
+class InMemoryGateway(PaymentGateway):
+    """
+    A fake_gateway.GatewayState used directly, without HTTP.
+    """
+
+    def __init__(self, state):
+        self.state = state
+
+    def order_payments(self, razorpay_order_id):
+        return self.state.order_payments(razorpay_order_id)["items"]
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the fetch threads: at most `rate` calls per
+    second, `burst` at once. Keep burst small: a full bucket plus a
+    second of refill is what the gateway sees in its first window.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+# =========================
+# CHECKPOINT
+# =========================
+def _load_checkpoint(conn):
+    row = conn.execute(
+        "SELECT last_order_id FROM reconciliation_checkpoints WHERE name = ?",
+        (CHECKPOINT,)
+    ).fetchone()
+
+    return row["last_order_id"] if row else 0
+
+
+def _save_checkpoint(conn, last_order_id):
+    conn.execute(
+        """
+        INSERT INTO reconciliation_checkpoints (name, last_order_id, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE
+        SET last_order_id = excluded.last_order_id,
+            updated_at = excluded.updated_at
+        """,
+        (CHECKPOINT, last_order_id, int(time.time()))
+    )
+
+
+# =========================
+# RECONCILE
+# =========================
+@dataclass
+class ReconciliationStats:
+    checked: int = 0
+    paid: int = 0
+    already_processed: int = 0
+    unpaid: int = 0
+    rejected: int = 0
+    gateway_errors: int = 0
+
+    def add(self, other):
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+
+def _fetch_all(gateway, limiter, orders, pool):
+    """
+    {razorpay_order_id: [payments]} for the batch; orders whose
+    lookup failed are left out and retried on the next pass.
+    """
+
+    def fetch(razorpay_order_id):
+        limiter.acquire()
+        return gateway.order_payments(razorpay_order_id)
+
+    futures = {
+        order["razorpay_order_id"]: pool.submit(fetch, order["razorpay_order_id"])
+        for order in orders
+    }
+
+    results = {}
+
+    for razorpay_order_id, future in futures.items():
+        try:
+            results[razorpay_order_id] = future.result()
+        except Exception as e:
+            logger.warning(f"Gateway lookup failed for {razorpay_order_id}: {str(e)}")
+
+    return results
+
+
+def reconcile_batch(conn, gateway, limiter, pool, batch_size=None):
+    """
+    Settle the next batch after the checkpoint. Returns stats, or None
+    once the pass has reached the end (the checkpoint is then reset).
+    """
+
+    batch_size = batch_size or Config.RECONCILIATION_BATCH_SIZE
+    settled_before = int(time.time()) - Config.RECONCILIATION_MIN_AGE
+
+    last_id = _load_checkpoint(conn)
+
+    orders = conn.execute(
+        """
+        SELECT id, razorpay_order_id
+        FROM orders
+        WHERE payment_status = 'PENDING'
+          AND payment_method = 'RAZORPAY'
+          AND razorpay_order_id IS NOT NULL
+          AND created_at <= ?
+          AND id > ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (settled_before, last_id, batch_size)
+    ).fetchall()
+
+    if not orders:
+        _save_checkpoint(conn, 0)
+        conn.commit()
+        return None
+
+    # No transaction held open while waiting on the gateway
+    conn.rollback()
+
+    payments_by_order = _fetch_all(gateway, limiter, orders, pool)
+
+    stats = ReconciliationStats(
+        checked=len(payments_by_order),
+        gateway_errors=len(orders) - len(payments_by_order)
+    )
+
+    captured = []
+
+    for payments in payments_by_order.values():
+        payment = next((p for p in payments if p.get("status") == "captured"), None)
+
+        if payment is None:
+            stats.unpaid += 1
+        else:
+            captured.append(payment)
+
+    for outcome in apply_payment_captured(conn, captured):
+        if outcome == "success":
+            stats.paid += 1
+        elif outcome == "already_processed":
+            stats.already_processed += 1
+        else:
+            stats.rejected += 1
+
+    # Same transaction as the settlements: a crash replays at most
+    # this batch, and applying a capture twice is a no-op
+    _save_checkpoint(conn, orders[-1]["id"])
+    conn.commit()
+
+    return stats
+
+
+def run_pass(gateway=None, limiter=None, batch_size=None):
+    """
+    Walk every eligible pending order once, from the checkpoint.
+    """
+
+    gateway = gateway or RazorpayGateway()
+    limiter = limiter or RateLimiter(Config.RECONCILIATION_RATE)
+    total = ReconciliationStats()
+
+    conn = get_db_connection()
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=Config.RECONCILIATION_CONCURRENCY,
+            thread_name_prefix="reconcile"
+        ) as pool:
+            while True:
+                stats = reconcile_batch(conn, gateway, limiter, pool, batch_size)
+
+                if stats is None:
+                    break
+
+                total.add(stats)
+                logger.info(f"Reconciled batch: {asdict(stats)}")
+    finally:
+        conn.close()
+
+    return total
+
+
+def run_forever(interval=None, gateway=None):
+    limiter = RateLimiter(Config.RECONCILIATION_RATE)
+
+    while True:
+        started = time.monotonic()
+
+        try:
+            stats = run_pass(gateway, limiter)
+            logger.info(f"Reconciliation pass done: {asdict(stats)}")
+        except Exception as e:
+            logger.error(f"Reconciliation pass failed: {str(e)}")
+
+        time.sleep(max(0, (interval or Config.RECONCILIATION_INTERVAL) - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Settle pending Razorpay orders against the gateway")
+    parser.add_argument("--once", action="store_true", help="run one full pass and exit")
+    parser.add_argument("--gateway-url", help="override RAZORPAY_API_BASE_URL (e.g. the fake gateway)")
+    parser.add_argument("--batch-size", type=int)
+    args = parser.parse_args()
+
+    logging_setup.configure()
+
+    if args.gateway_url:
+        Config.RAZORPAY_API_BASE_URL = args.gateway_url
+
+    if args.once:
+        started = time.time()
+        stats = run_pass(batch_size=args.batch_size)
+        print(f"✅ Reconciliation pass finished in {time.time() - started:.1f}s: {asdict(stats)}")
+    else:
+        run_forever()
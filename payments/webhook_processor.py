@@ -0,0 +1,480 @@
+"""
+Razorpay webhook processing.
+
+The webhook route only verifies the signature and appends the raw
+event to payment_events (deduplicated on the event id), then acks.
+Events are applied here, in batches, by a background worker thread;
+payment_events doubles as a replayable log.
+
+Run standalone:
+    python -m payments.webhook_processor                    # keep processing
+    python -m payments.webhook_processor --once             # drain and exit
+    python -m payments.webhook_processor --replay FAILED    # retry failed events
+    python -m payments.webhook_processor --replay ALL --since 1767225600
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from config import Config
+from database.db import get_db_connection
+from database.sales_rollup import record_order_changes
+from payments.razorpay_service import to_paise
+from utils import logging_setup
+from utils.email_outbox import enqueue_many
+from utils.email_templates import upi_payment_confirmed_email
+
+
+logger = logging.getLogger("payment_logger")
+
+_wakeup = threading.Event()
+_workers = []
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+# Outcomes that finish an event; anything else needs a human (or a replay)
+DONE_OUTCOMES = {"success", "already_processed"}
+
+
+# =========================
+# INGEST
+# =========================
+def event_key(payload, header_event_id=None):
+    """
+    Razorpay sends the same X-Razorpay-Event-Id on every retry of a
+    delivery; without it fall back to event name + entity id.
+    """
+
+    if header_event_id:
+        return header_event_id
+
+    entity = _payment_entity(payload) or {}
+
+    return f"{payload.get('event')}:{entity.get('id')}"
+
+
+def _payment_entity(payload):
+    try:
+        return payload["payload"]["payment"]["entity"]
+    except (KeyError, TypeError):
+        return None
+
+
+def record_event(conn, payload, raw_body, header_event_id=None):
+    """
+    Append a verified webhook to the log. Returns False when the event
+    was already recorded. Caller commits.
+    """
+
+    entity = _payment_entity(payload) or {}
+    now = int(time.time())
+
+    row = conn.execute(
+        """
+        INSERT INTO payment_events
+        (event_id, event_type, payment_id, razorpay_order_id, payload,
+         status, attempts, next_attempt_at, received_at)
+        VALUES (?, ?, ?, ?, ?, 'PENDING', 0, ?, ?)
+        ON CONFLICT (event_id) DO NOTHING
+        RETURNING id
+        """,
+        (
+            event_key(payload, header_event_id),
+            payload.get("event"),
+            entity.get("id"),
+            entity.get("order_id"),
+            raw_body.decode("utf-8"),
+            now,
+            now
+        )
+    ).fetchone()
+
+    if row is None:
+        return False
+
+    _wakeup.set()
+    return True
+
+
+# =========================
+# STATE TRANSITIONS
+# =========================
+def apply_payment_captured(conn, payments):
+    """
+    Mark the orders behind captured Razorpay payments as PAID and
+    CONFIRMED, update the sales rollup and queue the confirmation
+    emails, all on the caller's transaction.
+
+        payments: [payment entity dict, ...]
+
+    Returns one outcome per payment, in order: "success",
+    "already_processed", "ignored", "order_not_found",
+    "amount_mismatch" or "invalid_payment".
+    """
+
+    outcomes = [None] * len(payments)
+    wanted = {}
+
+    for i, payment in enumerate(payments):
+        if payment.get("status") != "captured":
+            outcomes[i] = "ignored"
+        elif payment.get("currency") != "INR" or not payment.get("order_id"):
+            outcomes[i] = "invalid_payment"
+        else:
+            wanted.setdefault(payment["order_id"], []).append(i)
+
+    if not wanted:
+        return outcomes
+
+    lock_clause = "FOR UPDATE OF o" if conn.db_type == "postgres" else ""
+    placeholders = ", ".join(["?"] * len(wanted))
+
+    # Only what the transition, the rollup and the email need; served
+    # by the unique index on razorpay_order_id
+    orders = conn.execute(
+        f"""
+        SELECT o.id, o.user_id, o.created_at, o.total_amount,
+               o.payment_method, o.payment_status, o.order_status,
+               o.razorpay_order_id, o.full_name, u.email
+        FROM orders o
+        LEFT JOIN users u ON u.id = o.user_id
+        WHERE o.razorpay_order_id IN ({placeholders})
+        ORDER BY o.id
+        {lock_clause}
+        """,
+        list(wanted)
+    ).fetchall()
+
+    by_razorpay_id = {order["razorpay_order_id"]: dict(order) for order in orders}
+    to_pay = {}
+
+    for razorpay_order_id, indexes in wanted.items():
+        order = by_razorpay_id.get(razorpay_order_id)
+
+        for i in indexes:
+            if order is None:
+                outcomes[i] = "order_not_found"
+            elif order["payment_status"] == "PAID" or order["id"] in to_pay:
+                outcomes[i] = "already_processed"
+            elif to_paise(order["total_amount"]) != payments[i].get("amount"):
+                outcomes[i] = "amount_mismatch"
+            else:
+                to_pay[order["id"]] = (order, i)
+                outcomes[i] = "success"
+
+    if not to_pay:
+        return outcomes
+
+    # Conditional, so a concurrent duplicate cannot apply a payment twice
+    placeholders = ", ".join(["?"] * len(to_pay))
+    paid_ids = {
+        row["id"]
+        for row in conn.execute(
+            f"""
+            UPDATE orders
+            SET payment_status = 'PAID',
+                order_status = 'CONFIRMED'
+            WHERE id IN ({placeholders}) AND payment_status != 'PAID'
+            RETURNING id
+            """,
+            list(to_pay)
+        ).fetchall()
+    }
+
+    paid = []
+
+    for order_id, (order, i) in to_pay.items():
+        if order_id in paid_ids:
+            paid.append(order)
+        else:
+            outcomes[i] = "already_processed"
+
+    record_order_changes(conn, [
+        (order, dict(order, payment_status="PAID", order_status="CONFIRMED"))
+        for order in paid
+    ])
+
+    messages = []
+
+    for order in paid:
+        if order.get("email"):
+            subject, html_content = upi_payment_confirmed_email(
+                order["full_name"],
+                order["id"],
+                order["total_amount"]
+            )
+            messages.append((order["email"], subject, html_content, True))
+
+    enqueue_many(conn, messages)
+
+    for order in paid:
+        logger.info(f"Payment marked PAID and order CONFIRMED for order {order['id']}")
+
+    return outcomes
+
+
+# =========================
+# PROCESSING
+# =========================
+def _claim_batch(conn, batch_size):
+    now = int(time.time())
+    stale_before = now - Config.PAYMENT_EVENTS_LOCK_TIMEOUT
+
+    lock_clause = "FOR UPDATE SKIP LOCKED" if conn.db_type == "postgres" else ""
+
+    # Oldest first, so a payment is applied in the order Razorpay sent it
+    rows = conn.execute(
+        f"""
+        UPDATE payment_events
+        SET status = 'PROCESSING', locked_at = ?
+        WHERE id IN (
+            SELECT id FROM payment_events
+            WHERE (status = 'PENDING' AND next_attempt_at <= ?)
+               OR (status = 'PROCESSING' AND locked_at < ?)
+            ORDER BY id
+            LIMIT ?
+            {lock_clause}
+        )
+        RETURNING id, event_id, event_type, payload, attempts
+        """,
+        (now, now, stale_before, batch_size)
+    ).fetchall()
+
+    conn.commit()
+
+    return sorted(rows, key=lambda row: row["id"])
+
+
+def _apply_events(conn, events):
+    """
+    Returns {event id: (status, result)} for the claimed events.
+    """
+
+    results = {}
+    captured = []
+
+    for event in events:
+        if event["event_type"] != "payment.captured":
+            results[event["id"]] = ("IGNORED", "ignored")
+            continue
+
+        entity = _payment_entity(json.loads(event["payload"]))
+
+        if entity is None:
+            results[event["id"]] = ("FAILED", "malformed_payload")
+        else:
+            captured.append((event, entity))
+
+    outcomes = apply_payment_captured(conn, [entity for _, entity in captured])
+
+    for (event, _), outcome in zip(captured, outcomes):
+        if outcome in DONE_OUTCOMES:
+            results[event["id"]] = ("PROCESSED", outcome)
+        elif outcome == "ignored":
+            results[event["id"]] = ("IGNORED", outcome)
+        else:
+            results[event["id"]] = ("FAILED", outcome)
+            logger.error(f"Webhook event {event['event_id']} not applied: {outcome}")
+
+    return results
+
+
+def _finish(conn, results):
+    now = int(time.time())
+    grouped = {}
+
+    for event_id, status_result in results.items():
+        grouped.setdefault(status_result, []).append(event_id)
+
+    for (status, result), ids in grouped.items():
+        conn.execute(
+            f"""
+            UPDATE payment_events
+            SET status = ?, result = ?, processed_at = ?, locked_at = NULL
+            WHERE id IN ({", ".join(["?"] * len(ids))})
+            """,
+            [status, result, now] + ids
+        )
+
+
+def _retry_later(conn, event, error):
+    attempts = event["attempts"] + 1
+    status = "FAILED" if attempts >= Config.PAYMENT_EVENTS_MAX_ATTEMPTS else "PENDING"
+    delay = min(
+        Config.PAYMENT_EVENTS_BACKOFF_BASE * (2 ** (attempts - 1)),
+        Config.PAYMENT_EVENTS_BACKOFF_MAX
+    )
+
+    conn.execute(
+        """
+        UPDATE payment_events
+        SET status = ?, attempts = ?, next_attempt_at = ?,
+            last_error = ?, locked_at = NULL
+        WHERE id = ?
+        """,
+        (status, attempts, int(time.time()) + delay, str(error)[:500], event["id"])
+    )
+
+
+def process_batch(batch_size=None):
+    """
+    Claim and apply one batch in a single transaction. If the batch
+    fails, its events are retried one by one so a single bad event
+    cannot hold up the rest. Returns the number of events handled.
+    """
+
+    conn = get_db_connection()
+
+    try:
+        events = _claim_batch(conn, batch_size or Config.PAYMENT_EVENTS_BATCH_SIZE)
+
+        if not events:
+            return 0
+
+        try:
+            _finish(conn, _apply_events(conn, events))
+            conn.commit()
+            return len(events)
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Webhook batch failed, retrying events singly: {str(e)}")
+
+        for event in events:
+            try:
+                _finish(conn, _apply_events(conn, [event]))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                _retry_later(conn, event, e)
+                conn.commit()
+                logger.error(f"Webhook event {event['event_id']} failed: {str(e)}")
+
+        return len(events)
+
+    finally:
+        conn.close()
+
+
+def replay(status="FAILED", since=None, event_id=None):
+    """
+    Put logged events back in the queue. Applying is idempotent, so
+    replaying already processed events is safe. Returns the count.
+    """
+
+    clauses = []
+    params = [int(time.time())]
+
+    if event_id:
+        clauses.append("event_id = ?")
+        params.append(event_id)
+
+    if status != "ALL":
+        clauses.append("status = ?")
+        params.append(status)
+
+    if since:
+        clauses.append("received_at >= ?")
+        params.append(int(since))
+
+    where = " AND ".join(clauses) or "1 = 1"
+
+    conn = get_db_connection()
+
+    count = conn.execute(
+        f"""
+        UPDATE payment_events
+        SET status = 'PENDING', attempts = 0, next_attempt_at = ?,
+            locked_at = NULL, last_error = NULL
+        WHERE {where}
+        """,
+        params
+    ).rowcount
+
+    conn.commit()
+    conn.close()
+
+    _wakeup.set()
+
+    return count
+
+
+# =========================
+# WORKERS
+# =========================
+def _worker_loop(stop_event):
+    while not stop_event.is_set():
+        try:
+            handled = process_batch()
+        except Exception as e:
+            logger.error(f"Payment event worker error: {str(e)}")
+            handled = 0
+
+        if handled:
+            continue
+
+        if _wakeup.wait(Config.PAYMENT_EVENTS_POLL_INTERVAL):
+            _wakeup.clear()
+
+
+def start_workers(count=None):
+    """
+    Start the worker thread(s) once per process; see
+    utils.email_outbox.start_workers.
+    """
+
+    global _workers_pid
+
+    count = Config.PAYMENT_EVENTS_WORKERS if count is None else count
+
+    if count <= 0 or _workers_pid == os.getpid():
+        return
+
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+
+        stop_event = threading.Event()
+        _workers.clear()
+
+        for i in range(count):
+            thread = threading.Thread(
+                target=_worker_loop,
+                args=(stop_event,),
+                name=f"payment-events-{i}",
+                daemon=True
+            )
+            thread.start()
+            _workers.append(thread)
+
+        _workers_pid = os.getpid()
+
+
+def init_app(app):
+    app.before_request(start_workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply logged Razorpay webhook events")
+    parser.add_argument("--once", action="store_true", help="drain pending events and exit")
+    parser.add_argument(
+        "--replay",
+        metavar="STATUS",
+        help="requeue events with this status (FAILED, PROCESSED, IGNORED or ALL), then drain"
+    )
+    parser.add_argument("--since", type=int, help="with --replay: only events received at/after this epoch")
+    parser.add_argument("--event-id", help="with --replay: only this event")
+    args = parser.parse_args()
+
+    logging_setup.configure()
+
+    if args.replay:
+        print(f"Requeued {replay(args.replay.upper(), args.since, args.event_id)} events")
+
+    if args.once or args.replay:
+        while process_batch():
+            pass
+    else:
+        _worker_loop(threading.Event())
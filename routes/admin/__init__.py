@@ -8,3 +8,4 @@ from . import dashboard
 from . import products
 from . import orders
 from . import coupons
+from . import exports
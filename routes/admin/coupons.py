@@ -1,28 +1,14 @@
-from flask import render_template, request, redirect, url_for, session
+from flask import render_template, request, redirect, url_for
 from database.db import get_db_connection
+from utils.catalog_cache import invalidate_coupons
 from datetime import datetime
+from routes.utils import admin_required
 from . import admin_bp
 
 
-def admin_required():
-    if not session.get("user_id"):
-        return False
-
-    conn = get_db_connection()
-    user = conn.execute(
-        "SELECT is_admin FROM users WHERE id = ?",
-        (session["user_id"],)
-    ).fetchone()
-    conn.close()
-
-    return user and int(user["is_admin"]) == 1
-
-
 @admin_bp.route("/coupons")
+@admin_required
 def list_coupons():
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     conn = get_db_connection()
     coupons = conn.execute(
         "SELECT * FROM coupons ORDER BY id DESC"
@@ -33,10 +19,8 @@ def list_coupons():
 
 
 @admin_bp.route("/add-coupon", methods=["POST"])
+@admin_required
 def add_coupon():
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     code = request.form["code"].upper().strip()
     discount_type = request.form["discount_type"]
     discount_value = request.form["discount_value"]
@@ -70,14 +54,14 @@ def add_coupon():
         pass
 
     conn.close()
+
+    invalidate_coupons()
     return redirect(url_for("admin.list_coupons"))
 
 
 @admin_bp.route("/toggle-coupon/<int:coupon_id>", methods=["POST"])
+@admin_required
 def toggle_coupon(coupon_id):
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     conn = get_db_connection()
 
     coupon = conn.execute(
@@ -94,14 +78,14 @@ def toggle_coupon(coupon_id):
         conn.commit()
 
     conn.close()
+
+    invalidate_coupons()
     return redirect(url_for("admin.list_coupons"))
 
 
 @admin_bp.route("/delete-coupon/<int:coupon_id>", methods=["POST"])
+@admin_required
 def delete_coupon(coupon_id):
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     conn = get_db_connection()
     conn.execute(
         "DELETE FROM coupons WHERE id = ?",
@@ -110,4 +94,5 @@ def delete_coupon(coupon_id):
     conn.commit()
     conn.close()
 
+    invalidate_coupons()
     return redirect(url_for("admin.list_coupons"))
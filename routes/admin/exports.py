@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+from datetime import datetime
+from flask import Response, request, stream_with_context
+from database.db import get_db_connection
+from routes.utils import admin_required
+from .orders import order_filters
+from . import admin_bp
+
+
+EXPORT_BATCH_SIZE = 1000
+
+ORDER_COLUMNS = [
+    "order_id", "created_at", "customer_name", "customer_email",
+    "order_status", "payment_status", "payment_method", "total_amount",
+    "full_name", "phone", "address", "city", "state", "pincode",
+]
+
+ITEM_COLUMNS = ["product_id", "product_name", "quantity", "price"]
+
+
+def _export_rows(conn, from_where, params):
+    """
+    One row per order item (orders without items appear once),
+    ordered so each order's items are consecutive.
+    """
+
+    return conn.stream(
+        """
+        SELECT
+            o.id AS order_id,
+            o.created_at,
+            u.name AS customer_name,
+            u.email AS customer_email,
+            o.order_status,
+            o.payment_status,
+            o.payment_method,
+            o.total_amount,
+            o.full_name,
+            o.phone,
+            o.address,
+            o.city,
+            o.state,
+            o.pincode,
+            oi.product_id,
+            oi.product_name,
+            oi.quantity,
+            oi.price
+        """ + from_where + " ORDER BY o.id, oi.id ",
+        params,
+        batch_size=EXPORT_BATCH_SIZE
+    )
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(int(ts)).isoformat() if ts else ""
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(ORDER_COLUMNS + ITEM_COLUMNS)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(
+            [_iso(row["created_at"]) if c == "created_at" else row[c] for c in ORDER_COLUMNS]
+            + [row[c] for c in ITEM_COLUMNS]
+        )
+
+        # Flush every batch so memory stays bounded
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def _jsonl_chunks(rows):
+    """
+    One JSON object per order with its items nested.
+    """
+
+    lines = []
+    current = None
+
+    def finish(order):
+        return json.dumps(order, default=str, ensure_ascii=False) + "\n"
+
+    for row in rows:
+        if current is None or current["order_id"] != row["order_id"]:
+            if current is not None:
+                lines.append(finish(current))
+
+            current = {c: row[c] for c in ORDER_COLUMNS}
+            current["created_at"] = _iso(row["created_at"])
+            current["items"] = []
+
+        if row["product_name"] is not None:
+            current["items"].append({c: row[c] for c in ITEM_COLUMNS})
+
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield "".join(lines)
+            lines = []
+
+    if current is not None:
+        lines.append(finish(current))
+
+    yield "".join(lines)
+
+
+# =========================
+# EXPORT ORDERS
+# =========================
+@admin_bp.route("/orders/export")
+@admin_required
+def export_orders():
+    export_format = request.args.get("format", "csv")
+
+    if export_format not in ("csv", "jsonl"):
+        return "Unsupported export format", 400
+
+    from_where, params, _ = order_filters(
+        request.args,
+        joins="LEFT JOIN order_items oi ON oi.order_id = o.id"
+    )
+
+    def generate():
+        conn = get_db_connection()
+
+        try:
+            rows = _export_rows(conn, from_where, params)
+
+            if export_format == "csv":
+                yield from _csv_chunks(rows)
+            else:
+                yield from _jsonl_chunks(rows)
+        finally:
+            conn.close()
+
+    filename = f"orders-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    mimetype = "text/csv" if export_format == "csv" else "application/x-ndjson"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
@@ -1,80 +1,166 @@
-from flask import render_template, redirect, url_for, session, request
+from flask import render_template, redirect, url_for, request, jsonify
+from config import Config
 from database.db import get_db_connection
+from database.pagination import KeysetSort, keyset_page, count_rows
+from database.sales_rollup import order_snapshot, record_order_change
+from database.inventory import reserve_stock
+from database.order_transitions import bulk_transition, restock_orders
 from datetime import datetime
+from routes.utils import admin_required
 from . import admin_bp
 
 
 # =========================
-# ADMIN CHECK
+# VIEW ALL ORDERS
 # =========================
-def admin_required():
-    if not session.get("user_id"):
-        return False
-
-    conn = get_db_connection()
-    user = conn.execute(
-        "SELECT is_admin FROM users WHERE id = ?",
-        (session["user_id"],)
-    ).fetchone()
-    conn.close()
-
-    return user and int(user["is_admin"]) == 1
+ORDERS_PER_PAGE = 50
+
+ORDER_STATUSES = ["PLACED", "CONFIRMED", "SHIPPED", "DELIVERED", "CANCELLED"]
+PAYMENT_STATUSES = ["PENDING", "PAID"]
+PAYMENT_METHODS = ["COD", "RAZORPAY", "UPI"]
+
+# Sortable columns; each keyset ends with the order id
+ORDER_SORTS = {
+    "date": [("o.created_at", [], "created_at"), ("o.id", [], "id")],
+    "id": [("o.id", [], "id")],
+    "total": [("o.total_amount", [], "total_amount"), ("o.id", [], "id")],
+}
+
+
+def _day_start(value):
+    try:
+        return int(datetime.strptime(value, "%Y-%m-%d").timestamp())
+    except ValueError:
+        return None
+
+
+def order_filters(args, joins=""):
+    """
+    Returns (from_where_sql, params, filters) for the order list and
+    export. filters echoes the accepted values back to the template.
+    """
+
+    from_where = f"""
+        FROM orders o
+        JOIN users u ON u.id = o.user_id
+        {joins}
+        WHERE 1=1
+    """
+    params = []
+    filters = {}
+
+    status = args.get("status", "").strip().upper()
+    if status in ORDER_STATUSES:
+        from_where += " AND o.order_status = ? "
+        params.append(status)
+        filters["status"] = status
+
+    payment_status = args.get("payment_status", "").strip().upper()
+    if payment_status in PAYMENT_STATUSES:
+        from_where += " AND o.payment_status = ? "
+        params.append(payment_status)
+        filters["payment_status"] = payment_status
+
+    payment_method = args.get("payment_method", "").strip().upper()
+    if payment_method in PAYMENT_METHODS:
+        from_where += " AND o.payment_method = ? "
+        params.append(payment_method)
+        filters["payment_method"] = payment_method
+
+    date_from = args.get("date_from", "").strip()
+    if _day_start(date_from) is not None:
+        from_where += " AND o.created_at >= ? "
+        params.append(_day_start(date_from))
+        filters["date_from"] = date_from
+
+    date_to = args.get("date_to", "").strip()
+    if _day_start(date_to) is not None:
+        # Inclusive: everything before the following midnight
+        from_where += " AND o.created_at < ? "
+        params.append(_day_start(date_to) + 86400)
+        filters["date_to"] = date_to
+
+    customer = args.get("q", "").strip()
+    if customer:
+        like = f"%{customer.lower()}%"
+        from_where += " AND (LOWER(u.email) LIKE ? OR LOWER(u.name) LIKE ?) "
+        params += [like, like]
+        filters["q"] = customer
+
+    return from_where, params, filters
 
 
-# =========================
-# VIEW ALL ORDERS
-# =========================
 @admin_bp.route("/orders")
+@admin_required
 def view_orders():
-    if not admin_required():
-        return redirect(url_for("auth.login"))
+    sort = request.args.get("sort", "date")
+    direction = request.args.get("dir", "desc")
+    cursor = request.args.get("cursor", "").strip()
+
+    if sort not in ORDER_SORTS:
+        sort = "date"
+
+    if direction not in ("asc", "desc"):
+        direction = "desc"
+
+    from_where, params, filters = order_filters(request.args)
+    order_sort = KeysetSort(ORDER_SORTS[sort], descending=direction == "desc")
 
     conn = get_db_connection()
 
-    orders = conn.execute("""
+    # Planner estimates are only trustworthy for the whole table
+    total, is_estimate = count_rows(
+        conn,
+        from_where,
+        params,
+        mode="exact" if filters else Config.ADMIN_ORDERS_COUNT_MODE
+    )
+
+    orders, next_cursor, prev_cursor = keyset_page(
+        conn,
+        """
         SELECT
-            orders.id,
-            orders.total_amount,
-            orders.payment_method,
-            orders.payment_status,
-            orders.order_status,
-            orders.created_at,
-            users.name AS customer_name,
-            users.email AS customer_email
-        FROM orders
-        JOIN users ON orders.user_id = users.id
-        ORDER BY orders.id DESC
-    """).fetchall()
+            o.id,
+            o.total_amount,
+            o.payment_method,
+            o.payment_status,
+            o.order_status,
+            o.created_at,
+            u.name AS customer_name,
+            u.email AS customer_email
+        """,
+        [],
+        from_where,
+        params,
+        order_sort,
+        cursor,
+        ORDERS_PER_PAGE
+    )
 
     conn.close()
 
-    formatted_orders = []
-
-    for o in orders:
-        formatted_orders.append({
-            "id": o["id"],
-            "customer_name": o["customer_name"],
-            "customer_email": o["customer_email"],
-            "total_amount": o["total_amount"],
-            "payment_method": o["payment_method"],
-            "payment_status": o["payment_status"],
-            "order_status": o["order_status"],
-            "created_at": datetime.fromtimestamp(
-                int(o["created_at"])
-            ).strftime("%d %b %Y, %I:%M %p")
-        })
-
-    return render_template("admin/orders.html", orders=formatted_orders)
+    return render_template(
+        "admin/orders.html",
+        orders=orders,
+        filters=filters,
+        sort=sort,
+        dir=direction,
+        total_orders=total,
+        count_is_estimate=is_estimate,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        order_statuses=ORDER_STATUSES,
+        payment_statuses=PAYMENT_STATUSES,
+        payment_methods=PAYMENT_METHODS
+    )
 
 
 # =========================
 # ADMIN ORDER DETAIL (FIXED JOIN)
 # =========================
 @admin_bp.route("/orders/<int:order_id>")
+@admin_required
 def order_detail(order_id):
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     conn = get_db_connection()
 
     order = conn.execute("""
@@ -118,18 +204,13 @@ def order_detail(order_id):
 # UPDATE ORDER STATUS
 # =========================
 @admin_bp.route("/update-status/<int:order_id>", methods=["POST"])
+@admin_required
 def update_order_status(order_id):
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     new_status = request.form.get("order_status")
 
     conn = get_db_connection()
 
-    order = conn.execute(
-        "SELECT order_status FROM orders WHERE id = ?",
-        (order_id,)
-    ).fetchone()
+    order = order_snapshot(conn, order_id)
 
     if not order:
         conn.close()
@@ -139,11 +220,42 @@ def update_order_status(order_id):
 
     if new_status and new_status != old_status:
 
+        # Un-cancelling takes the units again, under the same
+        # no-oversell check as checkout; they may have sold meanwhile
+        if old_status == "CANCELLED":
+            items = conn.execute("""
+                SELECT product_id, SUM(quantity) AS quantity
+                FROM order_items
+                WHERE order_id = ?
+                GROUP BY product_id
+            """, (order_id,)).fetchall()
+
+            if items:
+                _, shortages = reserve_stock(
+                    conn,
+                    {item["product_id"]: item["quantity"] for item in items}
+                )
+
+                if shortages:
+                    conn.close()
+                    details = ", ".join(
+                        f"{s['name'] or 'Product ' + str(s['product_id'])} "
+                        f"(needs {s['requested']}, available {s['available']})"
+                        for s in shortages
+                    )
+                    return f"Cannot reopen order, insufficient stock: {details}", 400
+
         conn.execute(
             "UPDATE orders SET order_status = ? WHERE id = ?",
             (new_status, order_id)
         )
 
+        # Same stock handling as the bulk and customer cancel paths
+        if new_status == "CANCELLED":
+            restock_orders(conn, [order_id])
+
+        record_order_change(conn, order, dict(order, order_status=new_status))
+
         conn.execute("""
             INSERT INTO order_status_history
             (order_id, status, message, created_at)
@@ -162,21 +274,64 @@ def update_order_status(order_id):
     return redirect(url_for("admin.view_orders"))
 
 
+# =========================
+# BULK STATUS UPDATE
+# =========================
+@admin_bp.route("/orders/bulk-status", methods=["POST"])
+@admin_required
+def bulk_update_order_status():
+    """
+    Form post from the order list, or JSON:
+        {"order_ids": [1, 2, 3], "order_status": "SHIPPED"}
+    """
+
+    if request.is_json:
+        payload = request.get_json(silent=True) or {}
+        order_ids = payload.get("order_ids") or []
+        new_status = payload.get("order_status")
+
+        if not isinstance(order_ids, list):
+            return "Invalid order ids", 400
+    else:
+        order_ids = request.form.getlist("order_ids")
+        new_status = request.form.get("order_status")
+
+    try:
+        order_ids = [int(i) for i in order_ids]
+    except (TypeError, ValueError):
+        return "Invalid order ids", 400
+
+    conn = get_db_connection()
+
+    updated, rejected = bulk_transition(conn, order_ids, new_status)
+
+    conn.commit()
+    conn.close()
+
+    if request.is_json:
+        return jsonify({"updated": updated, "rejected": rejected})
+
+    return redirect(request.referrer or url_for("admin.view_orders"))
+
+
 # =========================
 # MARK UPI AS PAID
 # =========================
 @admin_bp.route("/mark-paid/<int:order_id>", methods=["POST"])
+@admin_required
 def mark_order_paid(order_id):
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     conn = get_db_connection()
 
-    conn.execute("""
-        UPDATE orders
-        SET payment_status = 'PAID'
-        WHERE id = ?
-    """, (order_id,))
+    order = order_snapshot(conn, order_id)
+
+    if order and order["payment_status"] != "PAID":
+        conn.execute("""
+            UPDATE orders
+            SET payment_status = 'PAID'
+            WHERE id = ?
+        """, (order_id,))
+
+        record_order_change(conn, order, dict(order, payment_status="PAID"))
 
     conn.commit()
     conn.close()
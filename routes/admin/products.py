@@ -1,49 +1,25 @@
+import io
+import logging
 import time
-from flask import render_template, request, redirect, url_for, session
+from flask import render_template, request, redirect, url_for, jsonify
 from database.db import get_db_connection
+from database.product_media import refresh_primary_media, insert_product_media
+from database.product_import import ImportResult, import_products as run_product_import
+from utils.media_storage import upload_media, uploaded_files
+from utils.catalog_cache import invalidate_products
+from routes.utils import admin_required
 from . import admin_bp
 
-import cloudinary
-import cloudinary.uploader
-import os
 
-
-# =========================
-# CLOUDINARY CONFIG
-# =========================
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
-
-
-# =========================
-# ADMIN CHECK
-# =========================
-def admin_required():
-    if not session.get("user_id"):
-        return False
-
-    conn = get_db_connection()
-    user = conn.execute(
-        "SELECT is_admin FROM users WHERE id = ?",
-        (session["user_id"],)
-    ).fetchone()
-    conn.close()
-
-    return user and int(user["is_admin"]) == 1
+logger = logging.getLogger("admin_products")
 
 
 # =========================
 # LIST PRODUCTS
 # =========================
 @admin_bp.route("/products")
+@admin_required
 def list_products():
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     conn = get_db_connection()
 
     products = conn.execute(
@@ -63,12 +39,8 @@ def list_products():
 # ADD PRODUCT
 # =========================
 @admin_bp.route("/add-product", methods=["GET", "POST"])
+@admin_required
 def add_product():
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
-    conn = get_db_connection()
-
     if request.method == "POST":
         name = request.form["name"]
         price = float(request.form["price"])
@@ -78,7 +50,16 @@ def add_product():
         category = request.form.get("category", "General")
         created_at = int(time.time())
 
-        # Insert product first
+        # Upload before touching the database so no transaction
+        # is held open while files travel to storage
+        try:
+            media = upload_media(uploaded_files(request.files))
+        except Exception as e:
+            logger.error(f"Media upload failed: {str(e)}")
+            return "Media upload failed, product not saved", 502
+
+        conn = get_db_connection()
+
         cursor = conn.execute(
             """
             INSERT INTO products
@@ -92,65 +73,24 @@ def add_product():
 
         product_id = cursor.fetchone()["id"]
 
-        # Handle Multiple Images
-        images = request.files.getlist("images")
-
-        for image in images:
-            if image and image.filename:
-                upload_result = cloudinary.uploader.upload(image)
-                conn.execute(
-                    """
-                    INSERT INTO product_media
-                    (product_id, media_url, media_type, created_at)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (
-                        product_id,
-                        upload_result["secure_url"],
-                        "image",
-                        int(time.time())
-                    )
-                )
-
-        # Handle Optional Video
-        video = request.files.get("video")
-
-        if video and video.filename:
-            upload_result = cloudinary.uploader.upload(
-                video,
-                resource_type="video"
-            )
-
-            conn.execute(
-                """
-                INSERT INTO product_media
-                (product_id, media_url, media_type, created_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (
-                    product_id,
-                    upload_result["secure_url"],
-                    "video",
-                    int(time.time())
-                )
-            )
+        insert_product_media(conn, product_id, media)
+        refresh_primary_media(conn, product_id)
 
         conn.commit()
         conn.close()
 
+        invalidate_products()
+
         return redirect(url_for("admin.list_products"))
 
-    conn.close()
     return render_template("admin/add_product.html")
 
 # =========================
 # EDIT PRODUCT
 # =========================
 @admin_bp.route("/edit/<int:product_id>", methods=["GET", "POST"])
+@admin_required
 def edit_product(product_id):
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     conn = get_db_connection()
 
     product = conn.execute(
@@ -158,8 +98,11 @@ def edit_product(product_id):
         (product_id,)
     ).fetchone()
 
+    # Ends the read transaction before any upload starts
+    conn.rollback()
+    conn.close()
+
     if not product:
-        conn.close()
         return "Product not found", 404
 
     if request.method == "POST":
@@ -171,6 +114,14 @@ def edit_product(product_id):
         is_new = 1 if request.form.get("is_new") else 0
         category = request.form.get("category", "General")
 
+        try:
+            media = upload_media(uploaded_files(request.files))
+        except Exception as e:
+            logger.error(f"Media upload failed for product {product_id}: {str(e)}")
+            return "Media upload failed, product not saved", 502
+
+        conn = get_db_connection()
+
         conn.execute(
             """
             UPDATE products
@@ -185,66 +136,63 @@ def edit_product(product_id):
             (name, price, stock, description, is_new, category, product_id)
         )
 
-        # Handle new images
-        images = request.files.getlist("images")
-
-        for image in images:
-            if image and image.filename:
-                upload_result = cloudinary.uploader.upload(image)
-
-                conn.execute(
-                    """
-                    INSERT INTO product_media
-                    (product_id, media_url, media_type, created_at)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (
-                        product_id,
-                        upload_result["secure_url"],
-                        "image",
-                        int(time.time())
-                    )
-                )
-
-        # Handle video
-        video = request.files.get("video")
-
-        if video and video.filename:
-
-            upload_result = cloudinary.uploader.upload(
-                video,
-                resource_type="video"
-            )
-
-            conn.execute(
-                """
-                INSERT INTO product_media
-                (product_id, media_url, media_type, created_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (
-                    product_id,
-                    upload_result["secure_url"],
-                    "video",
-                    int(time.time())
-                )
-            )
+        insert_product_media(conn, product_id, media)
+        refresh_primary_media(conn, product_id)
 
         conn.commit()
         conn.close()
 
+        invalidate_products()
+
         return redirect(url_for("admin.list_products"))
 
-    conn.close()
     return render_template("admin/edit_product.html", product=product)
+# =========================
+# IMPORT PRODUCTS (CSV)
+# =========================
+@admin_bp.route("/products/import", methods=["GET", "POST"])
+@admin_required
+def import_products():
+    if request.method == "GET":
+        return render_template("admin/import_products.html", result=None)
+
+    upload = request.files.get("file")
+
+    if not upload or not upload.filename:
+        return "CSV file required", 400
+
+    # Parsed straight from the spooled upload, row by row
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+
+    conn = get_db_connection()
+    result = ImportResult()
+
+    try:
+        run_product_import(conn, stream, result=result)
+    except UnicodeDecodeError:
+        return (
+            f"CSV must be UTF-8 encoded ({result.upserted} rows were "
+            f"imported before the invalid bytes)", 400
+        )
+    finally:
+        conn.close()
+
+        # Once for the whole file, not per batch; batches committed
+        # before a decode error must not be left behind a stale cache
+        invalidate_products()
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(result.as_dict())
+
+    return render_template("admin/import_products.html", result=result)
+
+
 # =========================
 # DELETE PRODUCT
 # =========================
 @admin_bp.route("/delete/<int:product_id>", methods=["POST"])
+@admin_required
 def delete_product(product_id):
-    if not admin_required():
-        return redirect(url_for("auth.login"))
-
     conn = get_db_connection()
 
     conn.execute(
@@ -255,4 +203,6 @@ def delete_product(product_id):
     conn.commit()
     conn.close()
 
+    invalidate_products()
+
     return redirect(url_for("admin.list_products"))
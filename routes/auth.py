@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, session, url_for
 from werkzeug.security import generate_password_hash, check_password_hash
 from database.db import get_db_connection
+from database.cart_store import attach_user_cart
+from routes.utils import remember_admin_role
 from utils.email import send_reset_email
 import secrets
 import time
@@ -71,15 +73,23 @@ def login():
             (email,)
         ).fetchone()
 
-        conn.close()
-
         if user and check_password_hash(user["password_hash"], password):
+            anonymous_cart_id = session.get("cart_id")
+
             session.clear()
             session["user_id"] = user["id"]
             session["user_name"] = user["name"]
             session["is_admin"] = bool(user["is_admin"])
+            remember_admin_role(user["id"], user["is_admin"])
+
+            # Carry items added before logging in over to the user's cart
+            attach_user_cart(conn, user["id"], anonymous_cart_id)
+            conn.commit()
+            conn.close()
+
             return redirect(url_for("shop.home"))
 
+        conn.close()
         return "Invalid email or password"
 
     return render_template("auth/login.html")
@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, session, redirect, url_for, request
 from database.db import get_db_connection
+from database.cart_store import get_cart_store, current_cart_id
 
 cart_bp = Blueprint("cart", __name__, url_prefix="/cart")
 
@@ -13,35 +14,29 @@ def add_to_cart(product_id):
     conn = get_db_connection()
 
     product = conn.execute(
-        "SELECT id, name, price, stock FROM products WHERE id = ?",
+        "SELECT id, stock FROM products WHERE id = ?",
         (product_id,)
     ).fetchone()
 
-    conn.close()
-
     if not product:
+        conn.close()
         return "Product not found", 404
 
-    cart = session.get("cart", {})
-    pid = str(product_id)
+    store = get_cart_store()
+    cart_id = current_cart_id(conn, create=True)
 
-    current_qty = cart.get(pid, {}).get("quantity", 0)
+    current_qty = store.get_quantity(conn, cart_id, product_id)
 
     if current_qty + 1 > product["stock"]:
+        conn.close()
         session["cart_error"] = "Not enough stock available"
         return redirect(url_for("shop.home"))
 
-    if pid in cart:
-        cart[pid]["quantity"] += 1
-    else:
-        cart[pid] = {
-            "id": product["id"],
-            "name": product["name"],
-            "price": product["price"],
-            "quantity": 1
-        }
+    store.add_item(conn, cart_id, product_id, 1)
+
+    conn.commit()
+    conn.close()
 
-    session["cart"] = cart
     return redirect(url_for("cart.view_cart"))
 
 
@@ -51,7 +46,13 @@ def add_to_cart(product_id):
 @cart_bp.route("/")
 def view_cart():
 
-    cart = session.get("cart", {})
+    conn = get_db_connection()
+
+    cart_id = current_cart_id(conn)
+    cart = get_cart_store().get_items(conn, cart_id) if cart_id else {}
+
+    conn.close()
+
     subtotal = sum(item["price"] * item["quantity"] for item in cart.values())
 
     discount = 0
@@ -129,27 +130,30 @@ def remove_coupon():
 @cart_bp.route("/increase/<int:product_id>")
 def increase_quantity(product_id):
 
-    cart = session.get("cart", {})
-    pid = str(product_id)
+    conn = get_db_connection()
 
-    if pid not in cart:
-        return redirect(url_for("cart.view_cart"))
+    store = get_cart_store()
+    cart_id = current_cart_id(conn)
+    current_qty = store.get_quantity(conn, cart_id, product_id) if cart_id else 0
 
-    conn = get_db_connection()
+    if not current_qty:
+        conn.close()
+        return redirect(url_for("cart.view_cart"))
 
     product = conn.execute(
         "SELECT stock FROM products WHERE id = ?",
         (product_id,)
     ).fetchone()
 
-    conn.close()
-
-    if cart[pid]["quantity"] + 1 > product["stock"]:
+    if not product or current_qty + 1 > product["stock"]:
+        conn.close()
         session["cart_error"] = "Stock limit reached"
         return redirect(url_for("cart.view_cart"))
 
-    cart[pid]["quantity"] += 1
-    session["cart"] = cart
+    store.add_item(conn, cart_id, product_id, 1)
+
+    conn.commit()
+    conn.close()
 
     return redirect(url_for("cart.view_cart"))
 
@@ -160,15 +164,16 @@ def increase_quantity(product_id):
 @cart_bp.route("/decrease/<int:product_id>")
 def decrease_quantity(product_id):
 
-    cart = session.get("cart", {})
-    pid = str(product_id)
+    conn = get_db_connection()
+
+    cart_id = current_cart_id(conn)
 
-    if pid in cart:
-        cart[pid]["quantity"] -= 1
-        if cart[pid]["quantity"] <= 0:
-            cart.pop(pid)
+    if cart_id:
+        get_cart_store().add_item(conn, cart_id, product_id, -1)
+        conn.commit()
+
+    conn.close()
 
-    session["cart"] = cart
     return redirect(url_for("cart.view_cart"))
 
 
@@ -178,8 +183,14 @@ def decrease_quantity(product_id):
 @cart_bp.route("/remove/<int:product_id>")
 def remove_from_cart(product_id):
 
-    cart = session.get("cart", {})
-    cart.pop(str(product_id), None)
-    session["cart"] = cart
+    conn = get_db_connection()
+
+    cart_id = current_cart_id(conn)
+
+    if cart_id:
+        get_cart_store().remove_item(conn, cart_id, product_id)
+        conn.commit()
+
+    conn.close()
 
     return redirect(url_for("cart.view_cart"))
\ No newline at end of file
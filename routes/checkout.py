@@ -1,9 +1,12 @@
 from flask import Blueprint, session, redirect, url_for, render_template, request
 from database.db import get_db_connection
+from database.cart_store import get_cart_store, current_cart_id
+from database.checkout_tokens import issue_token, consume_token
+from database.inventory import reserve_stock, insert_order_items
+from database.sales_rollup import record_order_change, record_order_items
 from utils.email_templates import order_confirmation_email
-from utils.email_queue import send_email_async
+from utils.email_outbox import enqueue_email
 import time
-import uuid
 import urllib.parse
 
 checkout_bp = Blueprint("checkout", __name__, url_prefix="/checkout")
@@ -17,11 +20,19 @@ def checkout():
     if not session.get("user_id"):
         return redirect(url_for("auth.login"))
 
-    cart = session.get("cart", {})
+    conn = get_db_connection()
+
+    cart_id = current_cart_id(conn)
+    cart = get_cart_store().get_items(conn, cart_id) if cart_id else {}
+
     if not cart:
+        conn.close()
         return redirect(url_for("cart.view_cart"))
 
-    session["checkout_token"] = str(uuid.uuid4())
+    session["checkout_token"] = issue_token(conn, session["user_id"])
+
+    conn.commit()
+    conn.close()
 
     subtotal = sum(item["price"] * item["quantity"] for item in cart.values())
 
@@ -55,14 +66,27 @@ def place_order():
     if not session.get("user_id"):
         return redirect(url_for("auth.login"))
 
-    cart = session.get("cart", {})
     payment_method = request.form.get("payment_method")
     token = request.form.get("checkout_token")
 
     if not token or token != session.get("checkout_token"):
         return "Duplicate or invalid order request", 400
 
+    conn = get_db_connection()
+
+    store = get_cart_store()
+    cart_id = current_cart_id(conn)
+
+    # The session check above does not stop two submits of the same
+    # form racing each other; only one of them can delete the token
+    if not consume_token(conn, session["user_id"], token):
+        conn.close()
+        return "Duplicate or invalid order request", 400
+
+    cart = store.get_items(conn, cart_id) if cart_id else {}
+
     if not cart or payment_method not in ["COD", "RAZORPAY"]:
+        conn.close()
         return redirect(url_for("checkout.checkout"))
 
     full_name = request.form["full_name"]
@@ -72,22 +96,37 @@ def place_order():
     state = request.form["state"]
     pincode = request.form["pincode"]
 
-    conn = get_db_connection()
-
     # =========================
-    # STOCK VALIDATION
+    # STOCK RESERVATION
     # =========================
-    for product_id, item in cart.items():
-        product = conn.execute(
-            "SELECT stock FROM products WHERE id = ?",
-            (product_id,),
-        ).fetchone()
+    # One conditional UPDATE for every line; nothing is decremented
+    # unless all lines fit, and concurrent buyers cannot oversell.
+    reserved, shortages = reserve_stock(
+        conn,
+        {pid: item["quantity"] for pid, item in cart.items()}
+    )
 
-        if not product or product["stock"] < item["quantity"]:
-            conn.close()
-            return "Insufficient stock", 400
+    if shortages:
+        conn.close()
+        details = ", ".join(
+            f"{s['name'] or 'Product ' + str(s['product_id'])} "
+            f"(requested {s['requested']}, available {s['available']})"
+            for s in shortages
+        )
+        return f"Insufficient stock: {details}", 400
+
+    # Prices come from the locked product rows
+    lines = [
+        (
+            product["id"],
+            product["name"],
+            cart[str(product["id"])]["quantity"],
+            product["price"],
+        )
+        for product in reserved.values()
+    ]
 
-    subtotal = sum(item["price"] * item["quantity"] for item in cart.values())
+    subtotal = sum(quantity * price for _, _, quantity, price in lines)
 
     # ✅ APPLY COUPON AGAIN (IMPORTANT)
     discount = 0
@@ -102,6 +141,7 @@ def place_order():
     total = max(subtotal - discount, 0)
 
     payment_status = "PAID" if payment_method == "COD" else "PENDING"
+    created_at = int(time.time())
 
     # =========================
     # INSERT ORDER
@@ -129,7 +169,7 @@ def place_order():
                 city,
                 state,
                 pincode,
-                int(time.time()),
+                created_at,
             ),
         )
 
@@ -157,41 +197,32 @@ def place_order():
                 city,
                 state,
                 pincode,
-                int(time.time()),
+                created_at,
             ),
         )
 
         order_id = result.lastrowid
 
     # =========================
-    # ORDER ITEMS + STOCK UPDATE
+    # ORDER ITEMS
     # =========================
-    for product_id, item in cart.items():
-        conn.execute(
-            """
-            INSERT INTO order_items
-            (order_id, product_id, product_name, quantity, price)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                order_id,
-                product_id,
-                item["name"],
-                item["quantity"],
-                item["price"],
-            ),
-        )
+    insert_order_items(conn, order_id, lines)
 
-        conn.execute(
-            "UPDATE products SET stock = stock - ? WHERE id = ?",
-            (item["quantity"], product_id),
-        )
+    record_order_change(conn, None, {
+        "created_at": created_at,
+        "total_amount": total,
+        "payment_method": payment_method,
+        "payment_status": payment_status,
+        "order_status": "PLACED",
+    })
+    record_order_items(conn, created_at, lines)
 
-    conn.commit()
+    store.clear(conn, cart_id)
 
     # =========================
-    # SEND EMAIL
+    # QUEUE EMAIL
     # =========================
+    # Written in the order's transaction: no order, no email
     user = conn.execute(
         "SELECT email FROM users WHERE id = ?",
         (session["user_id"],),
@@ -204,16 +235,17 @@ def place_order():
             total,
         )
 
-        send_email_async(
+        enqueue_email(
             user["email"],
             subject,
             body,
             is_html=True,
+            conn=conn,
         )
 
+    conn.commit()
     conn.close()
 
-    session.pop("cart", None)
     session.pop("checkout_token", None)
     session.pop("coupon", None)  # ✅ clear coupon after order
 
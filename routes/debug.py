@@ -0,0 +1,37 @@
+from collections import defaultdict
+from flask import Blueprint, jsonify
+from database.query_stats import recent_summaries
+
+debug_bp = Blueprint("debug", __name__, url_prefix="/_debug")
+
+
+# =========================
+# QUERY STATS SUMMARY
+# =========================
+@debug_bp.route("/queries")
+def query_summary():
+
+    summaries = recent_summaries()
+
+    totals = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "rows": 0})
+
+    for summary in summaries:
+        for query in summary["queries"]:
+            entry = totals[query["statement"]]
+            entry["count"] += 1
+            entry["total_ms"] += query["duration_ms"]
+            entry["rows"] += query["rows"]
+
+    statements = sorted(
+        (
+            {"statement": shape, **entry, "total_ms": round(entry["total_ms"], 3)}
+            for shape, entry in totals.items()
+        ),
+        key=lambda s: s["total_ms"],
+        reverse=True
+    )
+
+    return jsonify({
+        "requests": summaries,
+        "statements": statements
+    })
@@ -1,44 +1,88 @@
 import logging
-import os
+import time
 from flask import Blueprint, render_template, request, current_app, abort
+from config import Config
 from database.db import get_db_connection
-from payments.razorpay_service import RazorpayService
-from utils.email_queue import send_email_async
-from utils.email_templates import upi_payment_confirmed_email
+from payments.razorpay_service import RazorpayService, to_paise
+from payments.webhook_processor import record_event
 
 
 payment_bp = Blueprint("payment", __name__, url_prefix="/payment")
 
 
+# Handlers are set up in utils/logging_setup.py
+payment_logger = logging.getLogger("payment_logger")
+
+
 # =====================================================
-# Dedicated Logging Setup
+# 1️⃣ Create Razorpay Order + Render Checkout
 # =====================================================
-LOG_DIR = "logs"
-LOG_FILE = os.path.join(LOG_DIR, "payment_webhook.log")
+def _reusable_gateway_order(order):
+    """
+    The stored Razorpay order can be paid again after a reload or a
+    failed attempt, as long as it was created for the current amount.
+    """
 
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
+    if not order["razorpay_order_id"] or order["razorpay_order_amount"] is None:
+        return False
 
-payment_logger = logging.getLogger("payment_logger")
+    if order["razorpay_order_amount"] != to_paise(order["total_amount"]):
+        return False
+
+    age = time.time() - (order["razorpay_order_created_at"] or 0)
+
+    return age < Config.RAZORPAY_ORDER_REUSE_TTL
 
-if not payment_logger.handlers:
-    payment_logger.setLevel(logging.INFO)
-    payment_logger.propagate = False
 
-    file_handler = logging.FileHandler(LOG_FILE, mode="a", encoding="utf-8")
-    formatter = logging.Formatter(
-        "%(asctime)s - %(levelname)s - %(message)s"
+def _gateway_order_id(conn, order):
+    """
+    One Razorpay order per local order. Concurrent loads may both call
+    the gateway, but only the first stored id is ever handed out.
+    """
+
+    if _reusable_gateway_order(order):
+        return order["razorpay_order_id"]
+
+    # Don't hold the read transaction open over the gateway call
+    conn.rollback()
+
+    razorpay_order = RazorpayService.create_order(
+        order_id=order["id"],
+        amount=order["total_amount"]
     )
-    file_handler.setFormatter(formatter)
 
-    payment_logger.addHandler(file_handler)
+    if order["razorpay_order_id"] is None:
+        unchanged, params = "razorpay_order_id IS NULL", []
+    else:
+        unchanged, params = "razorpay_order_id = ?", [order["razorpay_order_id"]]
+
+    updated = conn.execute(
+        f"""
+        UPDATE orders
+        SET razorpay_order_id = ?,
+            razorpay_order_amount = ?,
+            razorpay_order_created_at = ?
+        WHERE id = ? AND {unchanged}
+        """,
+        [
+            razorpay_order["id"],
+            razorpay_order["amount"],
+            int(time.time()),
+            order["id"]
+        ] + params
+    ).rowcount
 
-payment_logger.info("Payment logger initialized.")
+    conn.commit()
+
+    if updated:
+        return razorpay_order["id"]
+
+    return conn.execute(
+        "SELECT razorpay_order_id FROM orders WHERE id = ?",
+        (order["id"],)
+    ).fetchone()["razorpay_order_id"]
 
 
-# =====================================================
-# 1️⃣ Create Razorpay Order + Render Checkout
-# =====================================================
 @payment_bp.route("/razorpay/<int:order_id>")
 def razorpay_checkout(order_id):
 
@@ -57,24 +101,15 @@ def razorpay_checkout(order_id):
         conn.close()
         return "Payment already completed."
 
-    razorpay_order = RazorpayService.create_order(
-        order_id=order["id"],
-        amount=order["total_amount"]
-    )
-
-    conn.execute(
-        "UPDATE orders SET razorpay_order_id = ? WHERE id = ?",
-        (razorpay_order["id"], order_id)
-    )
+    razorpay_order_id = _gateway_order_id(conn, order)
 
-    conn.commit()
     conn.close()
 
     return render_template(
         "checkout/razorpay_checkout.html",
         order=order,
         razorpay_key=current_app.config["RAZORPAY_KEY_ID"],
-        razorpay_order_id=razorpay_order["id"]
+        razorpay_order_id=razorpay_order_id
     )
 
 
@@ -83,6 +118,10 @@ def razorpay_checkout(order_id):
 # =====================================================
 @payment_bp.route("/webhook", methods=["POST"])
 def razorpay_webhook():
+    """
+    Verify, log and ack. The order update happens in
+    payments/webhook_processor.py, so Razorpay never waits on it.
+    """
 
     request_body = request.data
     received_signature = request.headers.get("X-Razorpay-Signature")
@@ -98,90 +137,28 @@ def razorpay_webhook():
         payment_logger.error("Invalid webhook signature.")
         abort(400)
 
-    payload = RazorpayService.parse_webhook(request_body)
-    event = payload.get("event")
-
-    if event != "payment.captured":
-        payment_logger.info(f"Ignored event: {event}")
-        return {"status": "ignored"}
-
     try:
-        payment_entity = payload["payload"]["payment"]["entity"]
-    except KeyError:
+        payload = RazorpayService.parse_webhook(request_body)
+    except ValueError:
         payment_logger.error("Malformed webhook payload.")
         abort(400)
 
-    if payment_entity.get("status") != "captured":
-        return {"status": "ignored"}
-
-    if payment_entity.get("currency") != "INR":
-        abort(400)
-
-    razorpay_order_id = payment_entity.get("order_id")
-    amount_paid = payment_entity.get("amount", 0) / 100
-
-    if not razorpay_order_id:
-        abort(400)
-
     conn = get_db_connection()
 
-    order = conn.execute(
-        "SELECT * FROM orders WHERE razorpay_order_id = ?",
-        (razorpay_order_id,)
-    ).fetchone()
-
-    if not order:
-        conn.close()
-        abort(404)
-
-    # Idempotency protection
-    if order["payment_status"] == "PAID":
-        conn.close()
-        return {"status": "already_processed"}
-
-    if float(order["total_amount"]) != float(amount_paid):
-        conn.close()
-        abort(400)
-
-    # Update status
-    conn.execute(
-        """
-        UPDATE orders
-        SET payment_status = 'PAID',
-            order_status = 'CONFIRMED'
-        WHERE id = ?
-        """,
-        (order["id"],)
+    recorded = record_event(
+        conn,
+        payload,
+        request_body,
+        request.headers.get("X-Razorpay-Event-Id")
     )
 
     conn.commit()
     conn.close()
 
-    payment_logger.info(
-        f"Payment marked PAID and order CONFIRMED for order {order['id']}"
-    )
+    if not recorded:
+        return {"status": "duplicate"}
 
-    # Send confirmation email (non-blocking)
-    email = order.get("email")
-
-    if email:
-        try:
-            subject, html_content = upi_payment_confirmed_email(
-                order["full_name"],
-                order["id"],
-                order["total_amount"]
-            )
-
-            send_email_async(
-                email,
-                subject,
-                html_content,
-                is_html=True
-            )
-        except Exception as e:
-            payment_logger.error(f"Email sending failed: {str(e)}")
-
-    return {"status": "success"}
+    return {"status": "queued"}
 
 
 # =====================================================
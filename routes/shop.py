@@ -1,5 +1,15 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session
 from database.db import get_db_connection
+from database.search import match_clause, rank_expression, search_products
+from database.pagination import KeysetSort, keyset_page, count_rows
+from utils.catalog_cache import (
+    product_cache,
+    get_listing,
+    get_categories,
+    get_active_coupon,
+    get_product,
+    with_live_stock
+)
 import os
 import uuid
 
@@ -22,68 +32,103 @@ def home():
     search_query = request.args.get("search", "").strip()
     category = request.args.get("category", "").strip()
     sort = request.args.get("sort", "").strip()
-    page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
 
     per_page = 8
-    offset = (page - 1) * per_page
 
     conn = get_db_connection()
 
     base_query = " FROM products p WHERE 1=1 "
     params = []
 
+    select_query = """
+        SELECT p.*,
+               p.primary_media_url AS preview_image
+    """
+    select_params = []
+
     if search_query:
-        base_query += " AND p.name ILIKE %s "
-        params.append(f"%{search_query}%")
+        match_sql, match_params = match_clause(search_query)
+        base_query += " AND " + match_sql
+        params += match_params
 
     if category:
         base_query += " AND p.category = %s "
         params.append(category)
 
+    # Every sort ends with p.id so the keyset is unique
     if sort == "price_low":
-        order_by = " ORDER BY p.price ASC "
+        listing_sort = KeysetSort(
+            [("p.price", [], "price"), ("p.id", [], "id")],
+            descending=False
+        )
     elif sort == "price_high":
-        order_by = " ORDER BY p.price DESC "
+        listing_sort = KeysetSort(
+            [("p.price", [], "price"), ("p.id", [], "id")],
+            descending=True
+        )
+    elif search_query:
+        # Best matches first when searching without an explicit sort
+        rank_sql, rank_params = rank_expression(search_query)
+        select_query += ", " + rank_sql + " AS rank "
+        select_params += rank_params
+        listing_sort = KeysetSort(
+            [(rank_sql, rank_params, "rank"), ("p.id", [], "id")],
+            descending=True
+        )
     else:
-        order_by = " ORDER BY p.id DESC "
+        listing_sort = KeysetSort([("p.id", [], "id")], descending=True)
+
+    # Old ?page=N links without a cursor still land on the right page
+    offset = 0 if cursor else (page - 1) * per_page
+
+    def load_listing():
+        total, is_estimate = count_rows(
+            conn, base_query, params, cache=product_cache
+        )
+
+        rows, next_cur, prev_cur = keyset_page(
+            conn,
+            select_query,
+            select_params,
+            base_query,
+            params,
+            listing_sort,
+            cursor,
+            per_page,
+            offset=offset
+        )
+
+        return {
+            "products": [dict(row) for row in rows],
+            "total": total,
+            "is_estimate": is_estimate,
+            "next_cursor": next_cur,
+            "prev_cursor": prev_cur
+        }
+
+    listing = get_listing(
+        [search_query, category, sort, cursor, offset],
+        load_listing
+    )
 
-    count_query = "SELECT COUNT(*) as count " + base_query
-    count_row = conn.execute(count_query, params).fetchone()
-    total_products = count_row["count"]
+    products = with_live_stock(conn, listing["products"])
+    total_products = listing["total"]
+    count_is_estimate = listing["is_estimate"]
+    next_cursor = listing["next_cursor"]
+    prev_cursor = listing["prev_cursor"]
 
-    query = """
-        SELECT p.*,
-        (
-            SELECT pm.media_url
-            FROM product_media pm
-            WHERE pm.product_id = p.id
-            ORDER BY pm.id ASC
-            LIMIT 1
-        ) AS preview_image
-    """ + base_query + order_by + " LIMIT %s OFFSET %s "
-
-    products = conn.execute(query, params + [per_page, offset]).fetchall()
-
-    categories = conn.execute(
-        "SELECT DISTINCT category FROM products ORDER BY category ASC"
-    ).fetchall()
+    categories = get_categories(conn)
 
     # =========================
     # DYNAMIC ACTIVE COUPON
     # =========================
-    active_coupon = conn.execute(
-        """
-        SELECT code, discount_type, discount_value
-        FROM coupons
-        WHERE is_active = 1
-        ORDER BY id DESC
-        LIMIT 1
-        """
-    ).fetchone()
+    active_coupon = get_active_coupon(conn)
 
     conn.close()
 
-    total_pages = (total_products + per_page - 1) // per_page
+    total_pages = max((total_products + per_page - 1) // per_page, page)
 
     return render_template(
         "shop/home.html",
@@ -94,6 +139,9 @@ def home():
         sort=sort,
         page=page,
         total_pages=total_pages,
+        count_is_estimate=count_is_estimate,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
         active_coupon=active_coupon   # ✅ passed to template
     )
 
@@ -106,18 +154,17 @@ def product_detail(product_id):
 
     conn = get_db_connection()
 
-    product = conn.execute(
-        "SELECT * FROM products WHERE id = %s",
-        (product_id,)
-    ).fetchone()
+    product = get_product(conn, product_id)
 
     if not product:
         conn.close()
         return "Product not found", 404
 
+    product = with_live_stock(conn, [product])[0]
+
     media = conn.execute(
         """
-        SELECT media_url, media_type
+        SELECT media_url, media_type, variant_key
         FROM product_media
         WHERE product_id = %s
         ORDER BY id ASC
@@ -200,32 +247,29 @@ def contact():
 def search():
 
     query = request.args.get("q", "").strip()
+    page = request.args.get("page", 1, type=int)
+
+    per_page = 12
+    total_results = 0
 
     conn = get_db_connection()
 
     if query:
-        search_term = f"%{query}%"
-
-        products = conn.execute("""
-            SELECT p.*,
-                   (
-                       SELECT pm.media_url
-                       FROM product_media pm
-                       WHERE pm.product_id = p.id
-                       LIMIT 1
-                   ) AS preview_image
-            FROM products p
-            WHERE p.name ILIKE %s
-               OR p.description ILIKE %s
-            ORDER BY p.created_at DESC
-        """, (search_term, search_term)).fetchall()
+        products, total_results = search_products(
+            conn, query, page=page, per_page=per_page
+        )
     else:
         products = []
 
     conn.close()
 
+    total_pages = (total_results + per_page - 1) // per_page
+
     return render_template(
         "shop/search.html",
         products=products,
-        query=query
+        query=query,
+        page=page,
+        total_pages=total_pages,
+        total_results=total_results
     )
\ No newline at end of file
@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template, session, redirect, url_for, request
 from database.db import get_db_connection
+from database.sales_rollup import order_snapshot, record_order_change
+from database.order_transitions import restock_orders
+from utils.formatting import format_timestamp
 from datetime import datetime, timedelta
 
 user_bp = Blueprint("user", __name__, url_prefix="/user")
@@ -8,12 +11,6 @@ user_bp = Blueprint("user", __name__, url_prefix="/user")
 # =========================
 # HELPERS
 # =========================
-def format_timestamp(ts):
-    if not ts:
-        return ""
-    return datetime.fromtimestamp(int(ts)).strftime("%d %b %Y, %I:%M %p")
-
-
 def calculate_estimated_delivery(created_ts, status):
     if not created_ts:
         return None
@@ -179,13 +176,9 @@ def cancel_order(order_id):
 
     conn = get_db_connection()
 
-    order = conn.execute("""
-        SELECT id, order_status
-        FROM orders
-        WHERE id = ? AND user_id = ?
-    """, (order_id, session["user_id"])).fetchone()
+    order = order_snapshot(conn, order_id)
 
-    if not order:
+    if not order or order["user_id"] != session["user_id"]:
         conn.close()
         return "Order not found", 404
 
@@ -193,18 +186,7 @@ def cancel_order(order_id):
         conn.close()
         return redirect(url_for("user.my_orders"))
 
-    items = conn.execute("""
-        SELECT product_id, quantity
-        FROM order_items
-        WHERE order_id = ?
-    """, (order_id,)).fetchall()
-
-    for item in items:
-        conn.execute("""
-            UPDATE products
-            SET stock = stock + ?
-            WHERE id = ?
-        """, (item["quantity"], item["product_id"]))
+    restock_orders(conn, [order_id])
 
     conn.execute("""
         UPDATE orders
@@ -212,6 +194,8 @@ def cancel_order(order_id):
         WHERE id = ?
     """, (order_id,))
 
+    record_order_change(conn, order, dict(order, order_status="CANCELLED"))
+
     conn.execute("""
         INSERT INTO order_status_history
         (order_id, status, message, created_at)
@@ -1,17 +1,60 @@
+from functools import wraps
 from flask import session, redirect, url_for
+from config import Config
+from database.db import get_db_connection
+from utils.cache import Cache
 
-def admin_required():
+
+# users.is_admin by user id. Anything that grants or revokes admin
+# rights must call invalidate_admin_role(user_id) after committing.
+admin_role_cache = Cache("auth:is_admin", ttl=Config.ADMIN_ROLE_CACHE_TTL)
+
+
+def is_admin(user_id):
+
+    def load():
+        conn = get_db_connection()
+        user = conn.execute(
+            "SELECT is_admin FROM users WHERE id = ?",
+            (user_id,)
+        ).fetchone()
+        conn.close()
+
+        return bool(user and int(user["is_admin"]) == 1)
+
+    return admin_role_cache.get_or_set(user_id, load)
+
+
+def remember_admin_role(user_id, admin):
     """
-    Simple admin guard.
+    Called at login with the role already read from users.
+    """
+
+    admin_role_cache.set(user_id, bool(admin))
+
+
+def invalidate_admin_role(user_id=None):
+    if user_id is None:
+        admin_role_cache.invalidate()
+    else:
+        admin_role_cache.delete(user_id)
+
+
+def admin_required(view):
+    """
+    Admin guard for views.
     Usage:
-        check = admin_required()
-        if check:
-            return check
+        @admin_bp.route("/dashboard")
+        @admin_required
+        def dashboard():
+            ...
     """
-    if not session.get("user_id"):
-        return redirect(url_for("auth.login"))
 
-    if not session.get("is_admin"):
-        return redirect(url_for("shop.home"))
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not session.get("user_id") or not is_admin(session["user_id"]):
+            return redirect(url_for("auth.login"))
+
+        return view(*args, **kwargs)
 
-    return None
+    return wrapped
@@ -0,0 +1,233 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+
+# =========================
+# BACKENDS
+# =========================
+class MemoryBackend:
+    """
+    In-process TTL + LRU store. Only correct with a single worker:
+    invalidations never reach other processes.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+
+class SQLiteBackend:
+    """
+    Cross-process store in a local SQLite file, so every gunicorn
+    worker on the host sees the same entries and invalidations.
+    """
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed_at
+            ON cache_entries (accessed_at)
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        now = time.time()
+
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?",
+            (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        if row[1] <= now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            return None
+
+        conn.execute(
+            "UPDATE cache_entries SET accessed_at = ? WHERE key = ?",
+            (now, key)
+        )
+
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        now = time.time()
+
+        conn.execute(
+            """
+            INSERT INTO cache_entries (key, value, expires_at, accessed_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value,
+                expires_at = excluded.expires_at,
+                accessed_at = excluded.accessed_at
+            """,
+            (key, pickle.dumps(value), now + ttl, now)
+        )
+
+        # Evict least recently used entries beyond the limit
+        conn.execute(
+            """
+            DELETE FROM cache_entries
+            WHERE key IN (
+                SELECT key FROM cache_entries
+                ORDER BY accessed_at DESC
+                LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix):
+        self._conn().execute(
+            "DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?",
+            (len(prefix), prefix)
+        )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if Config.CACHE_BACKEND == "sqlite":
+                    _backend = SQLiteBackend(
+                        Config.CACHE_SQLITE_PATH,
+                        Config.CACHE_MAX_ENTRIES
+                    )
+                else:
+                    _backend = MemoryBackend(Config.CACHE_MAX_ENTRIES)
+
+    return _backend
+
+
+# =========================
+# NAMESPACED CACHE
+# =========================
+class Cache:
+    """
+    A namespace inside the configured backend.
+
+        categories = Cache("catalog:categories")
+        rows = categories.get_or_set("all", load_categories)
+        categories.invalidate()
+    """
+
+    def __init__(self, namespace, ttl=None, backend=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def _key(self, key):
+        if not isinstance(key, str):
+            key = json.dumps(key, sort_keys=True, default=str)
+
+        return f"{self.namespace}:{key}"
+
+    # Values are stored boxed in a 1-tuple so a cached None
+    # (e.g. "no active coupon") is still a hit.
+    def get(self, key):
+        box = self.backend.get(self._key(key))
+        return box[0] if box is not None else None
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl or self.ttl or Config.CACHE_DEFAULT_TTL
+        self.backend.set(self._key(key), (value,), ttl)
+
+    def get_or_set(self, key, loader, ttl=None):
+        box = self.backend.get(self._key(key))
+
+        if box is not None:
+            return box[0]
+
+        value = loader()
+        self.set(key, value, ttl)
+
+        return value
+
+    def delete(self, key):
+        self.backend.delete(self._key(key))
+
+    def invalidate(self):
+        self.backend.delete_prefix(f"{self.namespace}:")
@@ -0,0 +1,99 @@
+from config import Config
+from utils.cache import Cache
+
+
+# Storefront data that only changes when an admin edits the catalog.
+# Admin routes call the invalidate_* hooks after committing. Stock
+# changes with every order, so cached products are served through
+# with_live_stock() rather than invalidated per sale.
+product_cache = Cache("catalog:products", ttl=Config.CATALOG_CACHE_TTL)
+category_cache = Cache("catalog:categories", ttl=Config.CATALOG_CACHE_TTL)
+coupon_cache = Cache("catalog:coupons", ttl=Config.CATALOG_CACHE_TTL)
+
+
+def _rows(rows):
+    return [dict(row) for row in rows]
+
+
+def get_categories(conn):
+    return category_cache.get_or_set(
+        "all",
+        lambda: _rows(conn.execute(
+            "SELECT DISTINCT category FROM products ORDER BY category ASC"
+        ).fetchall())
+    )
+
+
+def get_active_coupon(conn):
+
+    def load():
+        coupon = conn.execute(
+            """
+            SELECT code, discount_type, discount_value
+            FROM coupons
+            WHERE is_active = 1
+            ORDER BY id DESC
+            LIMIT 1
+            """
+        ).fetchone()
+
+        return dict(coupon) if coupon else None
+
+    return coupon_cache.get_or_set("active", load)
+
+
+def get_product(conn, product_id):
+
+    def load():
+        product = conn.execute(
+            "SELECT * FROM products WHERE id = ?",
+            (product_id,)
+        ).fetchone()
+
+        return dict(product) if product else None
+
+    return product_cache.get_or_set(("product", product_id), load)
+
+
+def with_live_stock(conn, products):
+    """
+    Copies of cached product dicts with the current stock, read in one
+    primary-key lookup. Products deleted since caching show 0.
+    """
+
+    if not products:
+        return []
+
+    ids = [product["id"] for product in products]
+    placeholders = ", ".join(["?"] * len(ids))
+
+    stock = {
+        row["id"]: row["stock"]
+        for row in conn.execute(
+            f"SELECT id, stock FROM products WHERE id IN ({placeholders})",
+            ids
+        ).fetchall()
+    }
+
+    return [dict(product, stock=stock.get(product["id"], 0)) for product in products]
+
+
+def get_listing(key, loader):
+    """
+    Cache one storefront listing page. key identifies the filters,
+    sort and cursor; loader returns a picklable page.
+    """
+
+    return product_cache.get_or_set(("listing", key), loader)
+
+
+# =========================
+# INVALIDATION HOOKS
+# =========================
+def invalidate_products():
+    product_cache.invalidate()
+    category_cache.invalidate()
+
+
+def invalidate_coupons():
+    coupon_cache.invalidate()
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+from config import Config
+from database.db import get_db_connection
+from database.dashboard_metrics import load_dashboard_metrics
+from utils.cache import Cache
+
+
+logger = logging.getLogger("dashboard_cache")
+
+
+# Stale-while-revalidate: a snapshot younger than DASHBOARD_CACHE_TTL is
+# served as is; an older one is still served while one background thread
+# recomputes it. Only a missing (or very old) snapshot blocks a request.
+dashboard_cache = Cache("admin:dashboard", ttl=Config.DASHBOARD_CACHE_MAX_STALE)
+
+_refresh_lock = threading.Lock()
+
+
+def _compute():
+    conn = get_db_connection()
+
+    try:
+        snapshot = {
+            "metrics": load_dashboard_metrics(conn),
+            "computed_at": int(time.time())
+        }
+    finally:
+        conn.close()
+
+    dashboard_cache.set("snapshot", snapshot)
+
+    return snapshot
+
+
+def _claim_lease():
+    """
+    Best-effort guard across worker processes sharing the cache
+    backend; within a process _refresh_lock is authoritative.
+    """
+
+    if dashboard_cache.get("lease"):
+        return False
+
+    dashboard_cache.set("lease", True, ttl=Config.DASHBOARD_CACHE_TTL)
+    return True
+
+
+def _refresh_in_background():
+    if not _refresh_lock.acquire(blocking=False):
+        return
+
+    if not _claim_lease():
+        _refresh_lock.release()
+        return
+
+    def run():
+        try:
+            _compute()
+        except Exception as e:
+            logger.error(f"Dashboard refresh failed: {str(e)}")
+        finally:
+            _refresh_lock.release()
+
+    threading.Thread(target=run, name="dashboard-refresh", daemon=True).start()
+
+
+def get_dashboard_snapshot():
+    """
+    Returns {"metrics": DashboardMetrics, "computed_at": epoch seconds}.
+    """
+
+    snapshot = dashboard_cache.get("snapshot")
+
+    if snapshot is None:
+        # Single flight: concurrent requests wait for one computation
+        with _refresh_lock:
+            snapshot = dashboard_cache.get("snapshot")
+
+            if snapshot is None:
+                snapshot = _compute()
+
+        return snapshot
+
+    if time.time() - snapshot["computed_at"] >= Config.DASHBOARD_CACHE_TTL:
+        _refresh_in_background()
+
+    return snapshot
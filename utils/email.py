@@ -6,16 +6,44 @@ from email.mime.text import MIMEText
 from config import Config
 
 
+# Handlers are set up in utils/logging_setup.py
 logger = logging.getLogger("email_logger")
 
-if not logger.handlers:
-    logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter(
-        "%(asctime)s - %(levelname)s - %(message)s"
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+
+def mail_configured():
+    if not Config.MAIL_REQUIRE_AUTH:
+        return bool(Config.MAIL_SERVER)
+
+    return bool(Config.MAIL_USERNAME and Config.MAIL_PASSWORD)
+
+
+def open_smtp_connection():
+    if Config.MAIL_USE_SSL:
+        server = smtplib.SMTP_SSL(Config.MAIL_SERVER, Config.MAIL_PORT, timeout=30)
+    else:
+        server = smtplib.SMTP(Config.MAIL_SERVER, Config.MAIL_PORT, timeout=30)
+
+        if Config.MAIL_USE_TLS:
+            server.starttls()
+
+    if Config.MAIL_USERNAME and Config.MAIL_PASSWORD:
+        server.login(Config.MAIL_USERNAME, Config.MAIL_PASSWORD)
+
+    return server
+
+
+def build_message(to_email, subject, body, is_html=False):
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = Config.MAIL_FROM or Config.MAIL_USERNAME or "noreply@localhost"
+    msg["To"] = to_email
+
+    if is_html:
+        msg.attach(MIMEText(body, "html"))
+    else:
+        msg.attach(MIMEText(body, "plain"))
+
+    return msg
 
 
 def send_email(to_email, subject, body, is_html=False):
@@ -24,23 +52,14 @@ def send_email(to_email, subject, body, is_html=False):
     Will not crash app if SMTP fails.
     """
 
-    if not Config.MAIL_USERNAME or not Config.MAIL_PASSWORD:
+    if not mail_configured():
         logger.warning("Email skipped: MAIL credentials not configured.")
         return
 
     try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = Config.MAIL_USERNAME
-        msg["To"] = to_email
-
-        if is_html:
-            msg.attach(MIMEText(body, "html"))
-        else:
-            msg.attach(MIMEText(body, "plain"))
-
-        with smtplib.SMTP_SSL(Config.MAIL_SERVER, Config.MAIL_PORT) as server:
-            server.login(Config.MAIL_USERNAME, Config.MAIL_PASSWORD)
+        msg = build_message(to_email, subject, body, is_html)
+
+        with open_smtp_connection() as server:
             server.send_message(msg)
 
         logger.info(f"Email sent successfully to {to_email}")
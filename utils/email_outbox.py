@@ -0,0 +1,343 @@
+"""
+Durable email outbox.
+
+Emails are written to the email_outbox table (ideally in the same
+transaction as the change they announce) and delivered by a small,
+bounded pool of worker threads. Each worker keeps one authenticated
+SMTP connection open and sends a whole batch over it; failures are
+retried with exponential backoff.
+
+Run standalone (e.g. as a separate Procfile process):
+    python -m utils.email_outbox            # keep draining
+    python -m utils.email_outbox --once     # drain and exit
+
+Local SMTP stand-in for testing:
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_SSL=0 MAIL_REQUIRE_AUTH=0
+"""
+
+import argparse
+import os
+import smtplib
+import threading
+import time
+from config import Config
+from database.db import get_db_connection
+from utils import logging_setup
+from utils.email import build_message, mail_configured, open_smtp_connection, logger
+
+
+_wakeup = threading.Event()
+_workers = []
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+# =========================
+# ENQUEUE
+# =========================
+def enqueue_many(conn, messages):
+    """
+    messages: [(to_email, subject, body, is_html), ...]
+
+    Inserted on the caller's connection and committed with the
+    caller's transaction, so mail is only sent for changes that
+    actually committed.
+    """
+
+    if not messages:
+        return
+
+    if not mail_configured():
+        logger.warning("Email skipped: MAIL credentials not configured.")
+        return
+
+    now = int(time.time())
+    placeholders = ", ".join(["(?, ?, ?, ?, 'PENDING', 0, ?, ?)"] * len(messages))
+    params = [
+        value
+        for to_email, subject, body, is_html in messages
+        for value in (to_email, subject, body, 1 if is_html else 0, now, now)
+    ]
+
+    conn.execute(
+        f"""
+        INSERT INTO email_outbox
+        (to_email, subject, body, is_html, status, attempts,
+         next_attempt_at, created_at)
+        VALUES {placeholders}
+        """,
+        params
+    )
+
+    _wakeup.set()
+
+
+def enqueue_email(to_email, subject, body, is_html=False, *, conn):
+    """
+    One message on the caller's connection; the caller commits.
+    """
+
+    enqueue_many(conn, [(to_email, subject, body, is_html)])
+
+
+# =========================
+# DELIVERY
+# =========================
+def _claim_batch(conn, batch_size):
+    now = int(time.time())
+    stale_before = now - Config.EMAIL_OUTBOX_LOCK_TIMEOUT
+
+    lock_clause = "FOR UPDATE SKIP LOCKED" if conn.db_type == "postgres" else ""
+
+    # Rows left in SENDING by a crashed worker become claimable again
+    rows = conn.execute(
+        f"""
+        UPDATE email_outbox
+        SET status = 'SENDING', locked_at = ?
+        WHERE id IN (
+            SELECT id FROM email_outbox
+            WHERE (status = 'PENDING' AND next_attempt_at <= ?)
+               OR (status = 'SENDING' AND locked_at < ?)
+            ORDER BY id
+            LIMIT ?
+            {lock_clause}
+        )
+        RETURNING id, to_email, subject, body, is_html, attempts
+        """,
+        (now, now, stale_before, batch_size)
+    ).fetchall()
+
+    conn.commit()
+
+    return rows
+
+
+def _backoff(attempts):
+    return min(
+        Config.EMAIL_OUTBOX_BACKOFF_BASE * (2 ** (attempts - 1)),
+        Config.EMAIL_OUTBOX_BACKOFF_MAX
+    )
+
+
+class SMTPUnavailable(Exception):
+    """
+    The server could not be reached or logged in to; unlike a refused
+    recipient, every other message in the batch would fail the same way.
+    """
+
+
+class SMTPSession:
+    """
+    One reusable, authenticated SMTP connection per worker.
+    """
+
+    def __init__(self):
+        self.server = None
+        self.opened_at = 0
+
+    def _open(self):
+        self.server = open_smtp_connection()
+        self.opened_at = time.monotonic()
+
+    def _alive(self):
+        if self.server is None:
+            return False
+
+        if time.monotonic() - self.opened_at > Config.EMAIL_SMTP_MAX_CONNECTION_AGE:
+            self.close()
+            return False
+
+        try:
+            return self.server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def _reconnect(self):
+        self.close()
+
+        try:
+            self._open()
+        except (smtplib.SMTPException, OSError) as e:
+            self.close()
+            raise SMTPUnavailable(str(e)) from e
+
+    def send(self, msg):
+        if not self._alive():
+            self._reconnect()
+
+        try:
+            self.server.send_message(msg)
+            return
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Server dropped an idle connection between NOOP and send
+            self._reconnect()
+
+        try:
+            self.server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, OSError) as e:
+            self.close()
+            raise SMTPUnavailable(str(e)) from e
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+        self.server = None
+
+
+def _release(conn, ids, now, error):
+    placeholders = ", ".join(["?"] * len(ids))
+
+    conn.execute(
+        f"""
+        UPDATE email_outbox
+        SET status = 'PENDING', next_attempt_at = ?, last_error = ?, locked_at = NULL
+        WHERE id IN ({placeholders})
+        """,
+        [now + Config.EMAIL_OUTBOX_BACKOFF_BASE, error[:500]] + ids
+    )
+
+
+def process_batch(smtp, batch_size=None):
+    """
+    Claim and send one batch. Returns the number of rows handled.
+    """
+
+    conn = get_db_connection()
+
+    try:
+        rows = _claim_batch(conn, batch_size or Config.EMAIL_OUTBOX_BATCH_SIZE)
+
+        sent_ids = []
+        now = int(time.time())
+
+        for i, row in enumerate(rows):
+            msg = build_message(
+                row["to_email"], row["subject"], row["body"], bool(row["is_html"])
+            )
+
+            try:
+                smtp.send(msg)
+                sent_ids.append(row["id"])
+                logger.info(f"Email sent successfully to {row['to_email']}")
+            except SMTPUnavailable as e:
+                # Stop here rather than time out once per row (which could
+                # outlast the claim and let another worker resend them);
+                # the unsent rows go back without spending an attempt
+                _release(conn, [r["id"] for r in rows[i:]], now, str(e))
+                logger.error(f"Email server unavailable, {len(rows) - i} emails deferred: {str(e)}")
+                break
+            except Exception as e:
+                smtp.close()
+                attempts = row["attempts"] + 1
+                status = "FAILED" if attempts >= Config.EMAIL_OUTBOX_MAX_ATTEMPTS else "PENDING"
+
+                conn.execute(
+                    """
+                    UPDATE email_outbox
+                    SET status = ?, attempts = ?, next_attempt_at = ?,
+                        last_error = ?, locked_at = NULL
+                    WHERE id = ?
+                    """,
+                    (status, attempts, now + _backoff(attempts), str(e)[:500], row["id"])
+                )
+                logger.error(f"Email sending failed (attempt {attempts}): {str(e)}")
+
+        if sent_ids:
+            placeholders = ", ".join(["?"] * len(sent_ids))
+            conn.execute(
+                f"""
+                UPDATE email_outbox
+                SET status = 'SENT', sent_at = ?, locked_at = NULL
+                WHERE id IN ({placeholders})
+                """,
+                [now] + sent_ids
+            )
+
+        conn.commit()
+
+        return len(rows)
+
+    finally:
+        conn.close()
+
+
+def _worker_loop(stop_event):
+    smtp = SMTPSession()
+
+    while not stop_event.is_set():
+        try:
+            handled = process_batch(smtp)
+        except Exception as e:
+            logger.error(f"Email outbox worker error: {str(e)}")
+            handled = 0
+
+        if handled:
+            continue
+
+        # Idle: close the SMTP connection rather than hold it open
+        if _wakeup.wait(Config.EMAIL_OUTBOX_POLL_INTERVAL):
+            _wakeup.clear()
+        elif smtp.server is not None:
+            smtp.close()
+
+    smtp.close()
+
+
+def start_workers(count=None):
+    """
+    Start the bounded worker pool once per process (gunicorn forks
+    after import, so the pid is checked).
+    """
+
+    global _workers_pid
+
+    count = Config.EMAIL_OUTBOX_WORKERS if count is None else count
+
+    if count <= 0 or _workers_pid == os.getpid():
+        return
+
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+
+        stop_event = threading.Event()
+        _workers.clear()
+
+        for i in range(count):
+            thread = threading.Thread(
+                target=_worker_loop,
+                args=(stop_event,),
+                name=f"email-outbox-{i}",
+                daemon=True
+            )
+            thread.start()
+            _workers.append(thread)
+
+        _workers_pid = os.getpid()
+
+
+def init_app(app):
+    app.before_request(start_workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deliver queued emails")
+    parser.add_argument("--once", action="store_true", help="drain the outbox and exit")
+    args = parser.parse_args()
+
+    logging_setup.configure()
+
+    if args.once:
+        session = SMTPSession()
+        while process_batch(session):
+            pass
+        session.close()
+    else:
+        _worker_loop(threading.Event())
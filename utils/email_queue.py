@@ -1,11 +1,11 @@
-import threading
-from utils.email import send_email
+from utils.email_outbox import enqueue_email
 
 
-def send_email_async(to_email, subject, body, is_html=False):
-    thread = threading.Thread(
-        target=send_email,
-        args=(to_email, subject, body, is_html),
-        daemon=True  # Prevents worker hang in production
-    )
-    thread.start()
+def send_email_async(to_email, subject, body, is_html=False, *, conn):
+    """
+    Kept for existing callers: mail now goes through the durable
+    outbox (utils/email_outbox.py) instead of a thread per email.
+    The caller commits conn.
+    """
+
+    enqueue_email(to_email, subject, body, is_html=is_html, conn=conn)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from functools import lru_cache
+
+
+TIMESTAMP_FORMAT = "%d %b %Y, %I:%M %p"
+
+
+@lru_cache(maxsize=4096)
+def _format_minute(minute):
+    return datetime.fromtimestamp(minute * 60).strftime(TIMESTAMP_FORMAT)
+
+
+def format_timestamp(ts):
+    """
+    Epoch seconds -> "17 Oct 2026, 10:12 PM". The format has minute
+    resolution, so results are cached per minute.
+    """
+
+    if not ts:
+        return ""
+
+    return _format_minute(int(ts) // 60)
+
+
+def init_app(app):
+    app.add_template_filter(format_timestamp, "timestamp")
@@ -0,0 +1,326 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+from config import Config, BASE_DIR
+
+
+logger = logging.getLogger("image_pipeline")
+
+
+# Longest edge in pixels; sources are never upscaled
+IMAGE_SIZES = {
+    "thumb": 320,
+    "card": 640,
+    "large": 1280,
+}
+
+FORMAT_OPTIONS = {
+    "webp": {"format": "WEBP", "method": 4},
+    "avif": {"format": "AVIF"},
+}
+
+KEY_LENGTH = 32
+
+
+# =========================
+# CONTENT ADDRESSING
+# =========================
+def variant_key(data):
+    """
+    Derivatives live under a hash of the source bytes, so the same
+    picture uploaded twice (or to two products) is processed once.
+    """
+
+    return hashlib.sha256(data).hexdigest()[:KEY_LENGTH]
+
+
+def _formats():
+    return [f.strip() for f in Config.IMAGE_VARIANT_FORMATS.split(",") if f.strip()]
+
+
+def variant_path(key, size, fmt):
+    """
+    Path under static/; IMAGE_VARIANTS_ROOT must be static/derived.
+    """
+
+    return f"derived/{key[:2]}/{key}/{size}.{fmt}"
+
+
+# Derivative files seen on this instance's disk. Only hits are kept:
+# a missing file may still be written by the pipeline or a backfill
+_present = set()
+
+
+def _has_variant(key, size, fmt):
+    """
+    static/derived is local to each instance and lost on redeploy,
+    so a stored key does not guarantee the file is here.
+    """
+
+    path = variant_path(key, size, fmt)
+
+    if path in _present:
+        return True
+
+    if os.path.exists(os.path.join(Config.IMAGE_VARIANTS_ROOT, key[:2], key, f"{size}.{fmt}")):
+        _present.add(path)
+        return True
+
+    return False
+
+
+def _is_complete(key):
+    return all(
+        os.path.exists(
+            os.path.join(Config.IMAGE_VARIANTS_ROOT, key[:2], key, f"{size}.{fmt}")
+        )
+        for size in IMAGE_SIZES
+        for fmt in _formats()
+    )
+
+
+# =========================
+# RENDERING (runs in the pool)
+# =========================
+def _render(data, key, root, formats, quality):
+    """
+    Decode once, then write every size/format. Files are written to a
+    temporary name and renamed so readers never see a partial image.
+    """
+
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    target = os.path.join(root, key[:2], key)
+    os.makedirs(target, exist_ok=True)
+
+    for size, edge in IMAGE_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+
+        for fmt in formats:
+            path = os.path.join(target, f"{size}.{fmt}")
+            tmp = f"{path}.{os.getpid()}.tmp"
+
+            resized.save(tmp, quality=quality, **FORMAT_OPTIONS[fmt])
+            os.replace(tmp, path)
+
+    return key
+
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    """
+    Spawned (not forked) workers: the web process already runs
+    threads such as the email outbox, which fork would copy mid-lock.
+    """
+
+    global _executor, _executor_pid
+
+    if _executor is None or _executor_pid != os.getpid():
+        with _lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(
+                    max_workers=Config.IMAGE_PIPELINE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                _executor_pid = os.getpid()
+
+    return _executor
+
+
+# =========================
+# PUBLIC API
+# =========================
+class VariantJob:
+    """
+    Handle for one submitted image; result() returns the variant key,
+    or None when the source could not be processed.
+    """
+
+    def __init__(self, key, future=None):
+        self.key = key
+        self.future = future
+
+    def result(self):
+        if self.future is None:
+            return self.key
+
+        try:
+            self.future.result(timeout=Config.IMAGE_PIPELINE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Image variants failed for {self.key}: {str(e)}")
+            return None
+
+        return self.key
+
+
+def submit_variants(data):
+    """
+    Queue derivative generation for raw image bytes. Already processed
+    content (same hash, all files on disk) is not submitted again.
+    """
+
+    key = variant_key(data)
+
+    if _is_complete(key):
+        return VariantJob(key)
+
+    future = _get_executor().submit(
+        _render,
+        data,
+        key,
+        Config.IMAGE_VARIANTS_ROOT,
+        _formats(),
+        Config.IMAGE_VARIANT_QUALITY
+    )
+
+    return VariantJob(key, future)
+
+
+def generate_variants(data):
+    return submit_variants(data).result()
+
+
+# =========================
+# TEMPLATE HELPERS
+# =========================
+def media_variant(key, size="card", fallback=None, fmt=None):
+    """
+    URL of a derivative, or `fallback` (usually the original media
+    URL) for media whose variants are not on this instance's disk.
+    """
+
+    from flask import url_for
+
+    fmt = fmt or _formats()[0]
+
+    if not key or size not in IMAGE_SIZES or not _has_variant(key, size, fmt):
+        return fallback
+
+    return url_for("static", filename=variant_path(key, size, fmt))
+
+
+def media_srcset(key, fmt=None):
+    """
+    Empty (the browser then uses src) unless every size is present.
+    """
+
+    fmt = fmt or _formats()[0]
+
+    if not key or not all(_has_variant(key, size, fmt) for size in IMAGE_SIZES):
+        return ""
+
+    return ", ".join(
+        f"{media_variant(key, size, fmt=fmt)} {edge}w"
+        for size, edge in IMAGE_SIZES.items()
+    )
+
+
+def init_app(app):
+    app.add_template_global(media_variant)
+    app.add_template_global(media_srcset)
+
+
+# =========================
+# BACKFILL
+# =========================
+def _read_source(url):
+    if url.startswith("/static/"):
+        with open(os.path.join(BASE_DIR, url.lstrip("/")), "rb") as f:
+            return f.read()
+
+    from urllib.request import urlopen
+
+    with urlopen(url, timeout=30) as response:
+        return response.read()
+
+
+def backfill(conn, batch_size=50):
+    """
+    Generate variants for image rows added before the pipeline existed.
+    """
+
+    from database.product_media import refresh_primary_media
+
+    processed = 0
+    last_id = 0
+
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, product_id, media_url
+            FROM product_media
+            WHERE media_type = 'image' AND variant_key IS NULL AND id > ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, batch_size)
+        ).fetchall()
+
+        if not rows:
+            break
+
+        jobs = []
+
+        for row in rows:
+            try:
+                jobs.append((row, submit_variants(_read_source(row["media_url"]))))
+            except Exception as e:
+                logger.warning(f"Skipping media {row['id']}: {str(e)}")
+
+        for row, job in jobs:
+            key = job.result()
+
+            if key:
+                conn.execute(
+                    "UPDATE product_media SET variant_key = ? WHERE id = ?",
+                    (key, row["id"])
+                )
+                refresh_primary_media(conn, row["product_id"])
+                processed += 1
+
+        conn.commit()
+        last_id = rows[-1]["id"]
+
+    return processed
+
+
+def backfill_directory(path):
+    """
+    Variants for loose files such as static/review_uploads; the key is
+    the content hash, so variant_key(file bytes) finds them later.
+    """
+
+    jobs = []
+
+    for name in sorted(os.listdir(path)):
+        if os.path.splitext(name)[1].lower() in (".jpg", ".jpeg", ".png", ".webp"):
+            with open(os.path.join(path, name), "rb") as f:
+                jobs.append(submit_variants(f.read()))
+
+    return sum(1 for job in jobs if job.result())
+
+
+if __name__ == "__main__":
+    from database.db import get_db_connection
+
+    conn = get_db_connection()
+    count = backfill(conn)
+    conn.close()
+
+    reviews = backfill_directory(os.path.join(BASE_DIR, "static", "review_uploads"))
+
+    print(f"✅ Image variants generated for {count} product images and {reviews} review uploads")
@@ -0,0 +1,258 @@
+"""
+Queue-based logging.
+
+The app's own loggers never write from the calling thread: a
+QueueHandler puts each record on an in-memory queue and one
+QueueListener thread per process formats it as a JSON line and writes
+it to its destination (a size-rotated file under LOG_DIR, or stderr).
+
+Records logged inside a request carry its request id (the incoming
+X-Request-ID header, or a generated one, echoed on the response).
+Below WARNING, records can be sampled per logger with
+LOG_SAMPLE_RATES="payment_logger=0.1,email_logger=0.5".
+
+File names may contain {pid}; the default payment log does, so
+several gunicorn workers never rotate the same file. Set a plain
+name (PAYMENT_LOG_FILE=payment_webhook.log) for a single process.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from flask import g, has_request_context, request
+from config import Config
+
+
+# logger name -> Config attribute holding its file name, or "stderr"
+DESTINATIONS = {
+    "payment_logger": "PAYMENT_LOG_FILE",
+    "email_logger": "stderr",
+    "reconciliation": "stderr",
+    "sales_rollup": "stderr",
+}
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_REQUEST_ID_PATTERN = re.compile(r"^[\w.-]{1,64}$")
+
+# Attributes every LogRecord has; anything else came in via extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "taskName"
+}
+
+_queue = queue.SimpleQueue()
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+# =========================
+# FORMAT / FILTERS
+# =========================
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Runs on the calling thread, while the request context still exists.
+    """
+
+    def filter(self, record):
+        record.request_id = g.get("request_id") if has_request_context() else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a share of each logger's records below WARNING; warnings and
+    errors always pass.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        rate = self.rates.get(record.name, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+def _sample_rates():
+    rates = {}
+
+    for item in (Config.LOG_SAMPLE_RATES or "").split(","):
+        name, _, rate = item.partition("=")
+
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+
+    return rates
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Only fixes the message (and traceback) on the calling thread;
+    JSON formatting happens on the listener.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+
+# =========================
+# SETUP
+# =========================
+def _destination_handler(name, destination):
+    if destination == "stderr":
+        handler = logging.StreamHandler()
+    else:
+        filename = getattr(Config, destination).format(pid=os.getpid())
+        os.makedirs(Config.LOG_DIR, exist_ok=True)
+
+        handler = RotatingFileHandler(
+            os.path.join(Config.LOG_DIR, filename),
+            maxBytes=Config.LOG_MAX_BYTES,
+            backupCount=Config.LOG_BACKUP_COUNT,
+            encoding="utf-8"
+        )
+
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(logging.Filter(name))
+    return handler
+
+
+def configure_loggers():
+    """
+    Point the app's loggers at the queue (replacing any handlers they
+    had). LOG_LEVEL only applies to loggers whose level was not set
+    explicitly, e.g. by a benchmark silencing email_logger.
+    """
+
+    handler = _DeferredQueueHandler(_queue)
+    handler.addFilter(SamplingFilter(_sample_rates()))
+    handler.addFilter(RequestIdFilter())
+
+    for name in DESTINATIONS:
+        logger = logging.getLogger(name)
+        logger.handlers = [handler]
+
+        if logger.level == logging.NOTSET:
+            logger.setLevel(Config.LOG_LEVEL)
+
+        logger.propagate = False
+
+
+def start_listener():
+    """
+    Start the writer thread once per process; like the outbox workers
+    it is restarted lazily after a fork.
+    """
+
+    global _listener, _listener_pid
+
+    if _listener_pid == os.getpid():
+        return
+
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+
+        _listener = QueueListener(
+            _queue,
+            *[_destination_handler(name, destination) for name, destination in DESTINATIONS.items()],
+            respect_handler_level=True
+        )
+        _listener.start()
+        _listener_pid = os.getpid()
+
+        atexit.register(stop_listener)
+
+
+def stop_listener():
+    """
+    Flush what is queued and close the files.
+    """
+
+    global _listener, _listener_pid
+
+    with _listener_lock:
+        if _listener is None or _listener_pid != os.getpid():
+            return
+
+        _listener.stop()
+
+        for handler in _listener.handlers:
+            handler.close()
+
+        _listener = None
+        _listener_pid = None
+
+
+def configure():
+    """
+    For CLI entry points, which run without create_app().
+    """
+
+    configure_loggers()
+    start_listener()
+
+
+# =========================
+# REQUEST IDS
+# =========================
+def _assign_request_id():
+    incoming = request.headers.get(REQUEST_ID_HEADER, "")
+    g.request_id = incoming if _REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+
+def _echo_request_id(response):
+    if "request_id" in g:
+        response.headers[REQUEST_ID_HEADER] = g.request_id
+
+    return response
+
+
+def init_app(app):
+    configure()
+
+    app.before_request(start_listener)
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
@@ -0,0 +1,156 @@
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.utils import secure_filename
+from config import Config
+from utils.image_pipeline import submit_variants
+
+
+# =========================
+# BACKENDS
+# =========================
+class MediaStorage:
+    """
+    Stores one uploaded file and returns its public URL.
+    media_type is "image" or "video".
+    """
+
+    def save(self, file, media_type):
+        raise NotImplementedError
+
+
+class CloudinaryStorage(MediaStorage):
+
+    def __init__(self):
+        import cloudinary.uploader
+        import utils.cloudinary_config  # noqa: F401  (configures credentials)
+
+        self._uploader = cloudinary.uploader
+
+    def save(self, file, media_type):
+        if media_type == "video":
+            result = self._uploader.upload(file, resource_type="video")
+        else:
+            result = self._uploader.upload(file)
+
+        return result["secure_url"]
+
+
+class LocalStorage(MediaStorage):
+    """
+    Offline stand-in: files go under static/ and are served by Flask.
+    """
+
+    def __init__(self, root, url_prefix):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+
+        os.makedirs(root, exist_ok=True)
+
+    def save(self, file, media_type):
+        _, ext = os.path.splitext(secure_filename(file.filename or ""))
+        name = f"{media_type}-{uuid.uuid4().hex}{ext.lower()}"
+
+        file.save(os.path.join(self.root, name))
+
+        return f"{self.url_prefix}/{name}"
+
+
+_storage = None
+_executor = None
+_lock = threading.Lock()
+
+
+def get_media_storage():
+    global _storage
+
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                if Config.MEDIA_STORAGE == "local":
+                    _storage = LocalStorage(
+                        Config.MEDIA_LOCAL_ROOT,
+                        Config.MEDIA_LOCAL_URL_PREFIX
+                    )
+                else:
+                    _storage = CloudinaryStorage()
+
+    return _storage
+
+
+def _get_executor():
+    """
+    One bounded pool per process, shared by every request, so
+    concurrent admin uploads cannot multiply threads.
+    """
+
+    global _executor
+
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=Config.MEDIA_UPLOAD_WORKERS,
+                    thread_name_prefix="media-upload"
+                )
+
+    return _executor
+
+
+# =========================
+# UPLOADS
+# =========================
+def upload_media(files, storage=None):
+    """
+    Upload [(file, media_type), ...] concurrently while the image
+    pipeline renders resized variants of each image in its own pool.
+
+    Returns [(url, media_type, variant_key), ...] in the same order as
+    `files`, so the first image stays the product's primary media.
+    variant_key is None for videos and for images the pipeline could
+    not read. Raises the first upload error; call before opening a
+    database transaction.
+    """
+
+    storage = storage or get_media_storage()
+    jobs = []
+
+    for file, media_type in files:
+        variants = None
+
+        if media_type == "image":
+            # Read here, before the upload thread consumes the stream
+            variants = submit_variants(file.read())
+            file.seek(0)
+
+        jobs.append((
+            _get_executor().submit(storage.save, file, media_type),
+            media_type,
+            variants
+        ))
+
+    return [
+        (future.result(), media_type, variants.result() if variants else None)
+        for future, media_type, variants in jobs
+    ]
+
+
+def uploaded_files(request_files):
+    """
+    [(file, media_type), ...] for the product form's "images" and
+    optional "video" fields, skipping empty inputs.
+    """
+
+    files = [
+        (image, "image")
+        for image in request_files.getlist("images")
+        if image and image.filename
+    ]
+
+    video = request_files.get("video")
+
+    if video and video.filename:
+        files.append((video, "video"))
+
+    return files